@@ -0,0 +1,153 @@
+# assets.py
+"""Static asset build: minify, fingerprint and precompress CSS/JS.
+
+`python assets.py` reads every .css and .js file in static/ and writes, into
+static/dist/:
+
+- name.<hash>.ext: the minified file, named by a hash of its content, so a
+  changed file gets a new URL and an unchanged one keeps its URL forever,
+- name.<hash>.ext.gz (and .br when the `brotli` package is installed),
+  compressed once at build time instead of on every request,
+- manifest.json mapping "style.css" -> "dist/style.<hash>.css".
+
+`init_app` makes url_for('static', filename='style.css') return the
+fingerprinted URL from the manifest, and serves dist/ files with
+`Cache-Control: immutable` and a year's max-age, picking the precompressed
+variant the client accepts. Browsers therefore make no static requests at
+all on return visits. Without a manifest (development, build not run) the
+source files are served as usual and revalidated on each page view.
+
+Minification is deliberately conservative (comments and whitespace only),
+since it has no real CSS/JS parser.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional: .br files are skipped without it
+    brotli = None
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+MAX_AGE = 365 * 24 * 3600
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """Drop comment-only lines, blank lines and indentation; leaves code untouched."""
+    out = []
+    in_block = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if in_block:
+            if '*/' in stripped:
+                in_block = False
+            continue
+        if stripped.startswith('/*') and ('*/' not in stripped or stripped.endswith('*/')):
+            in_block = '*/' not in stripped
+            continue
+        if not stripped or stripped.startswith('//'):
+            continue
+        if '`' in text:  # template literals may span lines; keep their indentation
+            out.append(line.rstrip())
+        else:
+            out.append(stripped)
+    return '\n'.join(out) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def build(static_dir):
+    """Build dist/ and the manifest from `static_dir`; returns the manifest."""
+    dist = os.path.join(static_dir, DIST)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for name in sorted(os.listdir(static_dir)):
+        base, ext = os.path.splitext(name)
+        if ext not in MINIFIERS or not os.path.isfile(os.path.join(static_dir, name)):
+            continue
+        with open(os.path.join(static_dir, name), encoding='utf-8') as f:
+            data = MINIFIERS[ext](f.read()).encode('utf-8')
+        out = f'{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+        path = os.path.join(dist, out)
+        with open(path, 'wb') as f:
+            f.write(data)
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, 9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data))
+        manifest[name] = f'{DIST}/{out}'
+    # written last, so a server never sees a manifest naming files that do not exist yet
+    tmp = os.path.join(dist, MANIFEST + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(dist, MANIFEST))
+    return manifest
+
+
+def load_manifest(static_dir):
+    try:
+        with open(os.path.join(static_dir, DIST, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def init_app(app):
+    """Fingerprinted url_for('static', ...) and far-future caching for built assets."""
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        app.logger.info('no %s/%s/%s; serving unbuilt assets (run python assets.py)', app.static_folder, DIST, MANIFEST)
+        return
+
+    @app.url_defaults
+    def fingerprinted(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    send_static = app.view_functions['static']
+
+    def static(filename):
+        if not filename.startswith(DIST + '/'):
+            return send_static(filename=filename)
+        mimetype = mimetypes.guess_type(filename)[0]
+        encoding = suffix = None
+        for enc, ext in ENCODINGS:
+            if enc in request.accept_encodings and os.path.isfile(os.path.join(app.static_folder, filename + ext)):
+                encoding, suffix = enc, ext
+                break
+        resp = send_from_directory(app.static_folder, filename + (suffix or ''), mimetype=mimetype, max_age=MAX_AGE)
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+        resp.headers['Vary'] = 'Accept-Encoding'
+        resp.cache_control.immutable = True
+        resp.cache_control.public = True
+        return resp
+
+    app.view_functions['static'] = static
+
+
+if __name__ == '__main__':
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    for name, built in build(static_dir).items():
+        src = os.path.getsize(os.path.join(static_dir, name))
+        out = os.path.join(static_dir, built)
+        sizes = ', '.join(f'{ext[1:]} {os.path.getsize(out + ext)}' for _, ext in ENCODINGS if os.path.exists(out + ext))
+        print(f'{name} -> {built}: {src} -> {os.path.getsize(out)} bytes ({sizes})')
@@ -0,0 +1,121 @@
+# assistant.py
+"""Rule-based assistant engine used by the /assistant endpoints.
+
+All patterns are compiled once at import time and trains are resolved from an
+in-memory train_no -> train map, so answering a query does no regex compilation
+and no database round-trip.
+"""
+import re
+import threading
+import time
+
+from predictions import predict_delay, predict_platform
+
+GREETING_REPLY = ("Hi — I can help estimate delays, predict platforms, help with bookings and onboard food. "
+                  "Try: 'estimate delay for IR-001 on 2025-12-05'")
+DELAY_HELP = ("To estimate delay, include train number and date (YYYY-MM-DD). "
+              "Example: 'estimate delay for IR-001 on 2025-12-05'")
+PLATFORM_HELP = "To predict platform, include the train number. Example: 'predict platform for IR-001'"
+FOOD_REPLY = ("To order food, open the 'Order Food' panel on your booking or provide your PNR. "
+              "I can place orders and show order history.")
+HELLO_REPLY = "Hello! I can estimate delays, predict platforms, help you book trains and order food onboard."
+FALLBACK_REPLY = ("Sorry, I didn't understand that. Try asking about delays, platforms, bookings or food orders "
+                  "(include train number/date where relevant).")
+
+# keyword -> intent; answer() checks delay, platform, food, greeting in that order
+KEYWORD_INTENTS = {
+    'delay': 'delay', 'late': 'delay',
+    'platform': 'platform',
+    'food': 'food', 'meal': 'food', 'order': 'food',
+    'hello': 'greeting', 'hi': 'greeting',
+}
+
+# one alternation for every keyword; longest first so 'hello' wins over 'hi'
+KEYWORD_RE = re.compile('|'.join(sorted(KEYWORD_INTENTS, key=len, reverse=True)))
+TRAIN_NO_RE = re.compile(r"(ir[- ]?\d{1,5})")
+DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+NON_ALNUM_RE = re.compile(r"[^0-9A-Z]")
+
+# batch endpoint guard
+MAX_BATCH_QUERIES = 500
+
+
+def normalize_train_no(train_no):
+    """'ir 001', 'IR-001' and 'IR001' all map to 'IR001'."""
+    return NON_ALNUM_RE.sub('', train_no.upper())
+
+
+class AssistantEngine:
+    """Answers assistant queries against an in-memory train map.
+
+    `loader` returns an iterable of (train_id, train_no) rows. The map is
+    built lazily on first use and rebuilt after `invalidate()` or when a train
+    number is not found (at most once every `refresh_interval` seconds), so
+    trains added by another worker become visible without a restart.
+    """
+
+    def __init__(self, loader, refresh_interval=30.0):
+        self._loader = loader
+        self._refresh_interval = refresh_interval
+        self._trains = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._trains = None
+
+    def _load(self):
+        with self._lock:
+            trains = {}
+            for train_id, train_no in self._loader():
+                trains[normalize_train_no(train_no)] = (train_id, train_no)
+            self._trains = trains
+            self._loaded_at = time.monotonic()
+            return trains
+
+    def find_train(self, train_no):
+        """Return (train_id, train_no) or None."""
+        trains = self._trains
+        if trains is None:
+            trains = self._load()
+        key = normalize_train_no(train_no)
+        hit = trains.get(key)
+        if hit is None and time.monotonic() - self._loaded_at > self._refresh_interval:
+            hit = self._load().get(key)
+        return hit
+
+    def answer(self, query):
+        q = (query or '').strip()
+        if not q:
+            return GREETING_REPLY
+        ql = q.lower()
+        intents = {KEYWORD_INTENTS[k] for k in KEYWORD_RE.findall(ql)}
+        if not intents:
+            return FALLBACK_REPLY
+        m = TRAIN_NO_RE.search(ql)
+        train_no = m.group(1).replace(' ', '').upper() if m else None
+
+        if 'delay' in intents:
+            md = DATE_RE.search(q)
+            if train_no and md:
+                d = md.group(1)
+                t = self.find_train(train_no)
+                if t:
+                    return f"Estimated delay for {t[1]} on {d} is around {predict_delay(str(t[0]), d)} minutes."
+                return f"I couldn't find train {train_no}. Please provide a valid train number."
+            return DELAY_HELP
+
+        if 'platform' in intents:
+            if train_no:
+                t = self.find_train(train_no)
+                if t:
+                    return f"Predicted platform for {t[1]} is platform {predict_platform(str(t[0]))} (approx)."
+                return f"I couldn't find train {train_no}."
+            return PLATFORM_HELP
+
+        if 'food' in intents:
+            return FOOD_REPLY
+        return HELLO_REPLY
+
+    def answer_many(self, queries):
+        return [self.answer(q) for q in queries]
@@ -0,0 +1,200 @@
+# availability_hub.py
+"""Fan-out of seat availability changes to server-sent-event subscribers.
+
+A Hub keeps, per (train_id, date), the set of subscribers and the changes
+published since the last flush. Every `interval` seconds it sends one
+`seats` event per changed key with the latest seats_left of each class and
+the net change over the interval, so a burst of bookings on one train costs
+each subscriber one small write instead of one per booking. Idle
+connections are kept alive with a comment line every `heartbeat` seconds.
+
+Subscribers are plain callables taking the encoded event; everything runs on
+one asyncio loop, so an idle subscriber costs a socket and a set entry, not
+a thread. Two ways to use it:
+
+- `python availability_hub.py [http_port] [udp_port] [host]` runs a standalone
+  server: clients connect to GET /availability/<train_id>/stream?date=YYYY-MM-DD,
+  and the web workers send their committed changes to the UDP port (set
+  AVAILABILITY_HUB_ADDR, see availability_push.py). Use this with several
+  workers and for many subscribers.
+- `Hub.start()` runs the loop on a background thread inside a web process;
+  /availability/<train_id>/stream on the app then relays it, under the
+  development server only (see availability_push.py).
+
+Events are JSON: {"train_id": 1, "date": "2026-10-25",
+"classes": {"AC": {"seats_left": 95, "delta": -5}}}. A new subscriber first
+gets the last seats_left this hub has seen for the key, if any.
+"""
+import asyncio
+import json
+import re
+import sys
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.25
+HEARTBEAT = 15.0
+# a subscriber that has this much unsent data is too slow and is dropped
+MAX_BUFFER = 64 * 1024
+STREAM_PATH = re.compile(r'^/availability/(\d+)/stream\?(?:.*&)?date=(\d{4}-\d{2}-\d{2})(?:&|$)')
+
+
+def encode(train_id, day, classes):
+    data = json.dumps({'train_id': train_id, 'date': day, 'classes': classes}, separators=(',', ':'))
+    return f'event: seats\ndata: {data}\n\n'.encode()
+
+
+class Hub:
+    def __init__(self, interval=DEFAULT_INTERVAL, heartbeat=HEARTBEAT):
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.subscribers = {}  # (train_id, date) -> set of deliver(bytes) callables
+        self.latest = {}  # (train_id, date) -> {cls: seats_left}
+        self._pending = {}  # (train_id, date) -> {cls: [seats_left, delta]}
+        self.published = 0
+        self.events_sent = 0
+        self.loop = None
+        self._ready = threading.Event()
+
+    def __len__(self):
+        return sum(len(s) for s in self.subscribers.values())
+
+    # --- on the loop ---
+
+    def subscribe(self, key, deliver):
+        self.subscribers.setdefault(key, set()).add(deliver)
+        latest = self.latest.get(key)
+        if latest:
+            deliver(encode(key[0], key[1], {cls: {'seats_left': n, 'delta': None} for cls, n in latest.items()}))
+
+    def unsubscribe(self, key, deliver):
+        subs = self.subscribers.get(key)
+        if subs is not None:
+            subs.discard(deliver)
+            if not subs:
+                del self.subscribers[key]
+
+    def publish(self, changes):
+        """Record [(train_id, date, cls, seats_left, delta), ...]; sent at the next flush."""
+        for train_id, day, cls, seats_left, delta in changes:
+            key = (train_id, day)
+            self.published += 1
+            self.latest.setdefault(key, {})[cls] = seats_left
+            entry = self._pending.setdefault(key, {}).get(cls)
+            if entry is None:
+                self._pending[key][cls] = [seats_left, delta]
+            else:
+                entry[0] = seats_left
+                entry[1] += delta
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for key, classes in pending.items():
+            subs = self.subscribers.get(key)
+            if not subs:
+                continue
+            payload = encode(key[0], key[1], {cls: {'seats_left': n, 'delta': d} for cls, (n, d) in classes.items()})
+            for deliver in list(subs):
+                deliver(payload)
+            self.events_sent += len(subs)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self._ready.set()
+        next_beat = time.monotonic() + self.heartbeat
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+            if time.monotonic() >= next_beat:
+                next_beat = time.monotonic() + self.heartbeat
+                for subs in list(self.subscribers.values()):
+                    for deliver in list(subs):
+                        deliver(b': ping\n\n')
+
+    # --- from other threads ---
+
+    def start(self):
+        """Run the hub loop on a daemon thread; returns once it is running."""
+        threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True, name='availability-hub').start()
+        self._ready.wait()
+        return self
+
+    def publish_threadsafe(self, changes):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.publish, changes)
+
+
+class _UDPIngest(asyncio.DatagramProtocol):
+    """Receives JSON lists of changes from web workers (availability_push.py)."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def datagram_received(self, data, addr):
+        try:
+            changes = json.loads(data)
+        except ValueError:
+            return
+        self.hub.publish([tuple(c) for c in changes if isinstance(c, list) and len(c) == 5])
+
+
+async def _handle_client(hub, reader, writer):
+    try:
+        request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        writer.close()
+        return
+    parts = request.split(b'\r\n', 1)[0].decode('latin-1').split()
+    match = STREAM_PATH.match(parts[1]) if len(parts) == 3 and parts[0] == 'GET' else None
+    if match is None:
+        writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        writer.close()
+        return
+    key = (int(match.group(1)), match.group(2))
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                 b'Connection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\nretry: 3000\n\n')
+    transport = writer.transport
+
+    def deliver(payload):
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_BUFFER:
+            transport.abort()
+        else:
+            transport.write(payload)
+
+    hub.subscribe(key, deliver)
+    try:
+        while await reader.read(1024):  # clients send nothing; EOF means they went away
+            pass
+    except ConnectionError:
+        pass
+    finally:
+        hub.unsubscribe(key, deliver)
+        writer.close()
+
+
+async def serve(hub, host='127.0.0.1', http_port=8100, udp_port=8101, udp_host='127.0.0.1', ready=None):
+    """Run the SSE server and the UDP ingest for `hub` until cancelled.
+
+    UDP updates are trusted, so keep `udp_host` on a private interface.
+    """
+    loop = asyncio.get_running_loop()
+    server = await asyncio.start_server(lambda r, w: _handle_client(hub, r, w), host, http_port, backlog=4096)
+    transport, _ = await loop.create_datagram_endpoint(lambda: _UDPIngest(hub), local_addr=(udp_host, udp_port))
+    if ready is not None:
+        ready()
+    try:
+        async with server:
+            await hub.run()
+    finally:
+        transport.close()
+
+
+if __name__ == '__main__':
+    http_port = int(sys.argv[1]) if len(sys.argv) > 1 else 8100
+    udp_port = int(sys.argv[2]) if len(sys.argv) > 2 else 8101
+    host = sys.argv[3] if len(sys.argv) > 3 else '127.0.0.1'
+    print(f'availability hub: SSE on http://{host}:{http_port}/availability/<train_id>/stream?date=YYYY-MM-DD, '
+          f'updates on udp://127.0.0.1:{udp_port}')
+    asyncio.run(serve(Hub(), host, http_port, udp_port))
@@ -0,0 +1,132 @@
+# availability_push.py
+"""Publish committed seat changes to availability subscribers.
+
+decrement_seats/increment_seats call `track()`, which only notes the change
+on the session. When that session commits, the changes go to the
+in-process hub (if anyone in this process subscribed through
+/availability/<train_id>/stream) and, when AVAILABILITY_HUB_ADDR is set, as a
+UDP datagram to a standalone availability_hub.py. A rolled back booking
+publishes nothing.
+
+The in-process hub only sees commits made in its own process, and each of
+its subscribers holds a request thread, so the app relays it only under
+the development server (AVAILABILITY_STREAM_IN_APP) and for at most
+AVAILABILITY_STREAM_MAX_SUBSCRIBERS clients; deployments run the
+standalone hub. Delivery is best effort: every event carries the absolute
+seats_left, so a lost update is corrected by the next one.
+"""
+import json
+import queue
+import socket
+import threading
+
+from sqlalchemy import event
+
+SESSION_KEY = 'availability_changes'
+MAX_DATAGRAM_CHANGES = 500
+
+_enabled = False
+_interval = None
+_udp = None  # (socket, (host, port))
+_hub = None
+_hub_lock = threading.Lock()
+_max_streams = 0
+_streams = 0
+
+
+def track(session, train_id, travel_date, cls, seats_left, delta):
+    """Note a seat change; it is published if and when the session commits."""
+    if _enabled:
+        session.info.setdefault(SESSION_KEY, []).append((train_id, str(travel_date), cls, seats_left, delta))
+
+
+def publish(changes):
+    if _hub is not None:
+        _hub.publish_threadsafe(changes)
+    if _udp is not None:
+        sock, addr = _udp
+        for i in range(0, len(changes), MAX_DATAGRAM_CHANGES):
+            try:
+                sock.sendto(json.dumps(changes[i:i + MAX_DATAGRAM_CHANGES]).encode(), addr)
+            except OSError:
+                pass
+
+
+def _after_commit(session):
+    changes = session.info.pop(SESSION_KEY, None)
+    if changes:
+        publish(changes)
+
+
+def _after_rollback(session):
+    session.info.pop(SESSION_KEY, None)
+
+
+def local_hub():
+    """The in-process hub, started on first use (after any fork)."""
+    global _hub
+    from availability_hub import Hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = Hub(_interval).start()
+        return _hub
+
+
+class _Stream:
+    """Response body for one subscriber; holds one of the `max_streams` slots until closed."""
+
+    def __init__(self, body):
+        self._body = body
+        self._open = True
+
+    def __iter__(self):
+        return self._body
+
+    def close(self):
+        global _streams
+        self._body.close()
+        with _hub_lock:
+            if self._open:
+                self._open = False
+                _streams -= 1
+
+
+def _events(train_id, day, snapshot):
+    from availability_hub import encode
+    hub = local_hub()
+    key = (train_id, day)
+    messages = queue.SimpleQueue()
+    deliver = messages.put
+    hub.loop.call_soon_threadsafe(hub.subscribe, key, deliver)
+    try:
+        yield b'retry: 3000\n\n' + encode(train_id, day, snapshot)
+        while True:
+            # the hub's heartbeats wake this up, so a closed connection is noticed
+            yield messages.get()
+    finally:
+        hub.loop.call_soon_threadsafe(hub.unsubscribe, key, deliver)
+
+
+def stream(train_id, day, snapshot):
+    """SSE body for one (train, date): the `snapshot` classes, then the hub's events.
+    None when AVAILABILITY_STREAM_MAX_SUBSCRIBERS streams are already open in this process."""
+    global _streams
+    with _hub_lock:
+        if _streams >= _max_streams:
+            return None
+        _streams += 1
+    return _Stream(_events(train_id, day, snapshot))
+
+
+def init_app(app, session):
+    global _enabled, _interval, _udp, _max_streams
+    _interval = app.config['AVAILABILITY_PUSH_INTERVAL']
+    _max_streams = app.config['AVAILABILITY_STREAM_MAX_SUBSCRIBERS']
+    addr = app.config['AVAILABILITY_HUB_ADDR']
+    if addr:
+        host, port = addr.rsplit(':', 1)
+        _udp = (socket.socket(socket.AF_INET, socket.SOCK_DGRAM), (host, int(port)))
+    if not event.contains(session, 'after_commit', _after_commit):
+        event.listen(session, 'after_commit', _after_commit)
+        event.listen(session, 'after_rollback', _after_rollback)
+    _enabled = True
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark the /assistant engine against the previous per-request implementation.
+
+Run: python bench_assistant.py [n_trains] [n_queries]
+"""
+import sys
+import time
+
+import bench_utils
+from bench_utils import report
+
+QUERIES = [
+    "estimate delay for IR-00042 on 2025-12-05",
+    "predict platform for IR-00007",
+    "is ir 00013 running late on 2025-12-10",
+    "can I order a meal",
+    "hello there",
+    "what is the weather",
+    "delay for IR-99999 on 2025-12-05",
+]
+
+
+def legacy_answer(q):
+    """The pre-engine /assistant body: regexes and an ilike train lookup per query."""
+    from models import Train
+    ql = q.lower()
+    import re
+    m = re.search(r"(ir[- ]?\d{1,3})", ql)
+    d = None
+    md = re.search(r"(\d{4}-\d{2}-\d{2})", q)
+    if md:
+        d = md.group(1)
+    train_no = m.group(1).replace(' ', '').upper() if m else None
+    if 'delay' in ql or 'late' in ql:
+        if train_no and d:
+            t = Train.query.filter(Train.train_no.ilike(f"%{train_no}%")).first()
+            if t:
+                return f"Estimated delay for {t.train_no} on {d} is around {abs(hash(f'{t.id}:{d}')) % 60} minutes."
+            return f"I couldn't find train {train_no}. Please provide a valid train number."
+        return "delay help"
+    if 'platform' in ql:
+        if train_no:
+            t = Train.query.filter(Train.train_no.ilike(f"%{train_no}%")).first()
+            if t:
+                return f"Predicted platform for {t.train_no} is platform {(abs(hash(str(t.id))) % 12) + 1} (approx)."
+            return f"I couldn't find train {train_no}."
+        return "platform help"
+    if 'food' in ql or 'meal' in ql or 'order' in ql:
+        return "food"
+    if 'hello' in ql or 'hi' in ql:
+        return "hello"
+    return "fallback"
+
+
+def main():
+    n_trains = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    app = bench_utils.setup_db(n_trains)
+    from services import assistant_engine
+    queries = [QUERIES[i % len(QUERIES)] for i in range(n)]
+    print(f"{n_trains} trains, {n} queries")
+
+    with app.app_context():
+        start = time.perf_counter()
+        for q in queries:
+            legacy_answer(q)
+        report('legacy (regex + ilike per query)', n, time.perf_counter() - start)
+
+        assistant_engine.answer(QUERIES[0])  # warm the train map
+        start = time.perf_counter()
+        for q in queries:
+            assistant_engine.answer(q)
+        report('engine.answer', n, time.perf_counter() - start)
+
+    client = app.test_client()
+    start = time.perf_counter()
+    for q in queries[:1000]:
+        client.post('/assistant', json={'query': q})
+    report('POST /assistant (one query each)', 1000, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(queries), 500):
+        client.post('/assistant/batch', json={'queries': queries[i:i + 500]})
+    report('POST /assistant/batch (500 per request)', n, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
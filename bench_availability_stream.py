@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Benchmark availability push (availability_hub.py) against polling.
+
+1. Idle subscribers: a standalone hub runs in a subprocess and `n_clients`
+   SSE connections are opened to it; reports the hub's memory per connection.
+2. Push latency: updates are sent to the hub's UDP port the way web workers
+   send them (seats_left carries a sequence number) while `watchers` of the
+   connections follow that train; reports time from send to delivery, and to
+   the last watcher (fan-out).
+3. Coalescing: a burst of bookings on one train within an interval costs
+   each subscriber one event.
+4. Polling: what the same clients cost when each polls
+   /availability/<train_id> every POLL_SECONDS instead.
+
+Run: python bench_availability_stream.py [n_clients] [watchers]
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from availability_hub import DEFAULT_INTERVAL, Hub
+from bench_utils import report
+
+POLL_SECONDS = 5
+UPDATES = 50
+UPDATE_GAP = 0.3
+DAY = (date.today() + timedelta(days=3)).isoformat()
+
+
+def free_port(kind):
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+async def connect(port, train_id):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET /availability/{train_id}/stream?date={DAY} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+    await reader.readuntil(b'\n\n')  # headers and the retry line
+    return reader, writer
+
+
+async def watch(reader, sent, received):
+    while True:
+        try:
+            chunk = await reader.readuntil(b'\n\n')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        if chunk.startswith(b'event: seats'):
+            now = time.perf_counter()
+            data = json.loads(chunk.split(b'data: ', 1)[1])
+            received.append(now - sent[data['classes']['AC']['seats_left']])
+
+
+async def run_hub_bench(n_clients, n_watchers):
+    http_port, udp_port = free_port(socket.SOCK_STREAM), free_port(socket.SOCK_DGRAM)
+    here = os.path.dirname(os.path.abspath(__file__))
+    hub = subprocess.Popen([sys.executable, os.path.join(here, 'availability_hub.py'), str(http_port), str(udp_port)],
+                           stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                (await asyncio.open_connection('127.0.0.1', http_port))[1].close()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        base = rss_mb(hub.pid)
+
+        # 1. idle connections spread over 1000 trains; train 0 is the watched one
+        start = time.perf_counter()
+        conns = []
+        for i in range(0, n_clients, 500):
+            conns += await asyncio.gather(*(connect(http_port, 0 if j < n_watchers else j % 1000)
+                                            for j in range(i, min(i + 500, n_clients))))
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.5)
+        grown = rss_mb(hub.pid) - base
+        report('open SSE connections', n_clients, elapsed)
+        print(f'hub memory: {base:.1f} MB empty, +{grown:.1f} MB for {n_clients} connections '
+              f'= {grown * 1024 / n_clients:.1f} KB each')
+
+        # 2. push latency and fan-out to the watchers of train 0
+        sent, received = {}, []
+        tasks = [asyncio.create_task(watch(reader, sent, received)) for reader, _ in conns[:n_watchers]]
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for seq in range(UPDATES):
+            sent[seq] = time.perf_counter()
+            udp.sendto(json.dumps([[0, DAY, 'AC', seq, -1]]).encode(), ('127.0.0.1', udp_port))
+            await asyncio.sleep(UPDATE_GAP)
+        await asyncio.sleep(0.5)
+        lat = sorted(received)
+        if lat:
+            print(f'push latency over {len(lat)} deliveries ({UPDATES} updates x {n_watchers} watchers): '
+                  f'p50 {lat[len(lat) // 2] * 1000:.0f} ms, p99 {lat[int(len(lat) * 0.99)] * 1000:.0f} ms, '
+                  f'max {lat[-1] * 1000:.0f} ms (flush interval {DEFAULT_INTERVAL * 1000:.0f} ms)')
+        for t in tasks:
+            t.cancel()
+        for _, writer in conns:
+            writer.close()
+    finally:
+        hub.terminate()
+        hub.wait()
+
+
+def coalescing(n_subscribers, burst):
+    hub = Hub()
+    out = []
+    for _ in range(n_subscribers):
+        hub.subscribe((1, DAY), lambda payload: out.append(payload))
+    start = time.perf_counter()
+    for i in range(burst):
+        hub.publish([(1, DAY, 'AC', burst - i - 1, -1)])
+    hub.flush()
+    elapsed = time.perf_counter() - start
+    report(f'{burst} bookings -> {n_subscribers} subscribers', burst, elapsed)
+    print(f'events written: {len(out)} ({len(out) / n_subscribers:.0f} per subscriber), '
+          f'payload {out[0].decode().splitlines()[1]}')
+
+
+def polling(n_clients):
+    app = bench_utils.setup_db(1000)
+    c = app.test_client()
+    url = f'/availability/1?date={DAY}&class=AC'
+    assert c.get(url).status_code == 200
+    n = 2000
+    start = time.perf_counter()
+    for _ in range(n):
+        c.get(url)
+    elapsed = time.perf_counter() - start
+    report('GET /availability (one worker)', n, elapsed)
+    rate = n_clients / POLL_SECONDS
+    print(f'polling every {POLL_SECONDS}s: {n_clients} clients = {rate:,.0f} req/s '
+          f'= {rate * elapsed / n:.1f} worker-seconds per second, and a change is seen '
+          f'{POLL_SECONDS / 2:.1f}s late on average')
+
+
+def main():
+    n_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_watchers = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    asyncio.run(run_hub_bench(n_clients, n_watchers))
+    coalescing(n_watchers, 1000)
+    polling(n_clients)
+
+
+if __name__ == '__main__':
+    main()
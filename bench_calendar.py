@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark bulk running-calendar evaluation.
+
+10k trains with random weekday masks and EXCEPTIONS_PER_TRAIN exception
+dates each are evaluated over a year of dates: once per train/date in
+Python (weekday bit test plus exception lookup), and as one
+Calendars.matrix call. Also times Calendars.load from the database.
+
+Run: python bench_calendar.py [n_trains] [days]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+EXCEPTIONS_PER_TRAIN = 4
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ndays = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    app = bench_utils.setup_db(n)
+    from models import db, Train, TrainCalendarException
+    from train_calendar import Calendars
+    rng = random.Random(5)
+    start = date.today()
+    days = [start + timedelta(days=i) for i in range(ndays)]
+    with app.app_context():
+        ids = [i for (i,) in db.session.query(Train.id).order_by(Train.id)]
+        masks = {i: rng.choice((127, 127, 0b0010101, 0b1000001, 0b0111110)) for i in ids}
+        db.session.bulk_update_mappings(Train, [{'id': i, 'running_days': m} for i, m in masks.items()])
+        exceptions = {(i, d): rng.random() < 0.5 for i in ids for d in rng.sample(days, EXCEPTIONS_PER_TRAIN)}
+        db.session.bulk_insert_mappings(TrainCalendarException,
+                                        [{'train_id': i, 'date': d, 'runs': r} for (i, d), r in exceptions.items()])
+        db.session.commit()
+
+        t0 = time.perf_counter()
+        expected = 0
+        for i in ids:
+            mask = masks[i]
+            for d in days:
+                runs = exceptions.get((i, d))
+                if runs is None:
+                    runs = bool(mask >> d.weekday() & 1)
+                expected += runs
+        report(f'per train/date loop ({ndays} days)', n * ndays, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        cal = Calendars.load(db.session, start=days[0], end=days[-1])
+        loaded = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        matrix = cal.matrix(days)
+        elapsed = time.perf_counter() - t0
+        report(f'Calendars.matrix ({ndays} days)', n * ndays, elapsed)
+        print(f'  load from database {loaded * 1000:.0f} ms, load + evaluate {(loaded + elapsed) * 1000:.0f} ms')
+        assert int(matrix.sum()) == expected
+        print(f'  {expected} train-days running, results identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark bulk cancellation of a train/date.
+
+Loads `n` bookings (half of them paid) onto one train/date, cancels them
+with cancel_train_date, and compares with the per-booking path
+cancel_booking takes (calculate_refund, increment_seats, payment update)
+on a sample. Also checks the vectorized refunds against calculate_refund.
+
+Run: python bench_cancellations.py [n_bookings]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import bench_utils
+from bench_utils import report
+
+SAMPLE = 1000
+
+
+def load_bookings(db, Booking, Payment, train_id, day, n, start_id=1):
+    rng = random.Random(n)
+    bookings, payments = [], []
+    for i in range(start_id, start_id + n):
+        total = Decimal(rng.randrange(20000, 500000)) / 100
+        paid = i % 2 == 0
+        bookings.append({'id': i, 'pnr': f'B{i:09d}', 'user_id': 2, 'train_id': train_id, 'travel_date': day,
+                         'cls': 'General', 'seat_count': 1, 'fare_per_seat': total, 'total_fare': total,
+                         'status': 'CONFIRMED', 'payment_status': 'PAID' if paid else 'PENDING'})
+        if paid:
+            payments.append({'booking_id': i, 'provider': 'CARD', 'amount': total, 'status': 'SUCCESS'})
+    db.session.execute(db.insert(Booking), bookings)
+    db.session.execute(db.insert(Payment), payments)
+    db.session.commit()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = bench_utils.setup_db(2)
+    import refund_policy
+    from cancellations import cancel_train_date
+    from models import db, Booking, Payment
+    from utils import calculate_refund, increment_seats
+
+    rng = random.Random(1)
+    totals = [rng.randrange(1, 10 ** 7) for _ in range(20000)]
+    days = [rng.randrange(-2, 10) for _ in totals]
+    vec = refund_policy.engine().refund_paise_batch(totals, days)
+    today = date.today()
+    mismatches = sum(
+        int(calculate_refund(SimpleNamespace(travel_date=today + timedelta(days=d), total_fare=Decimal(t) / 100),
+                             cancel_date=today) * 100) != int(v)
+        for t, d, v in zip(totals, days, vec))
+    print(f"vectorized refunds vs calculate_refund: {mismatches} mismatches in {len(totals)}")
+
+    day = today + timedelta(days=2)
+    with app.app_context():
+        load_bookings(db, Booking, Payment, 1, day, n)
+        load_bookings(db, Booking, Payment, 2, day, SAMPLE, start_id=n + 1)
+
+        start = time.perf_counter()
+        for b in Booking.query.filter_by(train_id=2, travel_date=day).all():
+            calculate_refund(b, cancel_date=today)
+            b.status = 'CANCELLED'
+            b.payment_status = 'REFUNDED'
+            db.session.commit()
+            increment_seats(db.session, b.train_id, b.travel_date, b.cls, b.seat_count)
+            payment = Payment.query.filter_by(booking_id=b.id).first()
+            if payment:
+                payment.status = 'REFUNDED'
+                db.session.commit()
+        elapsed = time.perf_counter() - start
+        report('per-booking cancel (old cancel_booking path)', SAMPLE, elapsed)
+        print(f"  {elapsed / SAMPLE * 1000:.2f} ms per booking -> ~{elapsed / SAMPLE * n:.0f} s for {n:,}")
+
+        ticks = []
+        start = time.perf_counter()
+        summary = cancel_train_date(db.session, 1, day, cancel_date=today,
+                                    progress=lambda done, total: ticks.append(done))
+        elapsed = time.perf_counter() - start
+        report('cancel_train_date', n, elapsed)
+        print(f"  {summary}, {len(ticks)} progress updates")
+        left = Booking.query.filter_by(train_id=1, travel_date=day, status='CONFIRMED').count()
+        print(f"  confirmed bookings left: {left}, refund rows: "
+              f"{Payment.query.filter_by(provider='REFUND').count()}")
+
+
+if __name__ == '__main__':
+    main()
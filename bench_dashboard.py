@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark admin dashboard statistics: table counts against maintained counters.
+
+For each bookings table size:
+- table counts: the three COUNT(*) queries the dashboard used to run,
+- exact stats: the same figures as the counters computed from the tables
+  (what reconcile() runs),
+- counters: DashboardStats rebuilding its payload on every call (ttl 0),
+- cached: GET /admin/stats serving the cached payload.
+Then the cost of folding booking events into the counters.
+
+Run: python bench_dashboard.py [sizes, comma-separated]
+"""
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - start
+    report(label, n, elapsed)
+    return elapsed / n
+
+
+def main():
+    sizes = [int(s) for s in (sys.argv[1] if len(sys.argv) > 1 else '10000,100000,500000').split(',')]
+    app = bench_utils.setup_db(1000)
+    import counters
+    import outbox
+    from models import db, Booking, Train, User
+    from sqlalchemy import func, insert, select
+    from services import dashboard_stats
+
+    c = app.test_client()
+    c.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    travel_date = date.today() + timedelta(days=1)
+    have = 0
+    with app.app_context():
+        counters.reconcile(db.session)
+        for size in sizes:
+            for i in range(have, size, 10000):
+                db.session.execute(insert(Booking), [
+                    {'pnr': f'B{j}', 'user_id': 2, 'train_id': 1 + j % 1000, 'travel_date': travel_date, 'cls': 'General',
+                     'seat_count': 1 + j % 4, 'fare_per_seat': 200, 'total_fare': 200 * (1 + j % 4),
+                     'status': 'CANCELLED' if j % 10 == 0 else 'CONFIRMED',
+                     'payment_status': ('REFUNDED', 'PAID', 'PAID', 'PENDING')[j % 4] if j % 10 else 'REFUNDED'}
+                    for j in range(i, min(i + 10000, size))])
+            db.session.commit()
+            have = size
+            counters.reconcile(db.session)
+            print(f'--- {size} bookings')
+
+            def table_counts():
+                db.session.execute(select(func.count()).select_from(Train)).scalar()
+                db.session.execute(select(func.count()).select_from(Booking)).scalar()
+                db.session.execute(select(func.count()).select_from(User)).scalar()
+                db.session.rollback()
+
+            def exact_stats():
+                counters.exact(db.session)
+                db.session.rollback()
+
+            def rebuild():
+                dashboard_stats.invalidate()
+                dashboard_stats.get(db.session)
+
+            counts = timed('table counts (3 x COUNT(*))', table_counts, 20)
+            timed('exact stats (reconcile query)', exact_stats, 5)
+            built = timed('counters, payload rebuilt', rebuild, 500)
+            cached = timed('GET /admin/stats, cached', lambda: c.get('/admin/stats'), 2000)
+            print(f'  per load: table counts {counts * 1000:.2f} ms, counters {built * 1000:.2f} ms rebuilt, '
+                  f'{cached * 1000:.2f} ms cached (whole request)')
+
+        # fold cost: events recorded the way the views do, then drained by the counters consumer
+        n = 20000
+        payload = {'pnr': 'X', 'user_id': 2, 'train_id': 1, 'travel_date': travel_date, 'class': 'General',
+                   'seat_count': 2, 'total_fare': '400.00', 'status': 'CONFIRMED', 'payment_status': 'PENDING'}
+        outbox.record_many(db.session, 'booking.created', 'booking', [(f'E{i}', payload) for i in range(n)])
+        db.session.commit()
+        consumer = outbox.consumers[counters.CONSUMER]
+        start = time.perf_counter()
+        while consumer.poll(db.session):
+            pass
+        report('fold booking.created into counters', n, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark read and write throughput per database engine profile.
+
+Each SQLite profile gets a fresh database file. Multi-threaded writers
+commit one-row transactions (like a booking) while readers run indexed
+point lookups (like an availability check), first separately and then
+together. Set BENCH_MYSQL_URI to include the mysql profile.
+
+Run: python bench_db_profiles.py [threads] [ops_per_thread]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from bench_utils import report
+import db_profiles
+
+ROWS = 20000
+
+
+def setup(uri, name):
+    engine = create_engine(uri, **db_profiles.engine_options(name))
+    db_profiles.install(engine, name)
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS bench_seats'))
+        conn.execute(text('CREATE TABLE bench_seats (id INTEGER PRIMARY KEY, train_id INTEGER, day INTEGER, '
+                          'cls VARCHAR(10), seats_left INTEGER)'))
+        conn.execute(text('CREATE INDEX ix_bench_seats ON bench_seats (train_id, day, cls)'))
+        conn.execute(text('INSERT INTO bench_seats (train_id, day, cls, seats_left) VALUES (:t, :d, :c, 100)'),
+                     [{'t': i % 500, 'd': i // 500, 'c': 'AC'} for i in range(ROWS)])
+    return engine
+
+
+def run(engine, threads, ops, work):
+    errors = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(ops):
+            try:
+                work(engine, rng)
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e.orig))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return time.perf_counter() - start, errors
+
+
+def read(engine, rng):
+    with engine.connect() as conn:
+        conn.execute(text('SELECT seats_left FROM bench_seats WHERE train_id = :t AND day = :d AND cls = :c'),
+                     {'t': rng.randrange(500), 'd': rng.randrange(ROWS // 500), 'c': 'AC'}).scalar()
+
+
+def write(engine, rng):
+    with engine.begin() as conn:
+        conn.execute(text('UPDATE bench_seats SET seats_left = seats_left - 1 WHERE id = :i'),
+                     {'i': rng.randrange(1, ROWS + 1)})
+
+
+def bench(label, uri, name, threads, ops):
+    engine = setup(uri, name)
+    check = db_profiles.self_check(engine, name)
+    print(f"{label}: pool {check['pool']}, journal_mode {check.get('journal_mode', '-')}, "
+          f"synchronous {check.get('synchronous', '-')}")
+    for what, work, n_threads in (('reads', read, threads), ('writes', write, threads)):
+        elapsed, errors = run(engine, n_threads, ops, work)
+        report(f'  {what} ({n_threads} threads)', n_threads * ops, elapsed)
+        if errors:
+            print(f"    {len(errors)} errors, e.g. {errors[0]}")
+    # mixed: readers alongside one writer thread
+    results = {}
+    writer = threading.Thread(target=lambda: results.setdefault('w', run(engine, 1, ops * 2, write)))
+    writer.start()
+    elapsed, errors = run(engine, threads, ops, read)
+    writer.join()
+    report(f'  reads during writes ({threads} threads)', threads * ops, elapsed)
+    w_elapsed, w_errors = results['w']
+    report('  writes during reads (1 thread)', ops * 2, w_elapsed)
+    if errors or w_errors:
+        print(f"    {len(errors) + len(w_errors)} errors")
+    engine.dispose()
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    tmp = tempfile.mkdtemp(prefix='railway_profiles_')
+    for name in ('sqlite-dev', 'sqlite-wal'):
+        bench(name, 'sqlite:///' + os.path.join(tmp, f'{name}.db'), name, threads, ops)
+    if os.environ.get('BENCH_MYSQL_URI'):
+        bench('mysql', os.environ['BENCH_MYSQL_URI'], 'mysql', threads, ops)
+    else:
+        print('mysql: skipped (set BENCH_MYSQL_URI)')
+
+
+if __name__ == '__main__':
+    main()
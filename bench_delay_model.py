@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark delay model training and per-request inference.
+
+Generates a synthetic delay history, trains the model and times
+predictions.predict_delay with the memory-mapped model loaded.
+
+Run: python bench_delay_model.py [n_trains] [days]
+"""
+import csv
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+
+def write_history(path, n_trains, days):
+    rng = random.Random(7)
+    start = date(2025, 1, 1)
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['train_no', 'station', 'date', 'delay_minutes'])
+        for i in range(n_trains):
+            t = bench_utils.synthetic_train(i)
+            stops = t['route'].split(' -> ')
+            for d in range(days):
+                day = start + timedelta(days=d)
+                weekend = 8 if day.weekday() >= 5 else 0
+                for k, st in enumerate(stops):
+                    w.writerow([t['train_no'], st, day.isoformat(), max(0, int(k * 4 + weekend + rng.gauss(5, 4)))])
+                    rows += 1
+    return rows
+
+
+def main():
+    n_trains = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    app = bench_utils.setup_db(n_trains)
+    import delay_model
+    import predictions
+    from models import db
+
+    work = os.path.dirname(bench_utils.BENCH_DB)
+    history = os.path.join(work, 'history.csv')
+    rows = write_history(history, n_trains, days)
+    model_dir = os.path.join(work, 'delay_model')
+    with app.app_context():
+        start = time.perf_counter()
+        stats = delay_model.train(history, model_dir, db.session)
+        report('train (rows)', rows, time.perf_counter() - start)
+    print(f"rmse {stats['rmse']:.2f} min over {stats['trains']} trains")
+
+    predictions.configure(model_dir)
+    predictions.predict_delay('1', '2025-12-05')  # opens the model once
+    model = predictions._delay_model()
+    n = 100000
+    ids = [1 + i % n_trains for i in range(n)]
+    start = time.perf_counter()
+    for tid in ids:
+        model.predict(tid, '2025-12-05')
+    elapsed = time.perf_counter() - start
+    report('DelayModel.predict (uncached)', n, elapsed)
+    print(f"  {elapsed / n * 1e6:.2f} µs per prediction")
+
+    start = time.perf_counter()
+    for tid in ids:
+        predictions.predict_delay(str(tid), '2025-12-05')
+    report('predictions.predict_delay (LRU)', n, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
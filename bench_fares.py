@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark fare quoting from precomputed tables.
+
+Compares a table lookup with pricing from scratch (Decimal arithmetic per
+call), and one quote_many call for a page of search results with quoting
+each train/class separately after its own availability lookup.
+
+Run: python bench_fares.py [n_quotes]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+import bench_utils
+from bench_utils import report
+
+N_TRAINS = 200
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = bench_utils.setup_db(N_TRAINS)
+    import fares
+    from services import fare_engine
+    from models import db, Train
+    from utils import seats_available
+
+    rng = random.Random(2)
+    day = date.today() + timedelta(days=10)
+    with app.app_context():
+        trains = {t.id: t for t in Train.query.all()}
+        ids = list(trains)
+        queries = []
+        for _ in range(n):
+            t = trains[rng.choice(ids)]
+            stops = fares.route_stops(t.route)
+            lo = rng.randrange(len(stops) - 1)
+            hi = rng.randrange(lo + 1, len(stops))
+            queries.append((t.id, rng.choice(('AC', 'Sleeper', 'General')), stops[lo], stops[hi], rng.randrange(200)))
+
+        for train_id in ids:
+            fare_engine.quote(train_id, 'AC', day)
+        start = time.perf_counter()
+        for train_id, cls, a, b, left in queries:
+            fare_engine.quote(train_id, cls, day, left, a, b)
+        elapsed = time.perf_counter() - start
+        report('quote (table lookup)', n, elapsed)
+        print(f"  {elapsed / n * 1e6:.1f} µs per quote")
+
+        start = time.perf_counter()
+        for train_id, cls, a, b, left in queries:
+            t = trains[train_id]
+            stops = fares.route_stops(t.route)
+            lo, hi, nseg = fares.segment_range(stops, a, b)
+            share = max(Decimal(hi - lo) / nseg, fares.MIN_DISTANCE_SHARE)
+            demand = fares.DEMAND_MULTIPLIERS[fares.load_bucket(left, int(t.classes_json[cls]))]
+            fare = Decimal(str(t.fare_json[cls])) * share * demand * fares.advance_multiplier(day)
+            fare.quantize(fares.PAISE, rounding=ROUND_HALF_UP)
+        elapsed = time.perf_counter() - start
+        report('price from scratch', n, elapsed)
+        print(f"  {elapsed / n * 1e6:.1f} µs per quote")
+
+        pages = [rng.sample(ids, 20) for _ in range(200)]
+        start = time.perf_counter()
+        for page in pages:
+            fare_engine.quote_many(db.session, page, day)
+        elapsed = time.perf_counter() - start
+        report('quote_many (20 trains x 3 classes)', len(pages), elapsed)
+        print(f"  {elapsed / len(pages) * 1000:.2f} ms per page")
+
+        start = time.perf_counter()
+        for page in pages:
+            for train_id in page:
+                for cls in trains[train_id].classes_json:
+                    fare_engine.quote(train_id, cls, day, seats_available(db.session, train_id, day, cls))
+        elapsed = time.perf_counter() - start
+        report('per-class availability + quote', len(pages), elapsed)
+        print(f"  {elapsed / len(pages) * 1000:.2f} ms per page")
+
+
+if __name__ == '__main__':
+    main()
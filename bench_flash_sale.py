@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark flash-sale booking: admission queue versus direct booking.
+
+`n_clients` single-seat requests for one hot train/date/class arrive from a
+pool of client threads. The direct path is book_ticket's own: every request
+runs decrement_seats and commits its booking, racing for the same row. The
+queued path submits to flash_queue and waits for its ticket. Reports
+sustained bookings/sec, requests that errored, and fairness: the share of
+seats won by the earliest `capacity` arrivals (1.0 = strict arrival order).
+
+Run: python bench_flash_sale.py [n_clients] [client_threads]
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+CAPACITY = 3000
+
+
+def fairness(arrivals, winners):
+    """Share of winners that were among the first len(winners) arrivals."""
+    if not winners:
+        return 0.0
+    earliest = set(sorted(arrivals, key=arrivals.get)[:len(winners)])
+    return len(earliest & winners) / len(winners)
+
+
+def run(label, n, threads, book):
+    arrivals, winners, errors = {}, set(), []
+    lock = threading.Lock()
+    counter = iter(range(n))
+
+    def client(_):
+        with lock:
+            i = next(counter)
+            arrivals[i] = time.perf_counter()
+        try:
+            ok = book(i)
+        except Exception as e:
+            with lock:
+                errors.append(type(e).__name__)
+            return
+        if ok:
+            with lock:
+                winners.add(i)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(client, range(n)))
+    elapsed = time.perf_counter() - start
+    report(label, n, elapsed)
+    print(f"  {len(winners) / elapsed:,.0f} bookings/s, {len(winners)} booked, {len(errors)} errors, "
+          f"fairness {fairness(arrivals, winners):.2f}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = bench_utils.setup_db(0)
+    from blueprints.booking import commit_seats, reserve_booking
+    from services import flash_queue
+    from models import db, Train, Booking, SeatAvailability
+
+    with app.app_context():
+        for k in (1, 2):
+            spec = bench_utils.synthetic_train(k)
+            spec['classes_json'] = {'Sleeper': CAPACITY}
+            db.session.add(Train(**spec))
+        db.session.commit()
+        user_id = 2
+    day = date.today() + timedelta(days=7)
+
+    def direct(i):
+        with app.app_context():
+            t = db.session.get(Train, 1)
+            pnr, error = commit_seats(lambda: reserve_booking(t, user_id, day, 'Sleeper', 1))
+            return error is None
+
+    def queued(i):
+        ticket = flash_queue.submit((2, day, 'Sleeper'), user_id, {"seat_count": 1})
+        ticket.done.wait()
+        return ticket.pnr is not None
+
+    run(f'direct decrement_seats ({threads} client threads)', n, threads, direct)
+    run(f'admission queue (batch {flash_queue.batch_size})', n, threads, queued)
+
+    with app.app_context():
+        for train_id in (1, 2):
+            sa = SeatAvailability.query.filter_by(train_id=train_id).first()
+            booked = Booking.query.filter_by(train_id=train_id).count()
+            print(f"train {train_id}: {booked} bookings, seats_left {sa.seats_left if sa else CAPACITY} "
+                  f"(oversold: {booked + (sa.seats_left if sa else CAPACITY) > CAPACITY})")
+
+
+if __name__ == '__main__':
+    main()
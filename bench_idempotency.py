@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark idempotency-key overhead.
+
+Times the dedup store on its own (new keys claimed in the database, and
+replays served from its in-process cache), a booking POST with and without
+a key, and a replayed booking.
+
+Run: python bench_idempotency.py [n_requests]
+"""
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+
+def store_ops(store, n):
+    keys = [uuid.uuid4().hex for _ in range(n)]
+    start = time.perf_counter()
+    for k in keys:
+        store.begin(k, 'fp')
+        store.finish(k, {'status': 302, 'headers': {'Location': '/payment/X'}, 'body': ''})
+    elapsed = time.perf_counter() - start
+    report('DedupStore begin+finish (database)', n, elapsed)
+    print(f"  {elapsed / n * 1e6:.1f} µs per new key")
+    start = time.perf_counter()
+    for k in keys:
+        store.begin(k, 'fp')
+    report('DedupStore begin, replay (cached)', n, time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = bench_utils.setup_db(1)
+    from idempotency import DedupStore
+    from models import db
+
+    with app.app_context():
+        store_ops(DedupStore(lambda: db.engine, max_entries=n), n)
+
+    c = app.test_client()
+    c.post('/login', data={'username': 'user1', 'password': 'user123'})
+    days = [(date.today() + timedelta(days=i)).isoformat() for i in range(1, 101)]
+
+    def book(i, **extra):
+        # spread bookings over dates so no class sells out
+        form = {'journey_date': days[i % len(days)], 'class': 'General', 'seats': '1'}
+        r = c.post('/book/1', data=dict(form, **extra))
+        assert r.status_code == 302, r.status_code
+
+    for i in range(len(days)):
+        book(i)  # warm up caches and create the seat rows
+    timings = {}
+    for label, make in (('booking POST, no key', lambda: {}),
+                        ('booking POST, new key', lambda: {'idempotency_key': uuid.uuid4().hex})):
+        start = time.perf_counter()
+        for i in range(n // 10):
+            book(i, **make())
+        timings[label] = time.perf_counter() - start
+        report(label, n // 10, timings[label])
+
+    key = uuid.uuid4().hex
+    book(0, idempotency_key=key)
+    start = time.perf_counter()
+    for _ in range(n):
+        book(0, idempotency_key=key)
+    elapsed = time.perf_counter() - start
+    report('booking POST, replayed key', n, elapsed)
+    per = {k: v / (n // 10) * 1000 for k, v in timings.items()}
+    print(f"  key overhead {per['booking POST, new key'] - per['booking POST, no key']:+.2f} ms per booking; "
+          f"replay {elapsed / n * 1000:.2f} ms vs {per['booking POST, no key']:.2f} ms executed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Compare eager seat-inventory seeding with lazy (sold-against-only) rows.
+
+Eager: one SeatAvailability row per train x class x day over the booking
+horizon, as seed_seat_availability used to write. Lazy: rows only for the
+train/date/classes that actually sold, here `sold_fraction` of them.
+
+Run: python bench_inventory.py [n_trains] [sold_fraction]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+
+def db_size(app):
+    from models import db
+    with app.app_context():
+        db.session.execute(db.text('VACUUM'))
+    return os.path.getsize(bench_utils.BENCH_DB)
+
+
+def main():
+    n_trains = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sold_fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    app = bench_utils.setup_db(n_trains)
+    from models import db, Train, SeatAvailability
+    from utils import decrement_seats, seats_available
+
+    with app.app_context():
+        horizon = app.config['BOOKING_HORIZON_DAYS']
+        days = [date.today() + timedelta(days=i) for i in range(1, horizon + 1)]
+        trains = Train.query.all()
+        keys = [(t.id, day, cls, int(cap)) for t in trains for day in days for cls, cap in t.classes_json.items()]
+        base = db_size(app)
+
+        start = time.perf_counter()
+        db.session.bulk_insert_mappings(SeatAvailability, [
+            {'train_id': tid, 'travel_date': day, 'cls': cls, 'seats_left': cap} for tid, day, cls, cap in keys])
+        db.session.commit()
+        eager_time = time.perf_counter() - start
+        eager_rows = SeatAvailability.query.count()
+        eager_size = db_size(app) - base
+        report(f'eager seed ({horizon} days)', eager_rows, eager_time)
+
+        SeatAvailability.query.delete()
+        db.session.commit()
+        base = db_size(app)
+
+        rng = random.Random(3)
+        sold = rng.sample(keys, int(len(keys) * sold_fraction))
+        start = time.perf_counter()
+        for tid, day, cls, _ in sold:
+            decrement_seats(db.session, tid, day, cls, 1)
+        lazy_time = time.perf_counter() - start
+        lazy_rows = SeatAvailability.query.count()
+        lazy_size = db_size(app) - base
+        report(f'lazy first sales ({sold_fraction:.0%} of tuples)', len(sold), lazy_time)
+
+        probes = rng.sample(keys, 2000)
+        start = time.perf_counter()
+        for tid, day, cls, _ in probes:
+            seats_available(db.session, tid, day, cls)
+        report('seats_available (mostly untouched)', len(probes), time.perf_counter() - start)
+
+    print(f"rows:  eager {eager_rows:,}  lazy {lazy_rows:,}  ({eager_rows / max(lazy_rows, 1):.0f}x fewer)")
+    print(f"bytes: eager {eager_size:,}  lazy {lazy_size:,}")
+    print(f"seeding: eager {eager_time:.2f} s up front, lazy 0 s (rows are written by the sale itself)")
+
+
+if __name__ == '__main__':
+    main()
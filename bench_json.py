@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark JSON serialization and response compression.
+
+Serializes the /trains payload for a large catalog and the /order_history
+payload for a user with many orders using Flask's default provider, the
+FastJSONProvider on stdlib json, and FastJSONProvider on orjson (when
+installed). Then fetches both endpoints through the test client with and
+without `Accept-Encoding: gzip` to compare bytes on the wire and request time.
+
+Run: python bench_json.py [n_trains] [n_orders] [rounds]
+"""
+import json
+import random
+import sys
+import time
+
+import bench_utils
+from bench_utils import report
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_orders = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    app = bench_utils.setup_db(n)
+    from flask.json.provider import DefaultJSONProvider
+    from models import db, FoodOrder, Train, User
+    import json_provider
+    rnd = random.Random(7)
+    with app.app_context():
+        user = User.query.filter_by(username='user1').one()
+        db.session.bulk_insert_mappings(FoodOrder, [
+            {'user_id': user.id, 'items': json.dumps([{'id': 'v1', 'qty': rnd.randint(1, 4)}, {'id': 's2', 'qty': 1}]),
+             'amount': rnd.randint(40, 900) + 0.5} for _ in range(n_orders)])
+        db.session.commit()
+        trains = [{"id": t.id, "train_no": t.train_no, "name": t.name, "source": t.source,
+                   "destination": t.destination, "classes": t.classes_json or {}} for t in Train.query.all()]
+        orders = [{'order_id': o.id, 'booking_id': o.booking_id, 'items': json.loads(o.items), 'amount': o.amount,
+                   'status': o.status, 'created_at': o.created_at} for o in FoodOrder.query.all()]
+
+    providers = [('flask', DefaultJSONProvider(app), None)]
+    orjson = json_provider.orjson
+    providers.append(('fast, json', json_provider.FastJSONProvider(app), None))
+    if orjson is not None:
+        providers.append(('fast, orjson', json_provider.FastJSONProvider(app), orjson))
+    for label, payload in ((f'/trains ({n})', trains), (f'/order_history ({n_orders})', {'orders': orders})):
+        for name, provider, backend in providers:
+            json_provider.orjson = backend
+            with app.app_context():
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    body = provider.response(payload).get_data()
+                report(f'{label}: {name} ({len(body)} B)', rounds, time.perf_counter() - start)
+    json_provider.orjson = orjson
+
+    c = app.test_client()
+    c.post('/login', data={'username': 'user1', 'password': 'user123'})
+    for url in ('/trains', '/order_history'):
+        for headers in ({}, {'Accept-Encoding': 'gzip'}):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                r = c.get(url, headers=headers)
+            report(f'GET {url} {r.headers.get("Content-Encoding") or "identity"} ({len(r.data)} B on the wire)',
+                   rounds, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark the transactional outbox.
+
+1. Write overhead: booking POSTs with the outbox record() call and with it
+   replaced by a no-op.
+2. Consumer throughput: draining the log with a no-op handler at several
+   batch sizes (each batch is one transaction including the checkpoint).
+3. Change detection: an idle consumer poll (nothing new) against scanning
+   the bookings table (grown to n_events rows) for its current state, the
+   way a poller has to.
+
+Run: python bench_outbox.py [n_bookings] [n_events]
+"""
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_events = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    app = bench_utils.setup_db(1)
+    import outbox
+    from models import db, Booking, OutboxCheckpoint
+    from sqlalchemy import delete, func, insert, select
+
+    c = app.test_client()
+    c.post('/login', data={'username': 'user1', 'password': 'user123'})
+    days = [(date.today() + timedelta(days=i)).isoformat() for i in range(1, 101)]
+
+    def book(i):
+        r = c.post('/book/1', data={'journey_date': days[i % len(days)], 'class': 'General', 'seats': '1'})
+        assert r.status_code == 302, r.status_code
+
+    for i in range(len(days)):
+        book(i)  # warm up caches and create the seat rows
+    record = outbox.record
+    timings = {}
+    for label, fn in (('booking POST, outbox off', lambda *a: None), ('booking POST, outbox on', record)):
+        outbox.record = fn
+        start = time.perf_counter()
+        for i in range(n):
+            book(i)
+        timings[label] = time.perf_counter() - start
+        report(label, n, timings[label])
+    outbox.record = record
+    print(f"  outbox overhead {(timings['booking POST, outbox on'] - timings['booking POST, outbox off']) / n * 1000:+.2f} ms "
+          f"per booking")
+
+    with app.app_context():
+        payload = {'pnr': 'X' * 10, 'user_id': 2, 'train_id': 1, 'travel_date': days[0], 'class': 'General',
+                   'seat_count': 1, 'total_fare': '200.00', 'status': 'CONFIRMED', 'payment_status': 'PENDING'}
+        start = time.perf_counter()
+        for i in range(0, n_events, 5000):
+            outbox.record_many(db.session, 'booking.created', 'booking',
+                               [(f'B{j}', payload) for j in range(i, min(i + 5000, n_events))])
+        db.session.commit()
+        report('record_many (bulk, 5000 per statement)', n_events, time.perf_counter() - start)
+        # grow bookings to the size of the log, as on a long-running system
+        travel_date = date.today() + timedelta(days=1)
+        for i in range(0, n_events, 5000):
+            db.session.execute(insert(Booking), [
+                {'pnr': f'B{j}', 'user_id': 2, 'train_id': 1, 'travel_date': travel_date, 'cls': 'General',
+                 'seat_count': 1, 'fare_per_seat': 200, 'total_fare': 200}
+                for j in range(i, min(i + 5000, n_events))])
+        db.session.commit()
+        total = db.session.execute(select(func.count()).select_from(Booking)).scalar()
+
+        seen = [0]
+
+        def handler(session, events):
+            seen[0] += len(events)
+
+        for batch in (100, 1000, 5000):
+            db.session.execute(delete(OutboxCheckpoint))
+            db.session.commit()
+            consumer = outbox.Consumer(f'bench-{batch}', handler, batch_size=batch)
+            seen[0] = 0
+            start = time.perf_counter()
+            while consumer.poll(db.session):
+                pass
+            report(f'consume, batch {batch}', seen[0], time.perf_counter() - start)
+
+        polls = 2000
+        start = time.perf_counter()
+        for _ in range(polls):
+            consumer.poll(db.session)
+        report('idle consumer poll', polls, time.perf_counter() - start)
+        scans = 50
+        start = time.perf_counter()
+        for _ in range(scans):
+            db.session.execute(select(Booking.id, Booking.status, Booking.payment_status)).all()
+            db.session.rollback()
+        report(f'poll by scanning bookings ({total} rows)', scans, time.perf_counter() - start)
+        print("  the consumer's idle poll cost does not grow with the bookings table "
+              "(checkpoint row + index range scan past the last id)")
+
+
+if __name__ == '__main__':
+    main()
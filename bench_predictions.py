@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Benchmark batch delay/platform predictions for every train on a date.
+
+Run: python bench_predictions.py [n_trains]
+"""
+import sys
+import time
+
+import bench_utils
+from bench_utils import report
+
+
+def main():
+    n_trains = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = bench_utils.setup_db(n_trains)
+    import predictions
+    train_ids = [str(i) for i in range(1, n_trains + 1)]
+    date_str = '2025-12-05'
+
+    start = time.perf_counter()
+    for tid in train_ids:
+        abs(hash(f"{tid}:{date_str}")) % 60
+        (abs(hash(tid)) % 12) + 1
+    report('legacy hash() (per-process, uncacheable)', n_trains, time.perf_counter() - start)
+
+    predictions.clear_cache()
+    start = time.perf_counter()
+    predictions.predict_batch(train_ids, date_str)
+    report('predict_batch cold', n_trains, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    predictions.predict_batch(train_ids, date_str)
+    report('predict_batch warm (LRU hits)', n_trains, time.perf_counter() - start)
+
+    client = app.test_client()
+    client.get(f'/predict_batch?date={date_str}')
+    start = time.perf_counter()
+    resp = client.get(f'/predict_batch?date={date_str}')
+    report('GET /predict_batch (all trains)', n_trains, time.perf_counter() - start)
+
+    etag = resp.headers['ETag']
+    start = time.perf_counter()
+    resp = client.get(f'/predict_batch?date={date_str}', headers={'If-None-Match': etag})
+    elapsed = time.perf_counter() - start
+    print(f"revalidation with ETag -> {resp.status_code} in {elapsed * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    for tid in train_ids[:1000]:
+        client.get(f'/predict_delay?train_id={tid}&date={date_str}')
+        client.get(f'/predict_platform?train_id={tid}')
+    report('per-train endpoint pair (1000 trains)', 1000, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
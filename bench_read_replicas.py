@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark a mixed 95/5 read/write load with and without read replicas.
+
+Client threads send 95% reads (/availability, /trains, /train/<id>) and 5%
+bookings. Each configuration runs in a fresh process on the sqlite-wal
+profile: primary only, then reads routed to a read-only replica connection.
+Reports requests/sec, read and write latency, and how many statements each
+engine ran.
+
+Run: python bench_read_replicas.py [threads] [requests_per_thread]
+"""
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+CONFIGS = (('primary only', ''), ('readonly replica', 'readonly'))
+
+
+def child(threads, per_thread):
+    import bench_utils
+    app = bench_utils.setup_db(50)
+    from sqlalchemy import event
+    from models import db
+
+    hits = {}
+    with app.app_context():
+        for key, engine in db.engines.items():
+            event.listen(engine, 'before_cursor_execute',
+                         lambda *a, key=key or 'primary': hits.__setitem__(key, hits.get(key, 0) + 1))
+    days = [(date.today() + timedelta(days=i)).isoformat() for i in range(1, 31)]
+    lat = {'read': [], 'write': []}
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        c = app.test_client()
+        c.post('/login', data={'username': 'user1', 'password': 'user123'})
+        for _ in range(per_thread):
+            train_id = rng.randrange(1, 51)
+            start = time.perf_counter()
+            if rng.random() < 0.05:
+                kind = 'write'
+                r = c.post(f'/book/{train_id}', data={'journey_date': rng.choice(days), 'class': 'General', 'seats': '1'})
+            else:
+                kind = 'read'
+                pick = rng.random()
+                if pick < 0.6:
+                    r = c.get(f'/availability/{train_id}?date={rng.choice(days)}&class=AC')
+                elif pick < 0.8:
+                    r = c.get(f'/train/{train_id}')
+                else:
+                    r = c.get('/trains')
+            assert r.status_code in (200, 302), r.status_code
+            with lock:
+                lat[kind].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    n = threads * per_thread
+
+    def p(xs, q):
+        xs = sorted(xs)
+        return xs[int(q * (len(xs) - 1))] * 1000 if xs else 0.0
+    print(f"  {n / elapsed:,.0f} req/s over {n} requests; "
+          f"read p50 {p(lat['read'], .5):.1f} ms p95 {p(lat['read'], .95):.1f} ms; "
+          f"write p50 {p(lat['write'], .5):.1f} ms p95 {p(lat['write'], .95):.1f} ms")
+    print(f"  statements by engine: {hits}")
+
+
+def main():
+    threads = sys.argv[1] if len(sys.argv) > 1 else '8'
+    per_thread = sys.argv[2] if len(sys.argv) > 2 else '400'
+    for label, replicas in CONFIGS:
+        print(label)
+        env = dict(os.environ, DB_PROFILE='sqlite-wal', DATABASE_REPLICA_URIS=replicas, REPLICA_STICKY_SECONDS='0')
+        subprocess.run([sys.executable, __file__, '--child', threads, per_thread], env=env, check=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Benchmark refund computation: the original hard-coded function versus the
+policy engine, per booking and in vectorized batches.
+
+Run: python bench_refund_policy.py [n_bookings]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from bench_utils import report
+import refund_policy
+from test_refund_policy import legacy_refund
+from utils import calculate_refund
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(7)
+    today = date.today()
+    bookings = [SimpleNamespace(travel_date=today + timedelta(days=rng.randrange(-2, 120)),
+                                total_fare=Decimal(rng.randrange(100, 10 ** 6)) / 100, seat_count=1, cls='AC')
+                for _ in range(n)]
+    engine = refund_policy.engine()
+
+    start = time.perf_counter()
+    expected = [legacy_refund(b, today) for b in bookings]
+    report('legacy calculate_refund (if/elif)', n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    got = [calculate_refund(b, cancel_date=today) for b in bookings]
+    report('calculate_refund via policy engine', n, time.perf_counter() - start)
+
+    days = [(b.travel_date - today).days for b in bookings]
+    start = time.perf_counter()
+    for b, d in zip(bookings, days):
+        engine.refund(b.total_fare, d)
+    report('engine.refund (bisect)', n, time.perf_counter() - start)
+
+    totals = [int(b.total_fare * 100) for b in bookings]
+    start = time.perf_counter()
+    batch = engine.refund_paise_batch(totals, days)
+    report('engine.refund_paise_batch (numpy)', n, time.perf_counter() - start)
+
+    mismatches = sum(a != b for a, b in zip(expected, got))
+    mismatches += sum(int(a * 100) != int(b) for a, b in zip(expected, batch))
+    print(f"mismatches against legacy: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
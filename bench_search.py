@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark /search over the materialized train-by-day view.
+
+Materializes `days` travel dates for `n_trains` trains, then compares the
+indexed view query against the previous path (ilike scan followed by one
+availability lookup per train and class), and times filtered/ranked catalog
+queries against parsing schedule/fare values per row and sorting everything.
+
+Run: python bench_search.py [n_trains] [days] [n_queries]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import CITIES, report
+
+
+def main():
+    n_trains = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    n = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    app = bench_utils.setup_db(n_trains)
+    import search_view
+    from models import db, Train, SeatAvailability, SearchView
+    from sqlalchemy import text
+
+    start_day = date.today() + timedelta(days=1)
+    all_days = [start_day + timedelta(days=i) for i in range(days)]
+    rng = random.Random(3)
+    queries = [(rng.choice(CITIES), rng.choice(CITIES), rng.choice(all_days)) for _ in range(n)]
+
+    with app.app_context():
+        start = time.perf_counter()
+        rows = 0
+        for i in range(0, days, 10):
+            rows += search_view.materialize(db.session, all_days[i:i + 10])
+        report(f'materialize {n_trains} trains x {days} days (rows)', rows, time.perf_counter() - start)
+
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM search_view WHERE travel_date = :d AND source_key = :s AND destination_key = :t"),
+            {'d': all_days[0].isoformat(), 's': 'delhi', 't': 'mumbai'}).fetchall()
+        print('plan:', '; '.join(r[-1] for r in plan))
+
+        start = time.perf_counter()
+        found = 0
+        for src, dst, day in queries:
+            found += len(search_view.search(db.session, day, src, dst))
+        elapsed = time.perf_counter() - start
+        report('view search', n, elapsed)
+        print(f"  {elapsed / n * 1000:.2f} ms per search, {found / n:.1f} trains per result")
+
+        start = time.perf_counter()
+        for src, dst, day in queries[:50]:
+            trains = Train.query.filter(Train.source.ilike(f"%{src}%"), Train.destination.ilike(f"%{dst}%")).all()
+            for t in trains:
+                for cls in (t.classes_json or {}):
+                    SeatAvailability.query.filter_by(train_id=t.id, travel_date=day, cls=cls).first()
+        elapsed = time.perf_counter() - start
+        report('legacy ilike + per-class availability', 50, elapsed)
+        print(f"  {elapsed / 50 * 1000:.2f} ms per search")
+
+        print(f"view rows: {db.session.query(SearchView).count()}")
+
+        from services import train_catalog
+        from train_catalog import parse_duration, parse_hhmm
+        train_catalog.columns()
+        filters = dict(cls='Sleeper', max_fare=1200, depart_after=6 * 60, depart_before=22 * 60, max_duration=12 * 60)
+        start = time.perf_counter()
+        for _ in range(n):
+            ids, total = train_catalog.query(sort='fare', offset=20, limit=20, **filters)
+        elapsed = time.perf_counter() - start
+        report('catalog filter + top-k page 2 (fare)', n, elapsed)
+        print(f"  {elapsed / n * 1000:.2f} ms per query over {n_trains} trains, {total} matches")
+
+        trains = Train.query.all()
+        start = time.perf_counter()
+        for _ in range(5):
+            hits = [t for t in trains
+                    if 'Sleeper' in t.fare_json and float(t.fare_json['Sleeper']) <= 1200
+                    and 6 * 60 <= parse_hhmm(t.schedule_json.get('departure')) <= 22 * 60
+                    and 0 <= parse_duration(t.schedule_json) <= 12 * 60]
+            hits.sort(key=lambda t: (float(t.fare_json['Sleeper']), t.id))
+            hits[20:40]
+        elapsed = time.perf_counter() - start
+        report('per-row schedule/fare parse + full sort', 5, elapsed)
+        print(f"  {elapsed / 5 * 1000:.2f} ms per query")
+
+
+if __name__ == '__main__':
+    main()
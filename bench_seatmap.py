@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark seat allocation on a 1,000-seat coach map.
+
+Run: python bench_seatmap.py [n_allocations]
+"""
+import random
+import sys
+import time
+
+from bench_utils import report
+from seatmap import SeatMap
+
+CAPACITY = 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(5)
+    groups = [rng.choice((1, 1, 1, 2, 2, 3, 4, 6)) for _ in range(n)]
+    prefs = [rng.choice((None, None, 'lower', 'upper', 'side_lower')) for _ in range(n)]
+
+    allocated = 0
+    contiguous = 0
+    start = time.perf_counter()
+    m = SeatMap(CAPACITY)
+    for k, pref in zip(groups, prefs):
+        seats = m.allocate(k, preference=pref)
+        if seats is None:
+            # train full: start a fresh train-day
+            m = SeatMap(CAPACITY)
+            seats = m.allocate(k, preference=pref)
+        allocated += 1
+        contiguous += seats[-1] - seats[0] == k - 1
+    elapsed = time.perf_counter() - start
+    report('allocate (groups of 1-6, mixed preferences)', n, elapsed)
+    print(f"  {elapsed / n * 1e6:.1f} µs per allocation, {contiguous / allocated:.1%} of groups seated together")
+
+    whole_run = SeatMap(CAPACITY)
+    thirty_stops = SeatMap(CAPACITY, nseg=29)
+    print(f"map size per train-day/class: whole run {len(whole_run.to_bytes())} B, "
+          f"30-stop route {len(thirty_stops.to_bytes())} B")
+
+    m = SeatMap(CAPACITY, nseg=29)
+    start = time.perf_counter()
+    for _ in range(n):
+        lo = rng.randrange(28)
+        hi = rng.randrange(lo + 1, 29)
+        if m.allocate(2, lo, hi) is None:
+            m = SeatMap(CAPACITY, nseg=29)
+    elapsed = time.perf_counter() - start
+    report('allocate pair on 29-segment map', n, elapsed)
+    print(f"  {elapsed / n * 1e6:.1f} µs per allocation")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark segment-level inventory on a 30-stop route.
+
+Times segment-tree checks/reservations, end-to-end decrement_seats latency for
+random partial journeys, and compares how many journeys one class can sell
+with segment inventory versus a single whole-run seats_left counter.
+
+Run: python bench_segments.py [n_bookings]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+STOPS = 30
+CAPACITY = 200
+
+
+def random_journey(rng):
+    lo = rng.randrange(STOPS - 1)
+    hi = rng.randrange(lo + 1, STOPS)
+    return lo, hi
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = bench_utils.setup_db(0)
+    from models import db, Train
+    from segments import SegmentTree
+    from utils import decrement_seats
+
+    rng = random.Random(11)
+    journeys = [random_journey(rng) for _ in range(n)]
+    stops = [f"Stop{i:02d}" for i in range(STOPS)]
+
+    tree = SegmentTree([CAPACITY] * (STOPS - 1))
+    start = time.perf_counter()
+    for lo, hi in journeys:
+        if tree.min(lo, hi) >= 1:
+            tree.add(lo, hi, -1)
+    elapsed = time.perf_counter() - start
+    report('segment tree check + reserve (in memory)', n, elapsed)
+    print(f"  {elapsed / n * 1e6:.1f} µs per booking")
+
+    with app.app_context():
+        t = Train(train_no='IR-SEG', name='Segment Express', source=stops[0], destination=stops[-1],
+                  route=' -> '.join(stops), total_seats=CAPACITY, classes_json={'AC': CAPACITY},
+                  fare_json={'AC': 1000}, schedule_json={'departure': '06:00', 'duration': '20h'})
+        db.session.add(t)
+        db.session.commit()
+        day = date.today() + timedelta(days=5)
+
+        sold_segment = 0
+        start = time.perf_counter()
+        for lo, hi in journeys:
+            if decrement_seats(db.session, t.id, day, 'AC', 1, stops[lo], stops[hi]):
+                sold_segment += 1
+        elapsed = time.perf_counter() - start
+        report('decrement_seats partial journey (SQLite)', n, elapsed)
+        print(f"  {elapsed / n * 1000:.2f} ms per booking")
+
+    # whole-run model: every journey holds a seat for the entire route
+    sold_whole = min(n, CAPACITY)
+    print(f"journeys sold from {CAPACITY} seats: whole-run {sold_whole}, segment {sold_segment} "
+          f"({sold_segment / sold_whole:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark application startup and per-worker memory.
+
+1. Cold start: a fresh interpreter running create_app() with all blueprints
+   (a web worker) and with blueprints=() (init_db.py, seed_data.py and the
+   CLI tools), including the startup timing report.
+2. Forked workers: a master starts N workers the way gunicorn does, each
+   serves a few pages, then reports its private (unshared) memory:
+   - no preload: each worker builds its own app after the fork,
+   - preload: the master builds the app and workers inherit it,
+   - preload + warm + gc.freeze: as gunicorn.conf.py does.
+
+Linux only for part 2 (reads /proc/self/smaps_rollup).
+
+Run: python bench_startup.py [workers] [n_trains]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = ('no preload', 'preload', 'preload + freeze')
+PAGES = ('/home', '/trains', '/search?source=Delhi&dest=Mumbai', '/menu')
+
+
+def private_mb():
+    with open('/proc/self/smaps_rollup') as f:
+        kb = sum(int(line.split()[1]) for line in f if line.startswith(('Private_Clean', 'Private_Dirty')))
+    return kb / 1024
+
+
+def serve_pages(app):
+    c = app.test_client()
+    c.post('/login', data={'username': 'user1', 'password': 'user123'})
+    for url in PAGES:
+        assert c.get(url).status_code == 200, url
+
+
+def workers(mode, n):
+    """Runs in its own interpreter; prints startup seconds and each worker's private MB."""
+    import startup
+    start = time.perf_counter()
+    app = None
+    if mode != 'no preload':
+        from app import create_app
+        app = create_app()
+        if mode == 'preload + freeze':
+            startup.prefork(app)
+    pipes = []
+    for _ in range(n):
+        r, w = os.pipe()
+        if os.fork() == 0:
+            os.close(r)
+            if app is None:
+                from app import create_app
+                worker_app = create_app()
+            else:
+                worker_app = app
+                startup.after_fork(app)
+            serve_pages(worker_app)
+            os.write(w, f'{private_mb():.1f}'.encode())
+            os._exit(0)
+        os.close(w)
+        pipes.append(r)
+    sizes = []
+    for r in pipes:
+        sizes.append(float(os.read(r, 64)))
+        os.close(r)
+    while True:
+        try:
+            os.wait()
+        except ChildProcessError:
+            break
+    print(time.perf_counter() - start, *sizes)
+
+
+def run(code, env):
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()
+
+
+def main():
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_trains = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    import bench_utils
+    from bench_utils import BENCH_DB
+    bench_utils.setup_db(n_trains)
+    env = dict(os.environ, DATABASE_URI='sqlite:///' + BENCH_DB)
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    for label, args in (('create_app()', ''), ('create_app(blueprints=())', 'blueprints=()')):
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            lines = run(f'import sys; sys.path.insert(0, {here!r}); from app import create_app; '
+                        f'print(create_app({args}).extensions["startup"].report())', env)
+            times.append(time.perf_counter() - start)
+        print(f'{label}: interpreter start to app ready {statistics.median(times) * 1000:.0f} ms (median of 5)')
+        print('\n'.join('  ' + line for line in lines))
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print('forked workers: skipped, needs /proc/self/smaps_rollup')
+        return
+    for mode in MODES:
+        out = run(f'import sys; sys.path.insert(0, {here!r}); import bench_startup; '
+                  f'bench_startup.workers({mode!r}, {n_workers})', env)
+        seconds, *sizes = map(float, out[-1].split())
+        print(f'{mode:<18} {n_workers} workers ready in {seconds * 1000:6.0f} ms, private memory per worker '
+              f'{statistics.mean(sizes):5.1f} MB (total {sum(sizes):.0f} MB)')
+
+
+if __name__ == '__main__':
+    main()
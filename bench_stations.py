@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Benchmark station-pair lookups: route string scans vs the train_stops join.
+
+Times the bulk migration of `n` synthetic routes over STATIONS stations
+into train_stops, then answers "trains calling at A and later at B" queries
+(half taken from real routes, half random pairs) two ways: a LIKE scan of
+trains.route with the stop order checked in Python (what features parsing
+the route string had to do), and stations.trains_between.
+
+Run: python bench_stations.py [n_trains] [queries]
+"""
+import random
+import sys
+import time
+
+import bench_utils
+from bench_utils import report
+
+STATIONS = 2000
+
+
+def scan(session, src, dst):
+    from models import Train
+    from segments import route_stops
+    out = {}
+    for train_id, route in session.query(Train.id, Train.route).filter(Train.route.like(f'%{src}%'),
+                                                                         Train.route.like(f'%{dst}%')):
+        stops = [s.lower() for s in route_stops(route)]
+        if src.lower() in stops and dst.lower() in stops[stops.index(src.lower()) + 1:]:
+            out[train_id] = (stops.index(src.lower()), len(stops) - 1 - stops[::-1].index(dst.lower()))
+    return out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    app = bench_utils.setup_db(0)
+    from models import db, Train, TrainStop
+    import stations
+    with app.app_context():
+        rng = random.Random(7)
+        names = [f'Station {k}' for k in range(STATIONS)]
+        routes = [rng.sample(names, 4 + i % 5) for i in range(n)]
+        db.session.bulk_insert_mappings(Train, [dict(bench_utils.synthetic_train(i), source=r[0], destination=r[-1],
+                                                     route=' -> '.join(r)) for i, r in enumerate(routes)])
+        db.session.commit()
+        start = time.perf_counter()
+        stations.migrate(db.session)
+        report('migrate routes', n, time.perf_counter() - start)
+        print(f'  {db.session.query(TrainStop).count()} train_stops rows')
+
+        pairs = []
+        for r in rng.sample(routes, queries // 2):
+            i, j = sorted(rng.sample(range(len(r)), 2))
+            pairs.append((r[i], r[j]))
+        pairs += [tuple(rng.sample(names, 2)) for _ in range(queries - len(pairs))]
+        found = {}
+        for label, fn in (('route LIKE scan', scan), ('train_stops join', stations.trains_between)):
+            start = time.perf_counter()
+            found[label] = [len(fn(db.session, a, b)) for a, b in pairs]
+            report(label, queries, time.perf_counter() - start)
+        assert found['route LIKE scan'] == found['train_stops join']
+        print(f"  avg {sum(found['train_stops join']) / queries:.1f} trains per pair, results identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark page rendering with and without fragment caching, and template
+loading with and without the on-disk bytecode cache.
+
+Pages are fetched through the test client: /home with the whole catalog in
+its featured list, and a ticket page. Each is timed with the fragment cache
+switched off and then with it warm. Template loading is timed on a fresh
+Jinja environment per round, as a new worker would see it.
+
+Run: python bench_templates.py [n_trains] [requests]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import bench_utils
+from bench_utils import report
+
+
+def load_all(bytecode_cache):
+    from jinja2 import Environment, FileSystemLoader
+    from fragments import FragmentCacheExtension
+    env = Environment(loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')),
+                      extensions=[FragmentCacheExtension], bytecode_cache=bytecode_cache)
+    for name in env.list_templates():
+        env.get_template(name)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = bench_utils.setup_db(n)
+    from services import fragment_cache
+    import fragments
+    c = app.test_client()
+    c.post('/login', data={'username': 'user1', 'password': 'user123'})
+    r = c.post('/book/1', data={'journey_date': (date.today() + timedelta(days=3)).isoformat(), 'class': 'AC', 'seats': '2'})
+    pnr = r.headers['Location'].rsplit('/', 1)[1]
+
+    for label, url in ((f'/home ({n} trains)', '/home'), ('ticket', f'/booking/{pnr}')):
+        app.jinja_env.fragment_cache = None
+        start = time.perf_counter()
+        for _ in range(requests):
+            assert c.get(url).status_code == 200
+        report(f'{label}, no fragment cache', requests, time.perf_counter() - start)
+        app.jinja_env.fragment_cache = fragment_cache
+        c.get(url)
+        start = time.perf_counter()
+        for _ in range(requests):
+            assert c.get(url).status_code == 200
+        report(f'{label}, fragment cache warm', requests, time.perf_counter() - start)
+
+    rounds = 20
+    start = time.perf_counter()
+    for _ in range(rounds):
+        load_all(None)
+    report('load all templates, compile', rounds, time.perf_counter() - start)
+    cache = fragments.bytecode_cache(tempfile.mkdtemp(prefix='railway_jinja_'))
+    load_all(cache)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        load_all(cache)
+    report('load all templates, bytecode cache', rounds, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
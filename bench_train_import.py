@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark bulk train import against one-train-per-request admin_add_train.
+
+Generates an NDJSON and a CSV timetable of synthetic trains, then times:
+the per-train admin API for a sample, the bulk import of the NDJSON body
+through /admin/trains/import (all inserts), the same body again (all
+updates), and the CSV file through the CLI entry point. A second CSV import
+runs under tracemalloc; parsing and upserts hold one batch at a time, so
+the peak comes from the search view rebuild at the end, which reads the
+whole catalog.
+
+Run: python bench_train_import.py [n_trains]
+"""
+import csv
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import bench_utils
+from bench_utils import report, synthetic_train
+
+SAMPLE = 300
+
+
+def ndjson(n, offset=0):
+    return ''.join(json.dumps(synthetic_train(offset + i)) + '\n' for i in range(n))
+
+
+def csv_text(n, offset=0):
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(('train_no', 'name', 'source', 'destination', 'route', 'total_seats', 'classes', 'fares',
+                'departure', 'arrival', 'duration', 'days'))
+    for i in range(n):
+        t = synthetic_train(offset + i)
+        s = t['schedule_json']
+        w.writerow((t['train_no'], t['name'], t['source'], t['destination'], t['route'], t['total_seats'],
+                    ';'.join(f'{k}:{v}' for k, v in t['classes_json'].items()),
+                    ';'.join(f'{k}:{v}' for k, v in t['fare_json'].items()),
+                    s['departure'], s['arrival'], s['duration'], ''))
+    return out.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = bench_utils.setup_db(0)
+    from models import db, Train
+    from train_import import import_trains, read_records
+    c = app.test_client()
+    c.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    # materialize a week of search view so the rebuild has work to do
+    for day in range(7):
+        c.get(f'/search?date=2030-01-0{day + 1}')
+
+    start = time.perf_counter()
+    for i in range(SAMPLE):
+        r = c.post('/admin/train/add', json=synthetic_train(10 ** 6 + i))
+        assert r.status_code == 200
+    per_train = (time.perf_counter() - start) / SAMPLE
+    report(f'admin_add_train ({SAMPLE} sample)', SAMPLE, per_train * SAMPLE)
+    print(f'  projected for {n}: {per_train * n:.1f} s')
+
+    body = ndjson(n).encode()
+    for label in ('bulk import NDJSON, inserts', 'bulk import NDJSON, updates'):
+        start = time.perf_counter()
+        r = c.post('/admin/trains/import', data=body, content_type='application/x-ndjson')
+        elapsed = time.perf_counter() - start
+        summary = r.get_json()
+        report(label, n, elapsed)
+        print(f"  inserted {summary['inserted']} updated {summary['updated']} rejected {summary['rejected']}")
+
+    path = os.path.join(os.path.dirname(bench_utils.BENCH_DB), 'timetable.csv')
+    with open(path, 'w', newline='') as f:
+        f.write(csv_text(n, offset=n))
+    start = time.perf_counter()
+    with app.app_context(), open(path, newline='') as f:
+        summary = import_trains(db.session, read_records(f, 'csv'))
+    report('bulk import CSV (CLI path), inserts', n, time.perf_counter() - start)
+    print(f"  inserted {summary['inserted']}")
+
+    with open(path, 'w', newline='') as f:
+        f.write(csv_text(n, offset=2 * n))
+    tracemalloc.start()
+    with app.app_context(), open(path, newline='') as f:
+        summary = import_trains(db.session, read_records(f, 'csv'))
+        total = db.session.query(Train).count()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  traced run: inserted {summary['inserted']}, file {os.path.getsize(path) / 1e6:.1f} MB, "
+          f"peak traced {peak / 1e6:.1f} MB, catalog now {total} trains")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# bench_utils.py
+"""Shared helpers for the bench_*.py scripts.
+
+Benchmarks run in-process against a throwaway SQLite database so they never
+touch railway.db. Import this module before `app` so DATABASE_URI is set first.
+"""
+import os
+import tempfile
+import time
+
+BENCH_DB = os.path.join(tempfile.mkdtemp(prefix='railway_bench_'), 'bench.db')
+os.environ['DATABASE_URI'] = 'sqlite:///' + BENCH_DB
+
+CITIES = ['Delhi', 'Mumbai', 'Agra', 'Indore', 'Pune', 'Bangalore', 'Chennai', 'Kolkata',
+          'Jaipur', 'Hyderabad', 'Lucknow', 'Patna', 'Goa', 'Nagpur', 'Surat', 'Bhopal']
+
+
+def synthetic_train(i, stops=4):
+    """Deterministic train row #i in the same shape as seed_data.py."""
+    route = [CITIES[(i + k * 3) % len(CITIES)] for k in range(stops)]
+    dep = (i * 7) % 24
+    hours = 4 + i % 12
+    return {
+        "train_no": f"IR-{i:05d}",
+        "name": f"Bench Express {i}",
+        "source": route[0],
+        "destination": route[-1],
+        "route": " -> ".join(route),
+        "total_seats": 500,
+        "classes_json": {"AC": 100, "Sleeper": 200, "General": 200},
+        "fare_json": {"AC": 1000 + i % 2000, "Sleeper": 600 + i % 900, "General": 200 + i % 300},
+        "schedule_json": {"departure": f"{dep:02d}:00", "arrival": f"{(dep + hours) % 24:02d}:00", "duration": f"{hours}h"},
+    }
+
+
+def setup_db(n_trains=10):
+    """Create tables, the demo users and `n_trains` synthetic trains. Returns the app."""
+    from app import app
+    from models import db, Train, User
+    import stations
+    from werkzeug.security import generate_password_hash
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='admin', email='admin@example.com', password_hash=generate_password_hash('admin123'), is_admin=True))
+        db.session.add(User(username='user1', email='user1@example.com', password_hash=generate_password_hash('user123')))
+        db.session.bulk_insert_mappings(Train, [synthetic_train(i) for i in range(n_trains)])
+        db.session.commit()
+        stations.migrate(db.session)
+    return app
+
+
+def timeit(fn, n):
+    """Run fn() n times and return (total_seconds, ops_per_second)."""
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - start
+    return elapsed, n / elapsed if elapsed else float('inf')
+
+
+def report(label, n, elapsed):
+    print(f"{label:<45} {n:>8} ops  {elapsed * 1000:>9.1f} ms  {n / elapsed:>12,.0f} ops/s")
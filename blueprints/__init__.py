@@ -0,0 +1,14 @@
+# blueprints/__init__.py
+"""The web views, one blueprint per area.
+
+create_app() imports a blueprint module only when it registers it, so a
+process that needs an app context but no views (init_db.py, seed_data.py,
+the CLI tools) does not pay for importing them.
+"""
+import importlib
+
+NAMES = ('main', 'auth', 'admin', 'booking', 'food', 'assistant')
+
+
+def load(name):
+    return importlib.import_module(f'{__name__}.{name}').bp
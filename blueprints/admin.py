@@ -0,0 +1,270 @@
+# blueprints/admin.py
+"""Admin dashboard, train management, bulk jobs and reports."""
+import io
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, Response, current_app, jsonify, render_template, request
+from flask_login import current_user, login_required
+
+import counters
+import search_view
+import stations
+import train_calendar
+from db_routing import read_only
+from models import db, AdminJob, Booking, Train, TrainCalendarException
+from segments import route_stops
+from services import (assistant_engine, cancel_jobs, dashboard_stats, fare_engine, flash_queue, fragment_cache,
+                      train_catalog)
+from utils import rebuild_seats
+
+bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+@bp.route('/dashboard')
+@login_required
+def admin_dashboard():
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    # summary stats from maintained counters (see counters.py), not table counts
+    stats, _ = dashboard_stats.get(db.session)
+    return render_template('admin_dashboard.html', stats=stats)
+
+
+@bp.route('/stats')
+@login_required
+def admin_stats():
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    _, payload = dashboard_stats.get(db.session)
+    return Response(payload, mimetype='application/json')
+
+
+# Add train
+@bp.route('/train/add', methods=['POST'])
+@login_required
+def admin_add_train():
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    data = request.get_json()
+    t = Train(
+        train_no=data['train_no'],
+        name=data['name'],
+        source=data['source'],
+        destination=data['destination'],
+        route=data.get('route', ''),
+        total_seats=int(data.get('total_seats', 0)),
+        classes_json=data.get('classes_json', {}),
+        fare_json=data.get('fare_json', {}),
+        schedule_json=data.get('schedule_json', {}),
+        running_days=train_calendar.days_mask(data.get('running_days', (data.get('schedule_json') or {}).get('days')))
+    )
+    db.session.add(t)
+    db.session.flush()
+    stations.sync_stops(db.session, [t])
+    counters.add(db.session, {'trains': 1})
+    db.session.commit()
+    assistant_engine.invalidate()
+    train_catalog.invalidate()
+    fragment_cache.bump('catalog')
+    search_view.refresh_train(db.session, t.id)
+    return jsonify({"status": "ok", "train_id": t.id})
+
+
+# Update train, delete train etc. (similar patterns)
+@bp.route('/train/<int:train_id>/update', methods=['POST'])
+@login_required
+def admin_update_train(train_id):
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    t = Train.query.get_or_404(train_id)
+    data = request.get_json()
+    classes, stops = t.classes_json, route_stops(t.route)
+    for k in ['name', 'source', 'destination', 'route', 'total_seats', 'classes_json', 'fare_json', 'schedule_json']:
+        if k in data:
+            setattr(t, k, data[k])
+    if 'running_days' in data:
+        t.running_days = train_calendar.days_mask(data['running_days'])
+    if data.keys() & {'source', 'destination', 'route', 'schedule_json'}:
+        stations.sync_stops(db.session, [t])
+    if t.classes_json != classes or route_stops(t.route) != stops:
+        # re-seat the live bookings on the new route and capacities, or refuse the edit
+        error = rebuild_seats(db.session, t.id, t.route, t.classes_json)
+        if error:
+            db.session.rollback()
+            return jsonify({"error": error}), 400
+    db.session.commit()
+    train_catalog.invalidate()
+    fragment_cache.bump('catalog')
+    fare_engine.invalidate(train_id)
+    search_view.refresh_train(db.session, train_id)
+    return jsonify({"status": "ok"})
+
+
+# Running calendar: weekday mask plus dated exceptions (true = extra run, false = cancelled, null = remove)
+@bp.route('/train/<int:train_id>/calendar', methods=['GET', 'POST'])
+@login_required
+def admin_train_calendar(train_id):
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    t = Train.query.get_or_404(train_id)
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            if 'running_days' in data:
+                t.running_days = train_calendar.days_mask(data['running_days'])
+            exceptions = {datetime.strptime(d, '%Y-%m-%d').date(): runs
+                          for d, runs in (data.get('exceptions') or {}).items()}
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if exceptions:
+            TrainCalendarException.query.filter(TrainCalendarException.train_id == train_id,
+                                                TrainCalendarException.date.in_(list(exceptions))).delete()
+            db.session.add_all([TrainCalendarException(train_id=train_id, date=d, runs=bool(runs))
+                                for d, runs in exceptions.items() if runs is not None])
+        db.session.commit()
+        search_view.refresh_train(db.session, train_id)
+    horizon = current_app.config['BOOKING_HORIZON_DAYS']
+    cal = train_calendar.Calendars.load(db.session, [t], date.today(), date.today() + timedelta(days=horizon))
+    exceptions = TrainCalendarException.query.filter(TrainCalendarException.train_id == train_id,
+                                                     TrainCalendarException.date >= date.today()) \
+        .order_by(TrainCalendarException.date)
+    return jsonify({
+        "train_id": train_id,
+        "running_days": train_calendar.mask_days(t.running_days),
+        "exceptions": {e.date.isoformat(): e.runs for e in exceptions},
+        "running_dates": [d.isoformat() for d in cal.running_dates(train_id, date.today(), horizon + 1)],
+    })
+
+
+# Bulk upsert of trains by train_no from an NDJSON or CSV body, streamed line by line
+@bp.route('/trains/import', methods=['POST'])
+@login_required
+def admin_import_trains():
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    from train_import import import_trains, read_records  # admin-only; loaded on first use
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    try:
+        records = read_records(io.TextIOWrapper(request.stream, encoding='utf-8', newline=''), fmt)
+        batch_size = int(request.args.get('batch_size', 1000))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    summary = import_trains(db.session, records, batch_size=max(batch_size, 1))
+    assistant_engine.invalidate()
+    train_catalog.invalidate()
+    fragment_cache.bump('catalog')
+    fare_engine.invalidate()
+    return jsonify(summary)
+
+
+# Flash-sale mode: queue bookings for this train instead of racing for the seat row
+@bp.route('/train/<int:train_id>/flash_sale', methods=['POST'])
+@login_required
+def admin_flash_sale(train_id):
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    t = Train.query.get_or_404(train_id)
+    data = request.get_json(silent=True) or {}
+    enabled = bool(data.get('enabled', True))
+    if enabled and not flash_queue.available:
+        # the queue and its tickets are per process (see flash_sale.py)
+        return jsonify({"error": "flash-sale mode needs a single server process (WEB_CONCURRENCY=1)"}), 409
+    t.flash_sale = enabled
+    db.session.commit()
+    return jsonify({"status": "ok", "train_id": train_id, "flash_sale": flash_queue.is_hot(t)})
+
+
+# Operational cancellation: cancel and refund every booking on a train/date in the background
+@bp.route('/train/<int:train_id>/cancel_date', methods=['POST'])
+@login_required
+def admin_cancel_train_date(train_id):
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    from cancellations import cancel_train_date
+    Train.query.get_or_404(train_id)
+    data = request.get_json(silent=True) or {}
+    try:
+        travel_date = datetime.strptime(data.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"error": "date (YYYY-MM-DD) required"}), 400
+    job_id = uuid.uuid4().hex
+    db.session.add(AdminJob(id=job_id, kind='cancel_date', params={"train_id": train_id, "date": travel_date.isoformat()}))
+    db.session.commit()
+    progress_of = cancel_jobs[job_id] = {"done": 0, "total": None}
+    app = current_app._get_current_object()
+
+    def progress(done, total):
+        progress_of.update(done=done, total=total)
+
+    def run():
+        with app.app_context():
+            try:
+                result = cancel_train_date(db.session, train_id, travel_date, progress=progress)
+                finished = {"status": "finished", "result": result, "done": result["cancelled"], "total": result["cancelled"]}
+            except Exception as e:
+                finished = {"status": "failed", "error": str(e), **progress_of}
+            job = db.session.get(AdminJob, job_id)
+            for field, value in finished.items():
+                setattr(job, field, value)
+            db.session.commit()
+            cancel_jobs.pop(job_id, None)
+
+    threading.Thread(target=run, daemon=True).start()
+    return jsonify(_job_json(db.session.get(AdminJob, job_id))), 202
+
+
+def _job_json(job):
+    data = {"id": job.id, **(job.params or {}), "status": job.status, "done": job.done, "total": job.total}
+    if job.status == 'running' and job.id in cancel_jobs:
+        data.update(cancel_jobs[job.id])  # live progress, known to the worker running the job
+    if job.result is not None:
+        data["result"] = job.result
+    if job.error is not None:
+        data["error"] = job.error
+    return data
+
+
+@bp.route('/jobs/<job_id>')
+@login_required
+def admin_job_status(job_id):
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    job = db.session.get(AdminJob, job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(_job_json(job))
+
+
+@bp.route('/train/<int:train_id>/delete', methods=['POST'])
+@login_required
+def admin_delete_train(train_id):
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    t = Train.query.get_or_404(train_id)
+    search_view.drop_train(db.session, train_id)
+    stations.drop_stops(db.session, [train_id])
+    TrainCalendarException.query.filter_by(train_id=train_id).delete()
+    db.session.delete(t)
+    counters.add(db.session, {'trains': -1})
+    db.session.commit()
+    assistant_engine.invalidate()
+    train_catalog.invalidate()
+    fragment_cache.bump('catalog')
+    fare_engine.invalidate(train_id)
+    return jsonify({"status": "deleted"})
+
+
+# Reports (admin)
+@bp.route('/reports/daily')
+@login_required
+@read_only
+def daily_report():
+    if not current_user.is_admin:
+        return "Forbidden", 403
+    # sample: bookings per day
+    from sqlalchemy import func
+    results = db.session.query(func.date(Booking.created_at).label('d'), func.count(Booking.id), func.sum(Booking.total_fare)).group_by('d').all()
+    out = [{"date": r[0], "bookings": r[1], "revenue": r[2] or 0} for r in results]
+    return jsonify(out)
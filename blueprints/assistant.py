@@ -0,0 +1,76 @@
+# blueprints/assistant.py
+"""The rule-based assistant and the delay/platform prediction endpoints."""
+from flask import Blueprint, jsonify, request
+
+import predictions
+from assistant import MAX_BATCH_QUERIES
+from models import db, Train
+from predictions import CACHE_MAX_AGE
+from services import assistant_engine
+
+bp = Blueprint('assistant', __name__)
+
+
+@bp.route('/assistant', methods=['POST'])
+def assistant():
+    """Simple rule-based assistant placeholder. Returns JSON reply."""
+    data = request.get_json() or {}
+    return jsonify({'reply': assistant_engine.answer(data.get('query', ''))})
+
+
+@bp.route('/assistant/batch', methods=['POST'])
+def assistant_batch():
+    """Answer many assistant queries in one request: {"queries": [...]} -> {"replies": [...]}"""
+    data = request.get_json() or {}
+    queries = data.get('queries')
+    if not isinstance(queries, list):
+        return jsonify({'error': 'queries list required'}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({'error': f'at most {MAX_BATCH_QUERIES} queries per request'}), 400
+    return jsonify({'replies': assistant_engine.answer_many(str(q) for q in queries)})
+
+
+def cacheable(resp, max_age=CACHE_MAX_AGE):
+    """Mark a deterministic response as reusable by browsers and proxies."""
+    resp.cache_control.public = True
+    resp.cache_control.max_age = max_age
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+
+@bp.route('/predict_delay')
+def predict_delay():
+    """Return an estimated delay (minutes) for a train on a date.
+    Stable across workers, so the response is cacheable.
+    """
+    train_id = request.args.get('train_id')
+    date_str = request.args.get('date')
+    if not train_id or not date_str:
+        return jsonify({'error': 'train_id and date required'}), 400
+    est = predictions.predict_delay(train_id, date_str)
+    return cacheable(jsonify({'train_id': train_id, 'date': date_str, 'estimated_delay_minutes': est}))
+
+
+@bp.route('/predict_platform')
+def predict_platform():
+    train_id = request.args.get('train_id')
+    if not train_id:
+        return jsonify({'error': 'train_id required'}), 400
+    p = predictions.predict_platform(train_id)
+    return cacheable(jsonify({'train_id': train_id, 'predicted_platform': p}))
+
+
+@bp.route('/predict_batch')
+def predict_batch():
+    """Delay and platform for many trains on one date.
+    `train_ids` is a comma separated list; all trains are returned when omitted.
+    """
+    date_str = request.args.get('date')
+    if not date_str:
+        return jsonify({'error': 'date required'}), 400
+    ids = request.args.get('train_ids')
+    if ids:
+        train_ids = [i.strip() for i in ids.split(',') if i.strip()]
+    else:
+        train_ids = [row[0] for row in db.session.query(Train.id).order_by(Train.id)]
+    return cacheable(jsonify({'date': date_str, 'predictions': predictions.predict_batch(train_ids, date_str)}))
@@ -0,0 +1,48 @@
+# blueprints/auth.py
+"""Registration, login and logout."""
+from flask import Blueprint, redirect, render_template, request, url_for
+from flask_login import login_required, login_user, logout_user
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import counters
+from models import db, User
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form['username']
+        email = request.form['email']
+        pw = request.form['password']
+        if User.query.filter((User.username == username) | (User.email == email)).first():
+            return "User exists", 400
+        u = User(username=username, email=email, password_hash=generate_password_hash(pw), full_name=request.form.get('full_name'))
+        db.session.add(u)
+        counters.add(db.session, {'users': 1})
+        db.session.commit()
+        return redirect(url_for('auth.login'))
+    return render_template('register.html')
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        uname = request.form['username']
+        pw = request.form['password']
+        u = User.query.filter((User.username == uname) | (User.email == uname)).first()
+        if not u or not check_password_hash(u.password_hash, pw):
+            return "Invalid credentials", 401
+        login_user(u)
+        if u.is_admin:
+            return redirect(url_for('main.home'))
+        return redirect(url_for('main.home'))
+    return render_template('login.html')
+
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('main.index'))
@@ -0,0 +1,342 @@
+# blueprints/booking.py
+"""Availability, fare quotes, booking, the flash-sale queue, payment, tickets and cancellation."""
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Blueprint, Response, current_app, jsonify, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+
+import availability_push
+import outbox
+import train_calendar
+from db_routing import read_only
+from idempotency import idempotent
+from models import db, Booking, Payment, Train
+from segments import route_stops
+from services import dedup_store, fare_engine, flash_queue
+from utils import generate_pnr, calculate_refund, decrement_seats, increment_seats, seats_available
+
+bp = Blueprint('booking', __name__)
+
+MAX_QUOTE_TRAINS = 100
+SEAT_RETRIES = 3
+ALREADY_CANCELLED = "Already cancelled"
+
+
+def _user_scope():
+    return current_user.get_id() or ''
+
+
+# Check seat availability
+@bp.route('/availability/<int:train_id>')
+@read_only
+def check_availability(train_id):
+    travel_date = request.args.get('date')
+    cls = request.args.get('class')
+    if not travel_date or not cls:
+        return jsonify({"error": "date and class required"}), 400
+    from_stop = request.args.get('from') or None
+    to_stop = request.args.get('to') or None
+    try:
+        seats_left = seats_available(db.session, train_id, travel_date, cls, from_stop, to_stop)
+    except ValueError:
+        return jsonify({"error": "invalid from/to stop"}), 400
+    out = {"train_id": train_id, "date": travel_date, "class": cls, "seats_left": seats_left}
+    if from_stop or to_stop:
+        out.update({"from": from_stop, "to": to_stop})
+    return jsonify(out)
+
+
+# Live seats for one train and date as server-sent events, instead of polling /availability.
+# Served by the standalone hub (availability_hub.py); the app relays it only under the dev server.
+@bp.route('/availability/<int:train_id>/stream')
+@login_required
+def availability_stream(train_id):
+    if current_app.config['AVAILABILITY_HUB_URL']:
+        return redirect(current_app.config['AVAILABILITY_HUB_URL'].rstrip('/') + request.full_path, 307)
+    if current_app.config['AVAILABILITY_HUB_ADDR'] or not current_app.config['AVAILABILITY_STREAM_IN_APP']:
+        return jsonify({"error": "live availability is served by the availability hub"}), 404
+    try:
+        travel_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"error": "date (YYYY-MM-DD) required"}), 400
+    t = Train.query.get_or_404(train_id)
+    snapshot = {cls: {"seats_left": seats_available(db.session, train_id, travel_date, cls), "delta": None}
+                for cls in (t.classes_json or {})}
+    db.session.remove()  # hold no connection while the stream is open
+    body = availability_push.stream(train_id, travel_date.isoformat(), snapshot)
+    if body is None:
+        return jsonify({"error": "too many live availability subscribers"}), 503, {'Retry-After': '30'}
+    return Response(body, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Fares for every class of several trains in one call, e.g. for a page of search results
+@bp.route('/fares/quote')
+@read_only
+def quote_fares():
+    try:
+        travel_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+        train_ids = [int(i) for i in request.args.get('train_ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({"error": "date (YYYY-MM-DD) and train_ids (comma-separated) required"}), 400
+    if not train_ids:
+        return jsonify({"error": "date (YYYY-MM-DD) and train_ids (comma-separated) required"}), 400
+    if len(train_ids) > MAX_QUOTE_TRAINS:
+        return jsonify({"error": f"at most {MAX_QUOTE_TRAINS} trains per request"}), 400
+    from_stop = request.args.get('from') or None
+    to_stop = request.args.get('to') or None
+    quotes = fare_engine.quote_many(db.session, train_ids, travel_date, from_stop, to_stop)
+    return jsonify({"date": travel_date.isoformat(), "trains": {
+        str(train_id): {cls: {"fare": str(q['fare']), "seats_left": q['seats_left']} for cls, q in classes.items()}
+        for train_id, classes in quotes.items()}})
+
+
+@bp.route('/book/<int:train_id>', methods=['GET', 'POST'])
+@login_required
+@idempotent(dedup_store, _user_scope)
+def book_ticket(train_id):
+    t = Train.query.get_or_404(train_id)
+    if request.method == 'POST':
+        journey_date = datetime.strptime(request.form['journey_date'], '%Y-%m-%d').date()
+        if not date.today() <= journey_date <= date.today() + timedelta(days=current_app.config['BOOKING_HORIZON_DAYS']):
+            return "Journey date outside booking window", 400
+        cls = request.form['class']
+        seat_count = int(request.form['seats'])
+        # optional boarding/alighting stops for a partial-route journey
+        stops = route_stops(t.route)
+        from_stop = request.form.get('from_stop') or None
+        to_stop = request.form.get('to_stop') or None
+        if stops and from_stop == stops[0]:
+            from_stop = None
+        if stops and to_stop == stops[-1]:
+            to_stop = None
+        order = {"seat_count": seat_count, "from_stop": from_stop, "to_stop": to_stop,
+                 "preference": request.form.get('berth_preference') or None}
+        if flash_queue.is_hot(t):
+            # flash sale: join the admission queue for this train/date/class and poll for the result
+            ticket = flash_queue.submit((train_id, journey_date, cls), current_user.id, order)
+            return redirect(url_for('booking.booking_queue', token=ticket.token))
+        # seats and booking commit together
+        pnr, error = commit_seats(lambda: reserve_booking(t, current_user.id, journey_date, cls, **order))
+        if error:
+            return error, 400
+        # Redirect to payment page
+        return redirect(url_for('booking.payment_page', pnr=pnr))
+    # GET -> show booking form
+    return render_template('book.html', train=t, stops=route_stops(t.route), idempotency_key=uuid.uuid4().hex)
+
+
+def reserve_booking(t, user_id, journey_date, cls, seat_count, from_stop=None, to_stop=None, preference=None):
+    """Reserve seats and add the booking to the session, uncommitted. Returns (pnr, error)."""
+    try:
+        # priced on the load before this sale
+        seats_left = seats_available(db.session, t.id, journey_date, cls, from_stop, to_stop)
+        fare_per = fare_engine.quote(t.id, cls, journey_date, seats_left, from_stop, to_stop)
+        seats = decrement_seats(db.session, t.id, journey_date, cls, seat_count, from_stop, to_stop,
+                                preference=preference, commit=False)
+    except ValueError:
+        return None, "Invalid boarding/alighting stop"
+    # checked after the seat write, which on SQLite holds the write lock: a cancellation of the
+    # date (cancellations.py) is then either committed and seen here, or waits for this booking
+    if not train_calendar.runs_on(db.session, t, journey_date):
+        return None, "Train does not run on this date"
+    if not seats:
+        return None, "Not enough seats"
+    if fare_per is None:
+        fare_per = Decimal('0.00')
+    total = fare_per * seat_count
+    pnr = generate_pnr()
+    booking = Booking(pnr=pnr, user_id=user_id, train_id=t.id,
+                      travel_date=journey_date, cls=cls, from_stop=from_stop, to_stop=to_stop, seat_count=seat_count,
+                      seat_numbers=','.join(seats),
+                      fare_per_seat=fare_per, total_fare=total, status='CONFIRMED', payment_status='PENDING')
+    db.session.add(booking)
+    outbox.record(db.session, 'booking.created', 'booking', pnr, outbox.booking_payload(booking))
+    return pnr, None
+
+
+def commit_seats(change):
+    """Run change() -> (result, error) and commit, or roll back on error.
+
+    A concurrent writer that updated the same seat row first fails the
+    version check (StaleDataError); the change is then re-run on fresh rows.
+    """
+    for attempt in range(SEAT_RETRIES):
+        try:
+            result, error = change()
+            if error:
+                db.session.rollback()
+                return None, error
+            db.session.commit()
+            return result, None
+        except StaleDataError:
+            db.session.rollback()
+    return None, "Booking system busy, please retry"
+
+
+def allocate_flash_batch(app, key, tickets):
+    """Admission-queue allocator: book a batch in arrival order, one commit per batch.
+
+    Each ticket runs in its own savepoint, so one that fails leaves no seats
+    taken; a conflict on the seat row retries the whole batch.
+    """
+    train_id, journey_date, cls = key
+    with app.app_context():
+        for attempt in range(3):
+            t = db.session.get(Train, train_id)
+            if t is None:
+                return [(None, "Train not found")] * len(tickets)
+            try:
+                results = []
+                for ticket in tickets:
+                    # one savepoint per ticket: a refused ticket (sold out, date cancelled after its
+                    # seat write) gives its seats back without undoing the rest of the batch
+                    savepoint = db.session.begin_nested()
+                    result = reserve_booking(t, ticket.user_id, journey_date, cls, **ticket.payload)
+                    if result[1]:
+                        savepoint.rollback()
+                    else:
+                        savepoint.commit()
+                    results.append(result)
+                db.session.commit()
+                return results
+            except (OperationalError, StaleDataError):
+                # another writer holds the database or changed the seat row; retry the whole batch
+                db.session.rollback()
+                time.sleep(0.05 * (attempt + 1))
+        return [(None, "Booking system busy, please retry")] * len(tickets)
+
+
+@bp.route('/booking/queue/<token>')
+@login_required
+def booking_queue(token):
+    ticket = flash_queue.get(token)
+    if ticket is None or ticket.user_id != current_user.id:
+        return "Unknown or expired queue token", 404
+    out = {"token": token, "status": ticket.status, "position": flash_queue.position(ticket)}
+    if ticket.pnr:
+        out["pnr"] = ticket.pnr
+        out["payment_url"] = url_for('booking.payment_page', pnr=ticket.pnr)
+    if ticket.error:
+        out["error"] = ticket.error
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(out)
+    if ticket.pnr:
+        return redirect(out["payment_url"])
+    if ticket.error:
+        return ticket.error, 400
+    return render_template('queue.html', ticket=out)
+
+
+@bp.route('/payment/<pnr>', methods=['GET', 'POST'])
+@login_required
+@idempotent(dedup_store, _user_scope)
+def payment_page(pnr):
+    booking = Booking.query.filter_by(pnr=pnr).first_or_404()
+    if booking.user_id != current_user.id and not current_user.is_admin:
+        return "Forbidden", 403
+    if booking.payment_status != 'PENDING':
+        return redirect(url_for('booking.booking_confirmation', pnr=pnr))
+    train = Train.query.get(booking.train_id)
+
+    if request.method == 'POST':
+        # Process payment
+        payment_method = request.form.get('payment_method')
+        # Simulate payment processing - in production connect to actual payment gateway
+        # For demo: auto-approve
+        booking.payment_status = 'PAID'
+
+        # Create payment record
+        pay = Payment(
+            booking_id=booking.id,
+            provider=payment_method or 'CARD',
+            provider_payment_id=str(uuid.uuid4()),
+            amount=booking.total_fare,
+            status='SUCCESS'
+        )
+        db.session.add(pay)
+        outbox.record(db.session, 'booking.paid', 'booking', pnr,
+                      outbox.booking_payload(booking, provider=pay.provider, amount=pay.amount))
+        # booking, payment and its event commit together
+        db.session.commit()
+
+        return redirect(url_for('booking.booking_confirmation', pnr=pnr))
+
+    return render_template('payment.html', booking=booking, train=train, idempotency_key=uuid.uuid4().hex)
+
+
+@bp.route('/booking/<pnr>')
+@login_required
+def booking_confirmation(pnr):
+    booking = Booking.query.filter_by(pnr=pnr).first_or_404()
+    if booking.user_id != current_user.id and not current_user.is_admin:
+        return "Forbidden", 403
+    train = Train.query.get(booking.train_id)
+    return render_template('ticket.html', booking=booking, train=train)
+
+
+# Cancel booking
+@bp.route('/cancel/<pnr>', methods=['POST'])
+@login_required
+@idempotent(dedup_store, _user_scope)
+def cancel_booking(pnr):
+    booking = Booking.query.filter_by(pnr=pnr).first_or_404()
+    if booking.user_id != current_user.id and not current_user.is_admin:
+        return "Forbidden", 403
+    if booking.status == 'CANCELLED':
+        return ALREADY_CANCELLED, 400
+    refund = calculate_refund(booking, cancel_date=datetime.utcnow().date())
+    was_paid = booking.payment_status
+
+    def cancel():
+        # Mark booking cancelled and payment refunded (demo). Conditional, so of two concurrent
+        # cancels (or a retry after StaleDataError) only one releases the seats
+        cancelled = db.session.execute(update(Booking)
+                                       .where(Booking.id == booking.id, Booking.status != 'CANCELLED')
+                                       .values(status='CANCELLED', payment_status='REFUNDED')).rowcount
+        if not cancelled:
+            return None, ALREADY_CANCELLED
+        # increment seats back
+        increment_seats(db.session, booking.train_id, booking.travel_date, booking.cls, booking.seat_count,
+                        booking.from_stop, booking.to_stop, booking.seat_numbers, commit=False)
+        # update payment record (simplified)
+        payment = Payment.query.filter_by(booking_id=booking.id).first()
+        if payment:
+            payment.status = 'REFUNDED'
+        outbox.record(db.session, 'booking.cancelled', 'booking', pnr,
+                      outbox.booking_payload(booking, refund_amount=refund, previous_payment_status=was_paid))
+        return None, None
+
+    # booking, seats, payment and the event commit together
+    _, error = commit_seats(cancel)
+    if error:
+        return error, 400 if error == ALREADY_CANCELLED else 503
+    return jsonify({"status": "cancelled", "refund_amount": str(refund)})
+
+
+# Download ticket as simple HTML -> downloadable file
+@bp.route('/download_ticket/<pnr>')
+@login_required
+def download_ticket(pnr):
+    booking = Booking.query.filter_by(pnr=pnr).first_or_404()
+    if booking.user_id != current_user.id and not current_user.is_admin:
+        return "Forbidden", 403
+    # For demo: return an HTML document as attachment
+    train = Train.query.get(booking.train_id)
+    html = render_template('ticket.html', booking=booking, train=train)
+    return (html, 200, {'Content-Type': 'text/html', 'Content-Disposition': f'attachment;filename=ticket_{pnr}.html'})
+
+
+@bp.route('/history')
+@login_required
+@read_only
+def history_page():
+    # Show user's bookings
+    bookings = Booking.query.filter_by(user_id=current_user.id).order_by(Booking.created_at.desc()).all()
+    return render_template('history.html', bookings=bookings)
@@ -0,0 +1,73 @@
+# blueprints/food.py
+"""Onboard meals: menu, ordering and order history."""
+import json
+
+from flask import Blueprint, jsonify, render_template, request
+from flask_login import current_user, login_required
+
+import outbox
+from models import db, Booking, FoodOrder
+
+bp = Blueprint('food', __name__)
+
+
+@bp.route('/meal')
+def meal_page():
+    return render_template('meal.html')
+
+
+@bp.route('/menu')
+def menu():
+    # static menu with categories
+    menu = {
+        "categories": [
+            {"id": "veg", "name": "Vegetarian", "items": [{"id": "v1", "name": "Paneer Wrap", "price": 200}, {"id": "v2", "name": "Veg Biryani", "price": 180}, {"id": "v3", "name": "Salad", "price": 120}]},
+            {"id": "nonveg", "name": "Non-Veg", "items": [{"id": "n1", "name": "Chicken Biryani", "price": 250}, {"id": "n2", "name": "Grilled Chicken", "price": 300}]},
+            {"id": "snacks", "name": "Snacks & Drinks", "items": [{"id": "s1", "name": "Samosa", "price": 40}, {"id": "s2", "name": "Tea", "price": 30}, {"id": "s3", "name": "Cold Drink", "price": 60}]}
+        ]
+    }
+    return jsonify(menu)
+
+
+@bp.route('/order_history')
+@login_required
+def order_history():
+    orders = FoodOrder.query.filter_by(user_id=current_user.id).order_by(FoodOrder.created_at.desc()).all()
+    out = []
+    for o in orders:
+        out.append({
+            'order_id': o.id,
+            'booking_id': o.booking_id,
+            'items': json.loads(o.items),
+            'amount': o.amount,
+            'status': o.status,
+            'created_at': o.created_at
+        })
+    return jsonify({'orders': out})
+
+
+@bp.route('/order_food', methods=['POST'])
+@login_required
+def order_food():
+    data = request.get_json() or {}
+    items = data.get('items')
+    amount = float(data.get('amount', 0))
+    booking_pnr = data.get('pnr')
+    booking = None
+    if booking_pnr:
+        booking = Booking.query.filter_by(pnr=booking_pnr).first()
+    fo = None
+    if not items or amount <= 0:
+        return jsonify({'error': 'items and amount required'}), 400
+    fo = None
+    if booking:
+        fo = FoodOrder(booking_id=booking.id, user_id=current_user.id, items=json.dumps(items), amount=amount)
+    else:
+        fo = FoodOrder(booking_id=None, user_id=current_user.id, items=json.dumps(items), amount=amount)
+    db.session.add(fo)
+    db.session.flush()  # assigns fo.id for the event
+    outbox.record(db.session, 'food_order.placed', 'food_order', fo.id,
+                  {'order_id': fo.id, 'user_id': fo.user_id, 'pnr': booking.pnr if booking else None,
+                   'items': items, 'amount': fo.amount})
+    db.session.commit()
+    return jsonify({'status': 'placed', 'order_id': fo.id})
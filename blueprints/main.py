@@ -0,0 +1,173 @@
+# blueprints/main.py
+"""Public pages: landing and home pages, train list and details, search."""
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, current_app, jsonify, render_template, request
+from flask_login import login_required
+
+import search_view
+import stations
+from db_routing import read_only
+from models import db, Train
+from segments import route_stops
+from services import fare_engine, train_catalog
+from train_catalog import SORT_KEYS, parse_hhmm
+
+bp = Blueprint('main', __name__)
+
+SEARCH_PAGE_SIZE = 20
+
+
+@bp.route('/')
+def index():
+    return render_template('index.html')
+
+
+@bp.route('/home')
+@login_required
+def home():
+    # the featured list is a cached fragment; trains are only loaded when it is re-rendered
+    return render_template('home.html', load_trains=lambda: Train.query.all())
+
+
+@bp.route('/trains')
+@read_only
+def view_trains():
+    trains = Train.query.all()
+    trains_out = []
+    for t in trains:
+        trains_out.append({
+            "id": t.id,
+            "train_no": t.train_no,
+            "name": t.name,
+            "source": t.source,
+            "destination": t.destination,
+            "classes": t.classes_json or {}
+        })
+    return jsonify(trains_out)
+
+
+def _search_filters(args):
+    """Parse /search filter and sort arguments; malformed values are ignored."""
+    def number(name, cast=float):
+        try:
+            return cast(args[name]) if args.get(name) else None
+        except ValueError:
+            return None
+
+    def hhmm(name):
+        minutes = parse_hhmm(args.get(name))
+        return minutes if minutes >= 0 else None
+
+    max_duration = number('max_duration')  # hours
+    return {
+        'cls': args.get('class') or None,
+        'max_fare': number('max_fare'),
+        'depart_after': hhmm('depart_after'),
+        'depart_before': hhmm('depart_before'),
+        'max_duration': int(max_duration * 60) if max_duration is not None else None,
+        'sort': args.get('sort') if args.get('sort') in SORT_KEYS else None,
+        'descending': args.get('order') == 'desc',
+    }
+
+
+def _quote(result, travel_date):
+    """Replace a search result's view fares with live quotes for its date and stops."""
+    for cls, a in result['classes'].items():
+        fare = fare_engine.quote(result['id'], cls, travel_date, a['seats_left'], result['from_stop'], result['to_stop'])
+        if fare is not None:
+            a['fare'] = fare
+
+
+@bp.route('/search', methods=['GET'])
+@read_only
+def search_train():
+    source = request.args.get('source')
+    dest = request.args.get('dest')
+    date_str = request.args.get('date')  # YYYY-MM-DD
+    try:
+        travel_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else None
+    except ValueError:
+        travel_date = None
+    filters = _search_filters(request.args)
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    per_page = min(max(request.args.get('per_page', SEARCH_PAGE_SIZE, type=int) or SEARCH_PAGE_SIZE, 1), 100)
+    offset = (page - 1) * per_page
+    if travel_date:
+        # bookable trains with live seats and fares from the materialized view
+        today = date.today()
+        if today <= travel_date <= today + timedelta(days=current_app.config['BOOKING_HORIZON_DAYS']):
+            live = {r['id']: r for r in search_view.search(db.session, travel_date, source, dest)}
+        else:
+            live = {}
+        if filters['cls']:
+            live = {i: r for i, r in live.items() if filters['cls'] in r['classes']}
+        fares = None
+        if filters['max_fare'] is not None or filters['sort'] == 'fare':
+            # filter and sort on the fares the page shows: this date's quotes for this journey
+            fares = {}
+            for i, r in live.items():
+                _quote(r, travel_date)
+                shown = [a['fare'] for cls, a in r['classes'].items() if filters['cls'] in (None, cls)]
+                if shown:
+                    fares[i] = int(round(min(shown) * 100))
+        ids, total = train_catalog.query(ids=live, offset=offset, limit=per_page, fares=fares, **filters)
+        results = [live[i] for i in ids]
+        if fares is None:
+            for r in results:
+                _quote(r, travel_date)
+    elif source or dest:
+        # station-pair lookup, matching intermediate stops too
+        pairs = stations.trains_between(db.session, source, dest)
+        ids, total = train_catalog.query(ids=pairs, offset=offset, limit=per_page, **filters)
+        results = []
+        for i in ids:
+            row = train_catalog.row(i)
+            from_stop, to_stop = stations.journey_stops(route_stops(row['route']), *pairs[i])
+            results.append(dict(row, from_stop=from_stop, to_stop=to_stop))
+    else:
+        ids, total = train_catalog.query(offset=offset, limit=per_page, **filters)
+        results = [train_catalog.row(i) for i in ids]
+    pages = (total + per_page - 1) // per_page
+    return render_template('search_results.html', results=results, date=date_str, live=bool(travel_date),
+                           page=page, pages=pages, total=total)
+
+
+@bp.route('/train/<int:train_id>')
+@read_only
+def train_details(train_id):
+    t = Train.query.get_or_404(train_id)
+    return jsonify({
+        "id": t.id,
+        "train_no": t.train_no,
+        "name": t.name,
+        "source": t.source,
+        "destination": t.destination,
+        "route": t.route,
+        "classes": t.classes_json,
+        "fare": t.fare_json
+    })
+
+
+# ----------------- Static pages: Contact / Help / About -----------------
+@bp.route('/contact', methods=['GET', 'POST'])
+def contact_page():
+    success = False
+    if request.method == 'POST':
+        # In a real app we'd send/store the message. For demo, just acknowledge.
+        name = request.form.get('name')
+        mobile = request.form.get('mobile')
+        message = request.form.get('message')
+        # TODO: store or email
+        success = True
+    return render_template('contact.html', success=success)
+
+
+@bp.route('/help')
+def help_page():
+    return render_template('help.html')
+
+
+@bp.route('/about')
+def about_page():
+    return render_template('about.html')
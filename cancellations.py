@@ -0,0 +1,123 @@
+# cancellations.py
+"""Bulk cancellation of every booking on a train/date.
+
+When a train is cancelled operationally all its bookings for the day are
+cancelled in one transaction using set-based statements, in chunks of
+`chunk_size` booking ids:
+
+- the date gets a runs=False calendar exception (train_calendar.py) and its
+  search view rows are dropped, so it is no longer sold; this is the first
+  write, so on SQLite the job holds the write lock before it reads the
+  bookings, and a booking that was already writing is committed and picked
+  up (reserve_booking re-checks the calendar after its seat write),
+- bookings are marked CANCELLED with one UPDATE per chunk; paid ones are
+  marked REFUNDED, unpaid ones keep their payment status,
+- refunds follow the same refund policies as calculate_refund, computed
+  over the whole chunk at once in integer paise (see refund_policy.py),
+- paid bookings get their payment marked REFUNDED and a refund Payment row,
+  written with one bulk INSERT per chunk,
+- each booking gets a booking.cancelled event in the outbox (outbox.py),
+  one bulk INSERT per chunk,
+- the seat_availability rows are deleted: with every booking gone the
+  inventory is back at capacity (see utils.seats_available) should the
+  date be reinstated.
+
+Run from the command line: python cancellations.py <train_id> <YYYY-MM-DD>
+"""
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import case, delete, insert, select, update
+
+import outbox
+import refund_policy
+
+
+def cancel_train_date(session, train_id, travel_date, cancel_date=None, chunk_size=5000, progress=None):
+    """Cancel all open bookings for a train/date; commits once at the end.
+
+    `progress(done, total)` is called after each chunk. Returns a summary
+    dict with the number of bookings cancelled, refunds written and the
+    refund total.
+    """
+    from models import Booking, Payment, SeatAvailability, SearchView, Train, TrainCalendarException
+    cancel_date = cancel_date or datetime.utcnow().date()
+    days_before = (travel_date - cancel_date).days
+    started = time.perf_counter()
+    try:
+        session.execute(delete(TrainCalendarException).where(TrainCalendarException.train_id == train_id,
+                                                              TrainCalendarException.date == travel_date))
+        session.add(TrainCalendarException(train_id=train_id, date=travel_date, runs=False))
+        session.flush()
+        rows = session.execute(
+            select(Booking.id, Booking.pnr, Booking.user_id, Booking.total_fare, Booking.cls, Booking.seat_count, Booking.payment_status)
+            .where(Booking.train_id == train_id, Booking.travel_date == travel_date,
+                   Booking.status != 'CANCELLED')
+            .order_by(Booking.id)
+            .with_for_update()).all()
+        total = len(rows)
+        train = session.get(Train, train_id)
+        policies = refund_policy.engine()
+        refunds = 0
+        refund_total = 0
+        for start in range(0, total, chunk_size):
+            chunk = rows[start:start + chunk_size]
+            ids = [r.id for r in chunk]
+            amounts = policies.refund_paise_batch([int(r.total_fare * 100) for r in chunk], days_before,
+                                                  [r.seat_count for r in chunk], train.train_no if train else None,
+                                                  [r.cls for r in chunk])
+            session.execute(update(Booking).where(Booking.id.in_(ids))
+                            .values(status='CANCELLED',
+                                    payment_status=case((Booking.payment_status == 'PAID', 'REFUNDED'),
+                                                        else_=Booking.payment_status))
+                            .execution_options(synchronize_session=False))
+            paid = [(r.id, int(a)) for r, a in zip(chunk, amounts) if r.payment_status == 'PAID']
+            if paid:
+                paid_ids = [booking_id for booking_id, _ in paid]
+                session.execute(update(Payment)
+                                .where(Payment.booking_id.in_(paid_ids), Payment.status == 'SUCCESS')
+                                .values(status='REFUNDED')
+                                .execution_options(synchronize_session=False))
+                session.execute(insert(Payment), [
+                    {'booking_id': booking_id, 'provider': 'REFUND', 'provider_payment_id': f'refund-{booking_id}',
+                     'amount': Decimal(amount) / 100, 'status': 'REFUNDED'}
+                    for booking_id, amount in paid])
+                refunds += len(paid)
+                refund_total += sum(amount for _, amount in paid)
+            outbox.record_many(session, 'booking.cancelled', 'booking', [
+                (r.pnr, {'pnr': r.pnr, 'user_id': r.user_id, 'train_id': train_id, 'travel_date': travel_date,
+                         'class': r.cls, 'seat_count': r.seat_count, 'total_fare': r.total_fare,
+                         'status': 'CANCELLED', 'payment_status': 'REFUNDED' if r.payment_status == 'PAID' else r.payment_status,
+                         'previous_payment_status': r.payment_status,
+                         'refund_amount': Decimal(int(a)).scaleb(-2) if r.payment_status == 'PAID' else Decimal('0.00'),
+                         'operational': True})
+                for r, a in zip(chunk, amounts)])
+            if progress:
+                progress(start + len(chunk), total)
+        session.execute(delete(SeatAvailability).where(SeatAvailability.train_id == train_id,
+                                                        SeatAvailability.travel_date == travel_date))
+        session.execute(delete(SearchView).where(SearchView.train_id == train_id,
+                                                 SearchView.travel_date == travel_date))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return {'cancelled': total, 'refunds': refunds, 'refund_total': str(Decimal(refund_total).scaleb(-2)),
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('usage: python cancellations.py <train_id> <YYYY-MM-DD>')
+        sys.exit(1)
+    from app import create_app
+    from models import db
+    app = create_app(blueprints=())
+    refund_policy.configure(app.config['REFUND_POLICY_PATH'])
+    with app.app_context():
+        summary = cancel_train_date(db.session, int(sys.argv[1]), date.fromisoformat(sys.argv[2]),
+                                    progress=lambda done, total: print(f'\r{done}/{total} bookings', end='', flush=True))
+    print()
+    print(summary)
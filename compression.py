@@ -0,0 +1,47 @@
+# compression.py
+"""gzip for dynamic responses above a size threshold.
+
+Large JSON (train lists, order histories, fare quotes) and HTML pages are
+compressed on the way out when the client accepts gzip. Small bodies are
+sent as they are, since compressing them costs more time than the bytes
+saved. Streamed responses, files (static assets are precompressed by
+assets.py) and anything already encoded are left alone.
+"""
+import gzip
+
+from flask import request
+
+COMPRESSIBLE = {'application/json', 'text/html', 'text/plain', 'text/css', 'text/csv',
+                'text/javascript', 'application/javascript'}
+
+
+def compress(response, min_size=1024, level=6):
+    """gzip `response` in place if it is worth it; the caller checks Accept-Encoding."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE
+            or response.cache_control.no_transform):
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    response.set_data(gzip.compress(data, level))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # same entity, different bytes; If-None-Match still matches a weak ETag
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+    if not min_size:  # 0 turns compression off
+        return
+
+    @app.after_request
+    def gzip_response(response):
+        if 'gzip' not in request.accept_encodings:
+            return response
+        return compress(response, min_size, level)
@@ -6,6 +6,49 @@ class Config:
     # Default to a local SQLite DB for easy local development. To use MySQL, set DATABASE_URI env var.
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URI", "sqlite:///railway.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Comma-separated read replica URIs for read-only routes; "readonly" opens the primary
+    # SQLite file read-only. Clients read from the primary for a while after they write.
+    DATABASE_REPLICA_URIS = os.environ.get("DATABASE_REPLICA_URIS", "")
+    REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 10))
+    # Engine tuning profile: auto, sqlite-dev, sqlite-wal or mysql (see db_profiles.py)
+    DB_PROFILE = os.environ.get("DB_PROFILE", "auto")
     STRIPE_API_KEY = os.environ.get("STRIPE_API_KEY", "")
+    # How far ahead tickets can be booked and searched
+    BOOKING_HORIZON_DAYS = int(os.environ.get("BOOKING_HORIZON_DAYS", 120))
+    # Server processes (gunicorn.conf.py reads the same variable; see it for the per-process
+    # state). Flash-sale mode keeps its queue in the process and is refused with more than one.
+    WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+    # Bookings per transaction for trains in flash-sale mode (see flash_sale.py)
+    FLASH_SALE_BATCH_SIZE = int(os.environ.get("FLASH_SALE_BATCH_SIZE", 50))
+    # Idempotency keys on booking/payment/cancel (stored in the database): how long replays
+    # are served, and how many finished responses each process also caches in memory
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 3600))
+    IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", 100000))
+    # JSON list of refund policies (see refund_policy.py); the built-in 90/50/25% rules apply without it
+    REFUND_POLICY_PATH = os.environ.get("REFUND_POLICY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "refund_policies.json"))
+    # Directory written by `python delay_model.py history.csv`; hash-based estimates are used until it exists
+    DELAY_MODEL_PATH = os.environ.get("DELAY_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "delay_model"))
+    # Rendered template fragments ({% cache %} blocks, see fragments.py): entries kept and seconds
+    # before an entry is re-rendered; compiled templates are cached on disk (empty disables)
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get("FRAGMENT_CACHE_MAX_ENTRIES", 1024))
+    FRAGMENT_CACHE_TTL = float(os.environ.get("FRAGMENT_CACHE_TTL", 60))
+    TEMPLATE_BYTECODE_CACHE = os.environ.get("TEMPLATE_BYTECODE_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "jinja_bytecode"))
+    # gzip dynamic responses of at least this many bytes when the client accepts it (0 disables)
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+    # Live seat updates (see availability_hub.py): seconds over which changes are coalesced into one
+    # event, and the UDP host:port of a standalone hub to send them to (empty: in-process only)
+    AVAILABILITY_PUSH_INTERVAL = float(os.environ.get("AVAILABILITY_PUSH_INTERVAL", 0.25))
+    AVAILABILITY_HUB_ADDR = os.environ.get("AVAILABILITY_HUB_ADDR", "")
+    # Public base URL of that hub (e.g. https://live.example.com); the app's stream URL redirects there
+    AVAILABILITY_HUB_URL = os.environ.get("AVAILABILITY_HUB_URL", "")
+    # Without a hub the app serves the stream itself, but only under the development server
+    # (`python app.py` turns this on): each subscriber holds a request thread, at most this many
+    AVAILABILITY_STREAM_IN_APP = os.environ.get("AVAILABILITY_STREAM_IN_APP", "") == "1"
+    AVAILABILITY_STREAM_MAX_SUBSCRIBERS = int(os.environ.get("AVAILABILITY_STREAM_MAX_SUBSCRIBERS", 20))
+    # Admin dashboard totals (see counters.py): seconds the stats payload is reused, and how often
+    # `python counters.py run` recomputes them exactly
+    COUNTERS_CACHE_SECONDS = float(os.environ.get("COUNTERS_CACHE_SECONDS", 5))
+    COUNTERS_RECONCILE_SECONDS = int(os.environ.get("COUNTERS_RECONCILE_SECONDS", 3600))
     # AI config placeholders
     OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
\ No newline at end of file
@@ -0,0 +1,215 @@
+# counters.py
+"""Maintained totals for the admin dashboard.
+
+Each figure on the dashboard is one row of stat_counters, so loading it
+reads a handful of rows by primary key however large the tables grow:
+
+    trains, users, bookings         row counts
+    bookings:<YYYY-MM-DD>           bookings created that day (UTC)
+    seats_sold                      seats in bookings that are not cancelled
+    revenue                         total_fare of paid bookings
+    pending_payments, active_holds  unpaid bookings and the seats they hold
+
+Booking figures are folded in from the outbox (outbox.py) by the `counters`
+consumer, one UPDATE per counter per batch, so the booking path itself does
+not contend on counter rows. Trains and users change rarely and are counted
+in the transaction that adds or removes them.
+
+`reconcile()` moves the consumer's checkpoint to the newest event and then
+recomputes every counter with exact queries, in one transaction that holds
+the write lock from the start (see Consumer.seek_to_end), so no booking can
+commit between the two. It runs
+on the first dashboard load of an empty counter table and periodically from
+`python counters.py run`; `python counters.py reconcile` runs it once and
+prints any counters that had drifted.
+"""
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import OperationalError
+
+import outbox
+
+CONSUMER = 'counters'
+FIELDS = ('trains', 'users', 'bookings', 'seats_sold', 'revenue', 'pending_payments', 'active_holds')
+MONEY = ('revenue',)
+
+
+def day_key(day):
+    return f'bookings:{day.isoformat()}'
+
+
+def add(session, deltas):
+    """Apply {name: delta} in the caller's transaction."""
+    from models import StatCounter
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        updated = session.execute(update(StatCounter).where(StatCounter.name == name)
+                                  .values(value=StatCounter.value + delta)
+                                  .execution_options(synchronize_session=False)).rowcount
+        if not updated:
+            session.add(StatCounter(name=name, value=delta))
+
+
+@outbox.register(CONSUMER, batch_size=1000, event_types=('booking.created', 'booking.paid', 'booking.cancelled'))
+def apply_events(session, events):
+    deltas = defaultdict(int)
+    for e in events:
+        p = e.payload
+        seats, fare = p['seat_count'], Decimal(p['total_fare'])
+        if e.event_type == 'booking.created':
+            deltas['bookings'] += 1
+            deltas[day_key(e.created_at.date())] += 1
+            deltas['seats_sold'] += seats
+            deltas['pending_payments'] += 1
+            deltas['active_holds'] += seats
+        elif e.event_type == 'booking.paid':
+            deltas['revenue'] += fare
+            deltas['pending_payments'] -= 1
+            deltas['active_holds'] -= seats
+        else:
+            deltas['seats_sold'] -= seats
+            previous = p.get('previous_payment_status')
+            if previous == 'PAID':
+                deltas['revenue'] -= fare
+            elif previous == 'PENDING':
+                deltas['pending_payments'] -= 1
+                deltas['active_holds'] -= seats
+    add(session, deltas)
+
+
+def exact(session, today=None):
+    """Every counter computed from the tables (full scans; used by reconcile)."""
+    from models import Booking, Train, User
+    today = today or datetime.utcnow().date()
+    live = Booking.status != 'CANCELLED'
+    pending = live & (Booking.payment_status == 'PENDING')
+
+    def total(cond, value=1):
+        return func.coalesce(func.sum(case((cond, value), else_=0)), 0)
+
+    # one pass over bookings for all of its counters
+    row = session.execute(select(
+        func.count(Booking.id),
+        total(Booking.created_at >= datetime.combine(today, datetime.min.time())),
+        total(live, Booking.seat_count),
+        total(Booking.payment_status == 'PAID', Booking.total_fare),
+        total(pending),
+        total(pending, Booking.seat_count))).one()
+    return {
+        'trains': session.execute(select(func.count()).select_from(Train)).scalar(),
+        'users': session.execute(select(func.count()).select_from(User)).scalar(),
+        'bookings': row[0], day_key(today): row[1], 'seats_sold': row[2], 'revenue': Decimal(row[3]),
+        'pending_payments': row[4], 'active_holds': row[5],
+    }
+
+
+def reconcile(session, today=None):
+    """Overwrite the counters with exact values and commit. Returns {name: (was, now)} for drifted ones."""
+    from models import StatCounter
+    try:
+        consumer = outbox.consumers[CONSUMER]
+        consumer.seek_to_end(session)
+        values = exact(session, today)
+        current = dict(session.execute(select(StatCounter.name, StatCounter.value)
+                                       .where(StatCounter.name.in_(list(values)))).all())
+        drift = {}
+        for name, value in values.items():
+            if name not in current:
+                session.add(StatCounter(name=name, value=value))
+            elif current[name] != value:
+                session.execute(update(StatCounter).where(StatCounter.name == name).values(value=value)
+                                .execution_options(synchronize_session=False))
+            if current.get(name) != value:
+                drift[name] = (current.get(name), value)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return drift
+
+
+class DashboardStats:
+    """The dashboard's figures as one JSON payload, rebuilt at most every `ttl` seconds.
+
+    A rebuild first folds in up to `max_batches` outbox batches, then reads
+    the counter rows; neither depends on the size of the tables.
+    """
+
+    def __init__(self, ttl=5.0, max_batches=4):
+        self.ttl = ttl
+        self.max_batches = max_batches
+        self._stats = None
+        self._json = None
+        self._built = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._built = 0.0
+
+    def get(self, session):
+        """(stats dict, JSON string)."""
+        if time.monotonic() - self._built < self.ttl:
+            return self._stats, self._json
+        with self._lock:
+            if time.monotonic() - self._built >= self.ttl:
+                stats = self._build(session)
+                self._stats, self._json = stats, json.dumps(stats, separators=(',', ':'))
+                self._built = time.monotonic()
+            return self._stats, self._json
+
+    def _build(self, session):
+        from models import StatCounter
+        consumer = outbox.consumers[CONSUMER]
+        today = datetime.utcnow().date()
+        if session.get(StatCounter, 'trains') is None:
+            reconcile(session, today)  # never counted: start from exact values
+        try:
+            for _ in range(self.max_batches):
+                if consumer.poll(session) < consumer.batch_size:
+                    break
+        except OperationalError:
+            pass  # another process is folding the same batch in; show what is committed
+        names = list(FIELDS) + [day_key(today)]
+        rows = dict(session.execute(select(StatCounter.name, StatCounter.value)
+                                    .where(StatCounter.name.in_(names))).all())
+        session.rollback()
+        stats = {name: str(rows.get(name, Decimal(0)).quantize(Decimal('0.01'))) if name in MONEY
+                 else int(rows.get(name, 0)) for name in FIELDS}
+        stats['bookings_today'] = int(rows.get(day_key(today), 0))
+        stats['as_of'] = datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+        return stats
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    from app import create_app
+    from models import db
+    app = create_app(blueprints=())
+    with app.app_context():
+        if command == 'reconcile':
+            drift = reconcile(db.session)
+            for name, (was, now) in sorted(drift.items()):
+                print(f'{name:<24} {was} -> {now}')
+            print(f'{len(drift)} counters corrected')
+        elif command == 'run':
+            # fold in outbox events continuously and reconcile every COUNTERS_RECONCILE_SECONDS
+            every = app.config['COUNTERS_RECONCILE_SECONDS']
+            consumer = outbox.consumers[CONSUMER]
+            try:
+                while True:
+                    reconcile(db.session)
+                    until = time.monotonic() + every
+                    consumer.run(db.session, stop=lambda: time.monotonic() >= until)
+            except KeyboardInterrupt:
+                pass
+        else:
+            print('usage: python counters.py reconcile | run')
+            sys.exit(1)
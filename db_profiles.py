@@ -0,0 +1,110 @@
+# db_profiles.py
+"""Database engine tuning profiles.
+
+DB_PROFILE selects one of PROFILES:
+
+- sqlite-dev: SQLAlchemy defaults, for local development.
+- sqlite-wal: for serving from SQLite with several workers/threads. WAL
+  lets readers run alongside the single writer, synchronous=NORMAL is
+  durable at WAL checkpoints, busy_timeout makes writers wait for the lock
+  instead of failing with "database is locked", and reads go through a
+  256 MB mmap and a 64 MB page cache.
+- mysql: a sized connection pool with pre-ping and recycling, so idle
+  connections dropped by the server are replaced instead of erroring.
+
+"auto" picks mysql for MySQL URIs and sqlite-dev otherwise. Pool options go
+into SQLALCHEMY_ENGINE_OPTIONS; SQLite pragmas are applied to every new
+connection from an engine "connect" event. `self_check` reads the effective
+settings back so startup can report them.
+
+Run: python db_profiles.py    # print the self-check for the configured database
+"""
+from sqlalchemy import event
+
+PROFILES = {
+    'sqlite-dev': {'dialect': 'sqlite', 'engine': {}, 'pragmas': {}},
+    'sqlite-wal': {
+        'dialect': 'sqlite',
+        'engine': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30},
+        'pragmas': {
+            'journal_mode': 'wal',
+            'synchronous': 1,  # NORMAL
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # KiB
+            'temp_store': 2,  # MEMORY
+        },
+    },
+    'mysql': {
+        'dialect': 'mysql',
+        'engine': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30, 'pool_recycle': 1800,
+                   'pool_pre_ping': True},
+        'pragmas': {},
+    },
+}
+
+
+def resolve(uri, requested='auto'):
+    """Profile name for a database URI; raises ValueError for a mismatch."""
+    dialect = 'mysql' if uri.startswith('mysql') else 'sqlite' if uri.startswith('sqlite') else None
+    if requested in (None, '', 'auto'):
+        return 'mysql' if dialect == 'mysql' else 'sqlite-dev'
+    profile = PROFILES.get(requested)
+    if profile is None:
+        raise ValueError(f"unknown DB_PROFILE {requested!r}; choose from {', '.join(PROFILES)} or auto")
+    if dialect and profile['dialect'] != dialect:
+        raise ValueError(f"DB_PROFILE {requested!r} does not apply to a {dialect} database")
+    return requested
+
+
+def engine_options(name):
+    return dict(PROFILES[name]['engine'])
+
+
+def install(engine, name, read_only=False):
+    """Apply the profile's per-connection settings to `engine`.
+
+    Read-only connections (replicas) leave the journal mode to the primary.
+    """
+    pragmas = PROFILES[name]['pragmas']
+    if read_only:
+        pragmas = {k: v for k, v in pragmas.items() if k != 'journal_mode'}
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for key, value in pragmas.items():
+            cur.execute(f'PRAGMA {key}={value}')
+        cur.close()
+
+
+def self_check(engine, name):
+    """Effective settings for `engine` and any that differ from the profile."""
+    pool = engine.pool
+    report = {'profile': name, 'dialect': engine.dialect.name, 'pool': type(pool).__name__}
+    if hasattr(pool, 'size'):
+        report['pool_size'] = pool.size()
+    for key in ('_recycle', '_pre_ping'):
+        if hasattr(pool, key):
+            report[key.lstrip('_')] = getattr(pool, key)
+    mismatches = []
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as conn:
+            for key in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store'):
+                report[key] = conn.exec_driver_sql(f'PRAGMA {key}').scalar()
+        for key, want in PROFILES[name]['pragmas'].items():
+            if str(report.get(key)).lower() != str(want).lower():
+                mismatches.append(f'{key}={report.get(key)} (profile wants {want})')
+    report['mismatches'] = mismatches
+    return report
+
+
+if __name__ == '__main__':
+    from app import create_app
+    from models import db
+    app = create_app(blueprints=())
+    with app.app_context():
+        for key, value in self_check(db.engine, app.config['DB_PROFILE_RESOLVED']).items():
+            print(f'{key:>14}: {value}')
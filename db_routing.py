@@ -0,0 +1,89 @@
+# db_routing.py
+"""Read/write splitting between the primary database and read replicas.
+
+Replicas are extra binds named replica_0, replica_1, ... built from
+DATABASE_REPLICA_URIS (comma separated). The keyword `readonly` stands for a
+read-only connection to the primary SQLite file, which is the local
+stand-in for a replica; any other SQLite file must be kept in sync with the
+primary externally.
+
+Views decorated with @read_only run their SELECTs on a replica (picked
+round-robin). Everything else goes to the primary, and so does:
+
+- every flush, INSERT/UPDATE/DELETE and SELECT ... FOR UPDATE,
+- the rest of a request once it has written anything,
+- all requests from a client for REPLICA_STICKY_SECONDS after one of its
+  requests wrote (booking, payment, ...), so users read their own writes
+  while replicas catch up,
+- background threads, which have no request.
+"""
+import itertools
+import time
+from functools import wraps
+
+from flask import g, has_request_context, session as http_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_PREFIX = 'replica_'
+STICKY_KEY = 'db_primary_until'
+
+_next_replica = itertools.count()
+
+
+def replica_binds(primary_uri, replica_uris):
+    """SQLALCHEMY_BINDS entries for the configured replicas."""
+    binds = {}
+    for i, uri in enumerate(u.strip() for u in (replica_uris or '').split(',') if u.strip()):
+        if uri == 'readonly':
+            if not primary_uri.startswith('sqlite:///'):
+                raise ValueError("the 'readonly' replica needs a SQLite primary")
+            uri = f"sqlite:///file:{primary_uri[len('sqlite:///'):]}?mode=ro&uri=true"
+        binds[f'{REPLICA_PREFIX}{i}'] = uri
+    return binds
+
+
+def read_only(view):
+    """Route this view's reads to a replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _use_replica():
+    return (has_request_context() and g.get('db_read_only') and not g.get('db_wrote')
+            and http_session.get(STICKY_KEY, 0) < time.time())
+
+
+def _mark_write():
+    if has_request_context():
+        g.db_wrote = True
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            if isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None:
+                _mark_write()
+            elif _use_replica():
+                replicas = [e for key, e in self._db.engines.items() if key and key.startswith(REPLICA_PREFIX)]
+                if replicas:
+                    return replicas[next(_next_replica) % len(replicas)]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    _mark_write()
+
+
+def init_app(app):
+    """Make a client's reads stick to the primary for a while after it writes."""
+    @app.after_request
+    def stick_to_primary(resp):
+        if g.get('db_wrote'):
+            http_session[STICKY_KEY] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return resp
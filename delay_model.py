@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Offline delay model: training pipeline and the runtime predictor.
+
+Training reads a delay history CSV with one observation per line
+
+    train_no,station,date,delay_minutes
+    IR-001,Agra,2025-11-02,14
+
+builds the feature matrix with NumPy (day of week, departure hour from
+`schedule_json`, number of stops and stop position from `route`, load factor
+from `seat_availability`), fits a ridge regression and writes the model as
+plain .npy files that web workers open with mmap_mode='r'.
+
+Everything that depends only on the train is folded into one per-train base
+term at training time, so a prediction is a day-of-week lookup plus a sorted
+array search.
+
+Run: python delay_model.py history.csv [model_dir]
+"""
+import csv
+import json
+import math
+import os
+import sys
+from datetime import date, datetime
+
+import numpy as np
+
+from segments import route_stops
+
+FEATURES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun',
+            'dep_hour_sin', 'dep_hour_cos', 'stops', 'stop_position', 'load_factor']
+RIDGE_LAMBDA = 1.0
+MAX_DELAY_MINUTES = 600
+
+
+def departure_hour(schedule):
+    """Departure as fractional hours; 0.0 when the schedule has none or it is not HH:MM."""
+    try:
+        hh, mm = str((schedule or {}).get('departure') or '').split(':')
+        return int(hh) + int(mm) / 60.0
+    except ValueError:
+        return 0.0
+
+
+def read_history(path):
+    """Return column arrays (train_no, station, date, delay) from a history CSV."""
+    train_nos, stations, dates, delays = [], [], [], []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            train_nos.append(row['train_no'])
+            stations.append(row['station'])
+            dates.append(row['date'])
+            delays.append(row['delay_minutes'])
+    return (np.array(train_nos), np.array(stations),
+            np.array(dates, dtype='datetime64[D]'), np.array(delays, dtype=np.float64))
+
+
+def load_catalog(session):
+    """Train attributes and sold-seat load factors needed for the features."""
+    from models import Train, SeatAvailability
+    trains = {}
+    class_capacity = {}
+    for t in session.query(Train.id, Train.train_no, Train.route, Train.schedule_json, Train.classes_json):
+        classes = {cls: int(v) for cls, v in (t.classes_json or {}).items()}
+        class_capacity[t.id] = classes
+        trains[t.train_no] = {'id': t.id, 'stops': route_stops(t.route),
+                              'dep_hour': departure_hour(t.schedule_json), 'capacity': sum(classes.values())}
+    # inventory rows only exist once sold against, so aggregate seats sold
+    sold = {}
+    for train_id, travel_date, cls, seats_left in session.query(
+            SeatAvailability.train_id, SeatAvailability.travel_date, SeatAvailability.cls, SeatAvailability.seats_left):
+        key = (train_id, travel_date.isoformat())
+        sold[key] = sold.get(key, 0) + max(class_capacity.get(train_id, {}).get(cls, seats_left) - seats_left, 0)
+    return trains, sold
+
+
+def build_features(trains, seats_sold, train_nos, stations, dates):
+    """Feature matrix for history rows. Rows for unknown trains are dropped via the mask."""
+    uniq, tidx = np.unique(train_nos, return_inverse=True)
+    known = np.array([u in trains for u in uniq])
+    dep = np.array([trains[u]['dep_hour'] if u in trains else 0.0 for u in uniq])
+    nstops = np.array([len(trains[u]['stops']) if u in trains else 0 for u in uniq], dtype=np.float64)
+    mask = known[tidx]
+
+    # stop position (0 at origin, 1 at destination) per distinct (train, station)
+    pairs, pidx = np.unique(np.char.add(np.char.add(train_nos, '\x1f'), stations), return_inverse=True)
+    pos = np.empty(len(pairs))
+    for i, p in enumerate(pairs):
+        tno, st = str(p).split('\x1f')
+        stops = trains.get(tno, {}).get('stops', [])
+        pos[i] = stops.index(st) / (len(stops) - 1) if st in stops and len(stops) > 1 else 1.0
+
+    # load factor per distinct (train, date); dates without sales are empty
+    days = dates.astype('datetime64[D]')
+    td, tdidx = np.unique(np.stack([tidx, days.astype(np.int64)], axis=1), axis=0, return_inverse=True)
+    tdidx = tdidx.reshape(-1)
+    load = np.zeros(len(td))
+    for i, (ti, day) in enumerate(td):
+        t = trains.get(str(uniq[ti]))
+        if t and t['capacity']:
+            d = (np.datetime64(int(day), 'D')).astype(object).isoformat()
+            load[i] = seats_sold.get((t['id'], d), 0) / t['capacity']
+
+    dow = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    X = np.zeros((len(train_nos), len(FEATURES)))
+    X[np.arange(len(train_nos)), dow] = 1.0
+    hour = dep[tidx] * (2 * math.pi / 24)
+    X[:, 7] = np.sin(hour)
+    X[:, 8] = np.cos(hour)
+    X[:, 9] = nstops[tidx]
+    X[:, 10] = pos[pidx]
+    X[:, 11] = load[tdidx]
+    return X, mask
+
+
+def fit(X, y, lam=RIDGE_LAMBDA):
+    A = X.T @ X + lam * np.eye(X.shape[1])
+    return np.linalg.solve(A, X.T @ y)
+
+
+def train(history_path, model_dir, session):
+    train_nos, stations, dates, delays = read_history(history_path)
+    trains, seats_sold = load_catalog(session)
+    X, mask = build_features(trains, seats_sold, train_nos, stations, dates)
+    X, y = X[mask], delays[mask]
+    if not len(y):
+        raise ValueError('no history rows match a known train')
+    w = fit(X, y)
+    rmse = float(np.sqrt(np.mean((X @ w - y) ** 2)))
+
+    # fold train-only features into one base term evaluated at the destination;
+    # load factor uses the train's mean over its training rows. Trains without
+    # history are left out and keep the hash-based fallback.
+    row_train = np.array([trains[no]['id'] for no in train_nos[mask]], dtype=np.int64)
+    ids, inverse, counts = np.unique(row_train, return_inverse=True, return_counts=True)
+    mean_load = np.bincount(inverse.reshape(-1), weights=X[:, 11]) / counts
+    by_id = {t['id']: t for t in trains.values()}
+    hour = np.array([by_id[tid]['dep_hour'] for tid in ids]) * (2 * math.pi / 24)
+    nstops = np.array([len(by_id[tid]['stops']) for tid in ids], dtype=np.float64)
+    base = w[7] * np.sin(hour) + w[8] * np.cos(hour) + w[9] * nstops + w[10] * 1.0 + w[11] * mean_load
+
+    os.makedirs(model_dir, exist_ok=True)
+    np.save(os.path.join(model_dir, 'weights.npy'), w)
+    np.save(os.path.join(model_dir, 'train_ids.npy'), ids)
+    np.save(os.path.join(model_dir, 'train_base.npy'), base)
+    with open(os.path.join(model_dir, 'meta.json'), 'w') as f:
+        json.dump({'features': FEATURES, 'rows': int(len(y)), 'rmse': rmse,
+                   'trained_at': datetime.utcnow().isoformat()}, f, indent=2)
+    return {'rows': int(len(y)), 'rmse': rmse, 'trains': int(len(ids))}
+
+
+class DelayModel:
+    """Runtime predictor over memory-mapped model arrays."""
+    __slots__ = ('dow_weights', 'train_ids', 'train_base')
+
+    def __init__(self, model_dir):
+        w = np.load(os.path.join(model_dir, 'weights.npy'))
+        self.dow_weights = tuple(float(v) for v in w[:7])
+        self.train_ids = np.load(os.path.join(model_dir, 'train_ids.npy'), mmap_mode='r')
+        self.train_base = np.load(os.path.join(model_dir, 'train_base.npy'), mmap_mode='r')
+
+    def predict(self, train_id, date_str):
+        """Delay in minutes, or None when the train is not in the model."""
+        i = int(self.train_ids.searchsorted(train_id))
+        if i >= len(self.train_ids) or self.train_ids[i] != train_id:
+            return None
+        est = float(self.train_base[i]) + self.dow_weights[date.fromisoformat(date_str).weekday()]
+        return int(min(max(round(est), 0), MAX_DELAY_MINUTES))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    from app import create_app
+    from models import db
+    app = create_app(blueprints=())
+    out = sys.argv[2] if len(sys.argv) > 2 else app.config['DELAY_MODEL_PATH']
+    with app.app_context():
+        stats = train(sys.argv[1], out, db.session)
+    print(f"✓ Trained on {stats['rows']} rows for {stats['trains']} trains (rmse {stats['rmse']:.2f} min) -> {out}")
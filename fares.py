@@ -0,0 +1,156 @@
+# fares.py
+"""Dynamic fares from precomputed per-train fare tables.
+
+A fare is the class base fare from `fare_json` (the full-run fare) scaled by
+the share of the route travelled, a demand multiplier for the journey's load
+factor, and an advance-purchase multiplier for how far ahead the ticket is
+bought. All arithmetic is Decimal, rounded to paise.
+
+Route distance is measured in segments (stop to stop), as routes carry no
+kilometre data. For every (train, class) the engine precomputes one row per
+(boarding segment, alighting segment) pair holding the fare for each load
+bucket, so a quote is a table lookup plus one advance-window multiply.
+"""
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from segments import available, route_stops, segment_range
+
+PAISE = Decimal('0.01')
+
+# load factor -> demand multiplier: below 50% sold, 50-75%, 75-90%, 90%+
+LOAD_BUCKETS = (0.5, 0.75, 0.9)
+DEMAND_MULTIPLIERS = (Decimal('1.00'), Decimal('1.10'), Decimal('1.25'), Decimal('1.50'))
+
+# days before travel -> advance-purchase multiplier: 0-1, 2-6, 7-29, 30+
+ADVANCE_DAYS = (2, 7, 30)
+ADVANCE_MULTIPLIERS = (Decimal('1.20'), Decimal('1.10'), Decimal('1.00'), Decimal('0.90'))
+
+# shortest journeys still pay this share of the full-run fare
+MIN_DISTANCE_SHARE = Decimal('0.25')
+
+
+def load_bucket(seats_left, capacity):
+    if not capacity or seats_left is None:
+        return 0
+    return bisect_right(LOAD_BUCKETS, 1 - seats_left / capacity)
+
+
+def advance_multiplier(travel_date, booked_on=None):
+    days = (travel_date - (booked_on or date.today())).days
+    return ADVANCE_MULTIPLIERS[bisect_right(ADVANCE_DAYS, days)]
+
+
+def build_table(base_fare, nseg):
+    """{(lo, hi): (fare per load bucket, ...)} for every journey on the route."""
+    base = Decimal(str(base_fare or 0))
+    table = {}
+    for lo in range(nseg):
+        for hi in range(lo + 1, nseg + 1):
+            share = max(Decimal(hi - lo) / nseg, MIN_DISTANCE_SHARE) if nseg > 1 else Decimal(1)
+            table[(lo, hi)] = tuple(base * share * m for m in DEMAND_MULTIPLIERS)
+    return table
+
+
+class _TrainFares:
+    __slots__ = ('stops', 'nseg', 'capacity', 'tables')
+
+    def __init__(self, train):
+        self.stops = route_stops(train.route)
+        self.nseg = max(len(self.stops) - 1, 1)
+        self.capacity = {cls: int(v) for cls, v in (train.classes_json or {}).items()}
+        self.tables = {cls: build_table(f, self.nseg) for cls, f in (train.fare_json or {}).items()}
+
+
+class FareEngine:
+    """Quotes fares from cached per-train tables.
+
+    `loader(train_id)` returns a Train row or None. Tables are built on
+    first quote for a train and kept for up to `max_trains` trains; call
+    `invalidate(train_id)` after a train's route, classes or fares change.
+    """
+
+    def __init__(self, loader, max_trains=4096):
+        self._loader = loader
+        self._max_trains = max_trains
+        self._trains = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, train_id=None):
+        with self._lock:
+            if train_id is None:
+                self._trains.clear()
+            else:
+                self._trains.pop(train_id, None)
+
+    def _fares(self, train_id):
+        with self._lock:
+            fares = self._trains.get(train_id)
+            if fares is not None:
+                self._trains.move_to_end(train_id)
+                return fares
+        train = self._loader(train_id)
+        if train is None:
+            return None
+        fares = _TrainFares(train)
+        with self._lock:
+            self._trains[train_id] = fares
+            if len(self._trains) > self._max_trains:
+                self._trains.popitem(last=False)
+        return fares
+
+    def quote(self, train_id, cls, travel_date, seats_left=None, from_stop=None, to_stop=None, booked_on=None):
+        """Per-seat fare as Decimal, or None for an unknown train/class.
+
+        `seats_left` is the journey's availability (None = unsold). Raises
+        ValueError for stops that are not on the route.
+        """
+        fares = self._fares(train_id)
+        table = fares.tables.get(cls) if fares else None
+        if table is None:
+            return None
+        lo, hi, _ = segment_range(fares.stops, from_stop, to_stop)
+        fare = table[(lo, hi)][load_bucket(seats_left, fares.capacity.get(cls))]
+        return (fare * advance_multiplier(travel_date, booked_on)).quantize(PAISE, rounding=ROUND_HALF_UP)
+
+    def quote_many(self, session, train_ids, travel_date, from_stop=None, to_stop=None):
+        """{train_id: {cls: {'fare': Decimal, 'seats_left': int}}} for every class of each train.
+
+        Seat rows for all trains are read in one query; trains without a row
+        for a class are at capacity. Trains where the stops are not on the
+        route, or that do not exist, are left out.
+        """
+        from models import SeatAvailability
+        train_ids = list(dict.fromkeys(train_ids))
+        rows = {}
+        if train_ids:
+            for sa in session.query(SeatAvailability).filter(SeatAvailability.train_id.in_(train_ids),
+                                                            SeatAvailability.travel_date == travel_date):
+                rows[(sa.train_id, sa.cls)] = sa
+        out = {}
+        for train_id in train_ids:
+            fares = self._fares(train_id)
+            if fares is None:
+                continue
+            try:
+                lo, hi, nseg = segment_range(fares.stops, from_stop, to_stop)
+            except ValueError:
+                continue
+            classes = {}
+            for cls, capacity in fares.capacity.items():
+                if cls not in fares.tables:
+                    continue
+                sa = rows.get((train_id, cls))
+                if sa is None:
+                    left = capacity
+                elif from_stop or to_stop or sa.segments:
+                    left = available(sa, lo, hi, nseg)
+                else:
+                    left = sa.seats_left
+                classes[cls] = {'fare': self.quote(train_id, cls, travel_date, left, from_stop, to_stop),
+                                'seats_left': left}
+            out[train_id] = classes
+        return out
@@ -0,0 +1,122 @@
+# flash_sale.py
+"""Admission queue for flash-sale (Tatkal-style) booking.
+
+When a hot train opens, every booking request fights over the same
+SeatAvailability row and SQLite answers "database is locked". For trains in
+flash-sale mode, booking requests are instead queued per (train_id, date,
+class) and handed back a poll token. One allocator thread per key drains its
+queue in arrival order, in batches, and commits each batch in a single
+transaction, so there is exactly one writer per hot row and earlier arrivals
+always get first pick of the seats.
+
+The flag that puts a train in flash-sale mode is Train.flash_sale, but the
+queues and tickets live in the web process: a ticket can only be polled on
+the process that issued it, and two processes would each run an allocator
+for the same key. The mode is therefore only `available` when the app runs
+as a single process (WEB_CONCURRENCY=1); otherwise is_hot() is always false
+and bookings take the direct path.
+"""
+import secrets
+import threading
+import time
+from collections import deque
+
+QUEUED, CONFIRMED, REJECTED = 'queued', 'confirmed', 'rejected'
+
+
+class Ticket:
+    __slots__ = ('token', 'key', 'user_id', 'payload', 'seq', 'status', 'pnr', 'error', 'created', 'done')
+
+    def __init__(self, key, user_id, payload):
+        self.token = secrets.token_urlsafe(12)
+        self.key = key
+        self.user_id = user_id
+        self.payload = payload
+        self.seq = 0
+        self.status = QUEUED
+        self.pnr = None
+        self.error = None
+        self.created = time.monotonic()
+        self.done = threading.Event()
+
+
+class _Lane:
+    __slots__ = ('pending', 'submitted', 'processed', 'running')
+
+    def __init__(self):
+        self.pending = deque()
+        self.submitted = 0
+        self.processed = 0
+        self.running = False
+
+
+class AdmissionQueue:
+    """Per-key FIFO queues, each drained by a single allocator thread.
+
+    `allocate(key, tickets)` processes one batch and returns a (pnr, error)
+    pair per ticket, in order. Finished tickets are kept for `ttl` seconds so
+    clients can poll for the result.
+    """
+
+    def __init__(self, allocate, batch_size=50, ttl=600.0):
+        self._allocate = allocate
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.available = True
+        self._lanes = {}
+        self._tickets = {}
+        self._lock = threading.Lock()
+
+    def is_hot(self, train):
+        return self.available and bool(train.flash_sale)
+
+    def submit(self, key, user_id, payload):
+        ticket = Ticket(key, user_id, payload)
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = _Lane()
+            ticket.seq = lane.submitted
+            lane.submitted += 1
+            lane.pending.append(ticket)
+            self._tickets[ticket.token] = ticket
+            if not lane.running:
+                lane.running = True
+                threading.Thread(target=self._drain, args=(key, lane), daemon=True).start()
+        return ticket
+
+    def get(self, token):
+        return self._tickets.get(token)
+
+    def position(self, ticket):
+        """Requests ahead of `ticket` in its queue, counting the batch in progress."""
+        lane = self._lanes.get(ticket.key)
+        if ticket.status != QUEUED or lane is None:
+            return 0
+        return max(ticket.seq - lane.processed, 0)
+
+    def _drain(self, key, lane):
+        while True:
+            with self._lock:
+                if not lane.pending:
+                    lane.running = False
+                    del self._lanes[key]
+                    self._prune()
+                    return
+                batch = [lane.pending.popleft() for _ in range(min(self.batch_size, len(lane.pending)))]
+            try:
+                results = self._allocate(key, batch)
+            except Exception:
+                results = [(None, 'Booking failed, please retry')] * len(batch)
+            with self._lock:
+                for ticket, (pnr, error) in zip(batch, results):
+                    ticket.pnr, ticket.error = pnr, error
+                    ticket.status = CONFIRMED if pnr else REJECTED
+                    ticket.done.set()
+                lane.processed += len(batch)
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.ttl
+        stale = [k for k, t in self._tickets.items() if t.status != QUEUED and t.created < cutoff]
+        for k in stale:
+            del self._tickets[k]
@@ -0,0 +1,110 @@
+# fragments.py
+"""Cached template fragments and on-disk template bytecode.
+
+Wrap an expensive, user-independent part of a template in
+
+    {% cache 'featured_trains', fragment_version('catalog') %} ... {% endcache %}
+
+and the rendered HTML is kept in a FragmentCache under the key made of the
+tag's arguments. Keys carry a version number for the data they show
+(`fragment_version(name)`); code that changes that data calls
+`bump(name)` so the next render misses. Versions are per process, so
+entries also expire after `max_age` seconds to pick up edits made by other
+workers, like the train catalog does.
+
+`bytecode_cache(path)` stores compiled templates on disk so a new worker
+loads them instead of parsing and compiling every template again.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """Bounded LRU of rendered fragments with per-entry expiry and named versions."""
+
+    def __init__(self, max_entries=1024, max_age=60.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def version(self, name):
+        return self._versions.get(name, 0)
+
+    def bump(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, html):
+        with self._lock:
+            self._entries[key] = (html, time.monotonic() + self.max_age)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FragmentCacheExtension(Extension):
+    """The {% cache key, ... %}...{% endcache %} tag; uses environment.fragment_cache."""
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(args)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = tuple(key)
+        html = cache.get(key)
+        if html is None:
+            html = caller()
+            cache.set(key, html)
+        return html
+
+
+def init_app(app, cache):
+    """Install the cache tag, `fragment_version` and (if configured) the bytecode cache."""
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = cache
+    app.jinja_env.globals['fragment_version'] = cache.version
+    path = app.config.get('TEMPLATE_BYTECODE_CACHE')
+    if path:
+        app.jinja_env.bytecode_cache = bytecode_cache(path)
+
+
+def bytecode_cache(path):
+    os.makedirs(path, exist_ok=True)
+    return FileSystemBytecodeCache(path)
@@ -0,0 +1,36 @@
+# gunicorn.conf.py
+"""gunicorn settings, read automatically by `gunicorn app:app` from this directory.
+
+The app is built once in the master (preload_app) and warmed before the
+workers are forked, so they start instantly and share its memory; see
+startup.py.
+
+By default there is one worker process serving THREADS concurrent requests.
+Several objects in services.py are per process: the flash-sale queue, the
+live progress of cancellation jobs, the fare tables (FareEngine) and the
+template fragment versions, which are invalidated only in the process that
+changed a train, and the in-app availability stream. Bookings, idempotency
+keys and job status are in the database and are safe with any number of
+workers. Set WEB_CONCURRENCY above 1 only with AVAILABILITY_HUB_ADDR set and
+flash-sale mode unused, and accept fares and cached fragments lagging an
+admin change in the other workers until they restart.
+"""
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 8))
+preload_app = True
+
+
+def when_ready(server):
+    import startup
+    from app import app
+    startup.prefork(app)
+
+
+def post_fork(server, worker):
+    import startup
+    from app import app
+    startup.after_fork(app)
@@ -0,0 +1,195 @@
+# idempotency.py
+"""Idempotency keys for mutating endpoints.
+
+A client sends the same `Idempotency-Key` header (or `idempotency_key` form
+field, which the booking and payment forms render once per page) with every
+retry of one logical request. The first request runs and its response is
+stored; replays within the TTL get the stored response back without running
+the view again, so a double-click or a retry after a timeout cannot book or
+charge twice. A replay that arrives while the first request is still running
+gets 409, and reusing a key for a different request body gets 422.
+
+Keys are scoped per user and endpoint. Claims live in the idempotency_keys
+table of the main database, so every worker and process sees them: the
+first request inserts the key (primary key, committed before the view runs)
+and a concurrent retry's insert fails, which is how it learns the key is in
+progress. A claim whose request never finished (a killed worker) can be
+taken over after CLAIM_TIMEOUT seconds. Completed responses are also cached
+in a per-process LRU of `max_entries`, so replays usually skip the database.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, make_response, request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+HEADER = 'Idempotency-Key'
+FORM_FIELD = 'idempotency_key'
+MAX_KEY_LENGTH = 255
+# response headers worth replaying; cookies and the like are not
+REPLAY_HEADERS = ('Location', 'Content-Type')
+# seconds before an unfinished claim is considered abandoned
+CLAIM_TIMEOUT = 300.0
+# delete expired keys after this many claims in a process
+PRUNE_EVERY = 1000
+
+
+class DedupStore:
+    """Request key -> (fingerprint, stored response), shared through the database.
+
+    `engine` is a callable returning the SQLAlchemy engine (e.g.
+    `lambda: db.engine`); claims and responses are written on their own
+    connection, outside the view's session and transaction.
+    """
+
+    def __init__(self, engine=None, max_entries=100000, ttl=24 * 3600.0):
+        self._entries = OrderedDict()
+        self._claimed = {}
+        self._claims = 0
+        self._lock = threading.Lock()
+        self.configure(engine, max_entries, ttl)
+
+    def configure(self, engine, max_entries, ttl):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def __len__(self):
+        return len(self._entries)
+
+    def begin(self, key, fingerprint):
+        """Claim `key`. Returns None for a new request, else the stored
+        (fingerprint, response) pair; response is None while in progress."""
+        from models import IdempotencyKey
+        table = IdempotencyKey.__table__
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] >= now:
+                    self._entries.move_to_end(key)
+                    return entry[0], entry[1]
+                del self._entries[key]
+        engine = self.engine()
+        for _ in range(3):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(table).values(key=key, fingerprint=fingerprint, response=None,
+                                                      expires=now + CLAIM_TIMEOUT))
+            except IntegrityError:
+                pass  # taken: by a request in progress, or a finished one
+            else:
+                with self._lock:
+                    self._claimed[key] = fingerprint
+                self._prune(engine, now)
+                return None
+            with engine.begin() as conn:
+                row = conn.execute(select(table.c.fingerprint, table.c.response, table.c.expires)
+                                   .where(table.c.key == key)).first()
+                if row is not None and row.expires < now:
+                    # expired, or abandoned by a worker that died mid-request: free it and claim again
+                    conn.execute(delete(table).where(table.c.key == key, table.c.expires == row.expires))
+                    continue
+            if row is None:
+                continue  # released between our insert and select
+            if row.response is None:
+                return row.fingerprint, None
+            response = json.loads(row.response)
+            self._cache(key, row.fingerprint, response, row.expires)
+            return row.fingerprint, response
+        return fingerprint, None
+
+    def finish(self, key, response):
+        """Store the response for a claimed key; `None` releases it for a retry."""
+        from models import IdempotencyKey
+        table = IdempotencyKey.__table__
+        with self._lock:
+            fingerprint = self._claimed.pop(key, '')
+        with self.engine().begin() as conn:
+            if response is None:
+                conn.execute(delete(table).where(table.c.key == key, table.c.response.is_(None)))
+                return
+            expires = time.time() + self.ttl
+            conn.execute(update(table).where(table.c.key == key)
+                         .values(response=json.dumps(response), expires=expires))
+        self._cache(key, fingerprint, response, expires)
+
+    def _cache(self, key, fingerprint, response, expires):
+        with self._lock:
+            self._entries[key] = (fingerprint, response, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _prune(self, engine, now):
+        with self._lock:
+            self._claims += 1
+            if self._claims % PRUNE_EVERY:
+                return
+        from models import IdempotencyKey
+        table = IdempotencyKey.__table__
+        with engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.expires < now))
+
+
+def _fingerprint():
+    h = hashlib.sha256(request.method.encode())
+    h.update(request.path.encode())
+    if request.is_json:
+        h.update(request.get_data())
+    else:
+        for k, v in sorted(request.form.items(multi=True)):
+            if k != FORM_FIELD:
+                h.update(f'{k}={v}\n'.encode())
+    return h.hexdigest()
+
+
+def idempotent(store, scope=lambda: ''):
+    """Decorator: dedupe non-GET requests that carry an idempotency key.
+
+    `scope()` namespaces keys (e.g. the user id) so one client cannot replay
+    another's response. Requests without a key run as before. 5xx responses
+    and exceptions release the key so the client can retry.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER) or request.form.get(FORM_FIELD)
+            if request.method == 'GET' or not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({"error": "idempotency key too long"}), 400
+            full_key = f'{scope()}:{request.endpoint}:{key}'
+            fingerprint = _fingerprint()
+            seen = store.begin(full_key, fingerprint)
+            if seen is not None:
+                stored_fingerprint, stored = seen
+                if stored_fingerprint != fingerprint:
+                    return jsonify({"error": "idempotency key reused with a different request"}), 422
+                if stored is None:
+                    return jsonify({"error": "a request with this idempotency key is in progress"}), 409
+                resp = make_response(stored['body'], stored['status'])
+                resp.headers.update(stored['headers'])
+                resp.headers['Idempotent-Replayed'] = 'true'
+                return resp
+            try:
+                resp = make_response(view(*args, **kwargs))
+            except Exception:
+                store.finish(full_key, None)
+                raise
+            if resp.status_code >= 500 or resp.is_streamed:
+                store.finish(full_key, None)
+                return resp
+            store.finish(full_key, {
+                'status': resp.status_code,
+                'headers': {h: resp.headers[h] for h in REPLAY_HEADERS if h in resp.headers},
+                'body': resp.get_data(as_text=True),
+            })
+            return resp
+        return wrapper
+    return decorator
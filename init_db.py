@@ -3,15 +3,64 @@
 
 Run: python init_db.py
 """
-from app import app
+from app import create_app
 from models import db, User
+import counters
+import stations
+import train_calendar
 from werkzeug.security import generate_password_hash
+from sqlalchemy import inspect, text
+
+
+def add_missing_columns():
+    """ALTER existing tables to add columns introduced after they were created.
+
+    Only nullable columns and columns with a server default can be added.
+    """
+    insp = inspect(db.engine)
+    existing_tables = set(insp.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {c['name'] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in have or not (col.nullable or col.server_default is not None):
+                continue
+            ddl = col.type.compile(dialect=db.engine.dialect)
+            if col.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {col.server_default.arg}"
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {col.name} {ddl}'))
+            print(f'Added column {table.name}.{col.name}')
+
+
+def add_missing_indexes():
+    """Create indexes declared on models after their tables were created."""
+    insp = inspect(db.engine)
+    existing_tables = set(insp.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {ix['name'] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in have:
+                index.create(db.engine)
+                print(f'Created index {index.name}')
 
 
 def init_db():
+    app = create_app(blueprints=())
     with app.app_context():
         print('Creating database tables...')
         db.create_all()
+        add_missing_columns()
+        add_missing_indexes()
+        calendars = train_calendar.migrate(db.session)
+        if calendars:
+            print(f'Moved running days of {calendars} trains into running_days')
+        migrated = stations.migrate(db.session)
+        if migrated:
+            print(f'Parsed routes of {migrated} trains into train_stops')
         # Create default admin user if not present
         admin = User.query.filter_by(username='admin').first()
         if admin:
@@ -22,6 +71,9 @@ def init_db():
             db.session.add(admin)
             db.session.commit()
             print('Created admin user: username=admin password=%s' % pw)
+        drift = counters.reconcile(db.session)
+        if drift:
+            print(f'Recounted {len(drift)} dashboard counters')
 
 
 if __name__ == '__main__':
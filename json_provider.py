@@ -0,0 +1,85 @@
+# json_provider.py
+"""JSON provider behind jsonify(), using orjson when it is installed.
+
+orjson serializes the dicts and lists our endpoints build several times
+faster than the json module and writes bytes, which go into the response
+without re-encoding. Without it the stdlib json module is used, with the
+same output types:
+
+- Decimal (Numeric columns: fares, amounts, revenue) as a JSON number,
+- date and datetime as ISO 8601 strings ("2026-10-19", "2026-10-19T08:30:00"),
+  instead of Flask's HTTP date format,
+- anything with __html__ (Markup) as its HTML string, NumPy scalars as numbers.
+
+Keys are not sorted, unlike Flask's default; views build dicts in a fixed
+order, so output (and ETags) stay deterministic.
+"""
+import dataclasses
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used without it
+    orjson = None
+
+
+def default(o):
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (date, datetime)):
+        return o.isoformat()
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    if hasattr(o, 'item') and hasattr(o, 'dtype'):  # NumPy scalar
+        return o.item()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(default)
+    ensure_ascii = False
+    sort_keys = False
+
+    @property
+    def backend(self):
+        return 'orjson' if orjson is not None else 'json'
+
+    def _options(self, indent):
+        opts = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            opts |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            opts |= orjson.OPT_SORT_KEYS
+        return opts
+
+    def dumps_bytes(self, obj, indent=None):
+        if orjson is not None:
+            return orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self.dumps(obj, indent=indent).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and set(kwargs) <= {'indent', 'separators'}:
+            return orjson.dumps(obj, default=self.default, option=self._options(kwargs.get('indent'))).decode('utf-8')
+        if kwargs.get('indent') is None:
+            kwargs.setdefault('separators', (',', ':'))
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
@@ -2,8 +2,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+# reads from @read_only views may go to a replica (see db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model, UserMixin):
     __tablename__ = "users"
@@ -28,6 +30,8 @@ class Train(db.Model):
     classes_json = db.Column(db.JSON)
     fare_json = db.Column(db.JSON)
     schedule_json = db.Column(db.JSON)
+    running_days = db.Column(db.SmallInteger, default=127)  # weekday bitmask, bit 0 = Monday; NULL = daily (see train_calendar.py)
+    flash_sale = db.Column(db.Boolean, default=False)  # bookings go through the admission queue (see flash_sale.py)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Booking(db.Model):
@@ -38,12 +42,16 @@ class Booking(db.Model):
     train_id = db.Column(db.Integer, db.ForeignKey("trains.id"), nullable=False)
     travel_date = db.Column(db.Date)
     cls = db.Column("class", db.String(10), nullable=False)
+    from_stop = db.Column(db.String(100))  # boarding stop; NULL = origin
+    to_stop = db.Column(db.String(100))  # alighting stop; NULL = destination
     seat_count = db.Column(db.Integer, nullable=False)
+    seat_numbers = db.Column(db.String(255))  # comma separated labels, e.g. "S1-1,S1-2"
     fare_per_seat = db.Column(db.Numeric(10,2), nullable=False)
     total_fare = db.Column(db.Numeric(10,2), nullable=False)
     status = db.Column(db.Enum('CONFIRMED','CANCELLED','RAC','WL'), default='CONFIRMED')
     payment_status = db.Column(db.Enum('PAID','REFUNDED','PENDING'), default='PENDING')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_bookings_train_date', 'train_id', 'travel_date'),)
 
 class SeatAvailability(db.Model):
     __tablename__ = "seat_availability"
@@ -51,14 +59,19 @@ class SeatAvailability(db.Model):
     train_id = db.Column(db.Integer, db.ForeignKey("trains.id"), nullable=False)
     travel_date = db.Column(db.Date, nullable=False)
     cls = db.Column("class", db.String(10), nullable=False)
-    seats_left = db.Column(db.Integer, nullable=False)
+    seats_left = db.Column(db.Integer, nullable=False)  # full-route seats = min over segments
+    segments = db.Column(db.LargeBinary)  # packed per-segment seats left (see segments.py)
+    seat_map = db.Column(db.LargeBinary)  # per-segment occupancy bitmaps (see seatmap.py)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # bumped on every UPDATE, which only matches the version that was read (see utils.decrement_seats)
+    version = db.Column(db.Integer, nullable=False, server_default='0')
     __table_args__ = (db.UniqueConstraint('train_id','travel_date','class', name='train_date_class'),)
+    __mapper_args__ = {'version_id_col': version}
 
 class Payment(db.Model):
     __tablename__ = "payments"
     id = db.Column(db.Integer, primary_key=True)
-    booking_id = db.Column(db.Integer, db.ForeignKey("bookings.id"), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey("bookings.id"), nullable=False, index=True)
     provider = db.Column(db.String(50))
     provider_payment_id = db.Column(db.String(100))
     amount = db.Column(db.Numeric(10,2), nullable=False)
@@ -75,4 +88,116 @@ class FoodOrder(db.Model):
     items = db.Column(db.Text, nullable=False)  # JSON string of items
     amount = db.Column(db.Numeric(10,2), nullable=False)
     status = db.Column(db.Enum('PLACED','PREPARING','ONBOARD','DELIVERED','CANCELLED'), default='PLACED')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Normalized routes: one row per station and one per stop of each train (see stations.py)
+class Station(db.Model):
+    __tablename__ = "stations"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    name_key = db.Column(db.String(100), unique=True, nullable=False)  # lower-cased name
+
+
+class TrainStop(db.Model):
+    __tablename__ = "train_stops"
+    id = db.Column(db.Integer, primary_key=True)
+    train_id = db.Column(db.Integer, db.ForeignKey("trains.id"), nullable=False)
+    station_id = db.Column(db.Integer, db.ForeignKey("stations.id"), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # 0 = origin
+    arrival_offset = db.Column(db.Integer)  # minutes after origin departure; NULL at the origin
+    departure_offset = db.Column(db.Integer)  # NULL at the destination
+    distance_km = db.Column(db.Numeric(8,1))  # from the origin; NULL when unknown
+    __table_args__ = (
+        db.UniqueConstraint('train_id', 'seq', name='train_stop_seq'),
+        db.Index('ix_train_stops_station_train', 'station_id', 'train_id'),
+    )
+
+
+# Dates a train runs outside its weekday mask (runs=True) or does not run on it (runs=False)
+class TrainCalendarException(db.Model):
+    __tablename__ = "train_calendar_exceptions"
+    id = db.Column(db.Integer, primary_key=True)
+    train_id = db.Column(db.Integer, db.ForeignKey("trains.id"), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    runs = db.Column(db.Boolean, nullable=False)
+    __table_args__ = (db.UniqueConstraint('train_id', 'date', name='train_calendar_date'),
+                      db.Index('ix_train_calendar_date', 'date'))
+
+
+# Materialized train x travel date x class rows used by /search (see search_view.py)
+class SearchView(db.Model):
+    __tablename__ = "search_view"
+    id = db.Column(db.Integer, primary_key=True)
+    travel_date = db.Column(db.Date, nullable=False)
+    train_id = db.Column(db.Integer, db.ForeignKey("trains.id"), nullable=False)
+    cls = db.Column("class", db.String(10), nullable=False)
+    source_key = db.Column(db.String(100), nullable=False)  # lower-cased Train.source
+    destination_key = db.Column(db.String(100), nullable=False)  # lower-cased Train.destination
+    seats_left = db.Column(db.Integer, nullable=False)
+    fare = db.Column(db.Numeric(10,2), nullable=False)
+    __table_args__ = (
+        db.Index('ix_search_view_lookup', 'travel_date', 'source_key', 'destination_key'),
+        db.Index('ix_search_view_seat', 'train_id', 'travel_date', 'class'),
+    )
+
+
+# Travel dates whose search_view rows have been materialized
+class SearchViewDate(db.Model):
+    __tablename__ = "search_view_dates"
+    travel_date = db.Column(db.Date, primary_key=True)
+    built_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Append-only log of booking, payment, cancellation and food order changes,
+# written in the same transaction as the change (see outbox.py)
+class OutboxEvent(db.Model):
+    __tablename__ = "outbox_events"
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(40), nullable=False)  # e.g. "booking.created"
+    aggregate = db.Column(db.String(20), nullable=False)  # "booking" or "food_order"
+    aggregate_id = db.Column(db.String(30), nullable=False)  # PNR or food order id
+    payload = db.Column(db.Text, nullable=False)  # JSON object
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # ids are never reused, even after prune empties the table (consumers compare them to checkpoints)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+# How far each outbox consumer has read
+class OutboxCheckpoint(db.Model):
+    __tablename__ = "outbox_checkpoints"
+    consumer = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Maintained dashboard totals, e.g. "bookings" or "bookings:2026-10-19" (see counters.py)
+class StatCounter(db.Model):
+    __tablename__ = "stat_counters"
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Numeric(14,2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Idempotency-Key claims and stored responses, shared by all workers (see idempotency.py)
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_keys"
+    key = db.Column(db.String(320), primary_key=True)  # "<user id>:<endpoint>:<client key>"
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the request
+    response = db.Column(db.Text)  # JSON; NULL while the first request is running
+    expires = db.Column(db.Float, nullable=False)  # unix time
+
+
+# Background admin jobs (bulk cancellations), so any worker can report their status
+class AdminJob(db.Model):
+    __tablename__ = "admin_jobs"
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)  # e.g. "cancel_date"
+    params = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, finished or failed
+    done = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
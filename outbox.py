@@ -0,0 +1,279 @@
+# outbox.py
+"""Transactional outbox: an append-only log of booking lifecycle events.
+
+The views that change bookings, payments and food orders call `record()`
+before they commit, so each event is written in the same transaction as the
+change it describes: it exists if and only if the change does. Event types:
+
+    booking.created    book_ticket and the flash-sale queue (reserve_booking)
+    booking.paid       payment_page
+    booking.cancelled  cancel_booking and cancellations.py
+    food_order.placed  order_food
+
+Downstream consumers (rollups, notifications, cache invalidation) read the
+log in id order instead of polling the bookings tables. A `Consumer` keeps
+its position in outbox_checkpoints and processes one batch per transaction:
+the handler's own database writes and the new checkpoint commit together, so
+a handler that only writes to this database sees each event exactly once;
+side effects elsewhere are at-least-once (a crash before the commit replays
+the batch).
+
+Ids are allocated when a transaction inserts, not when it commits, so on a
+database with concurrent writers a later id can become visible first. A
+consumer therefore stops in front of a gap until it has been waiting on it
+for GAP_WAIT seconds (timed from when it first saw the gap, not from the
+events' created_at, which is set at insert); after that the gap is taken to
+be a rolled back insert and skipped. The skipped ids are re-checked on every
+poll for RECHECK_SECONDS, and an event that does commit into them late is
+still handed to the handler, after the events that followed it. The
+consumer remembers its gaps in memory, so a restart within that window
+loses the re-check.
+
+The outbox_events id is AUTOINCREMENT on SQLite so ids are never reused, and
+prune() always keeps the newest event, which also keeps a table created
+before that from handing out an id a checkpoint has already passed.
+
+Run: python outbox.py status | tail [consumer] | prune <days>
+"""
+import json
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+
+GAP_WAIT = 5.0
+RECHECK_SECONDS = 300.0
+DEFAULT_BATCH = 500
+
+Event = namedtuple('Event', 'id event_type aggregate aggregate_id payload created_at')
+
+# name -> Consumer, for the command line and the admin status
+consumers = {}
+
+
+def _dumps(payload):
+    return json.dumps(payload, default=str, separators=(',', ':'))
+
+
+def record(session, event_type, aggregate, aggregate_id, payload):
+    """Add an event to the session; it commits (or rolls back) with the caller's change."""
+    from models import OutboxEvent
+    session.add(OutboxEvent(event_type=event_type, aggregate=aggregate, aggregate_id=str(aggregate_id),
+                            payload=_dumps(payload)))
+
+
+def record_many(session, event_type, aggregate, events):
+    """Bulk form of record() for set-based writers: `events` is [(aggregate_id, payload), ...]."""
+    from models import OutboxEvent
+    if events:
+        now = datetime.utcnow()
+        session.execute(insert(OutboxEvent), [
+            {'event_type': event_type, 'aggregate': aggregate, 'aggregate_id': str(aggregate_id),
+             'payload': _dumps(payload), 'created_at': now}
+            for aggregate_id, payload in events])
+
+
+def booking_payload(booking, **extra):
+    payload = {'pnr': booking.pnr, 'user_id': booking.user_id, 'train_id': booking.train_id,
+               'travel_date': booking.travel_date, 'class': booking.cls, 'seat_count': booking.seat_count,
+               'total_fare': booking.total_fare, 'status': booking.status, 'payment_status': booking.payment_status}
+    if booking.from_stop or booking.to_stop:
+        payload.update({'from': booking.from_stop, 'to': booking.to_stop})
+    payload.update(extra)
+    return payload
+
+
+class Consumer:
+    """Tails the outbox in batches of `batch_size`, calling handler(session, events).
+
+    `event_types` limits the events handed to the handler; the checkpoint
+    still moves past the others.
+    """
+
+    def __init__(self, name, handler, batch_size=DEFAULT_BATCH, event_types=None):
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size
+        self.event_types = frozenset(event_types) if event_types else None
+        self._gaps = {}  # first missing id -> time.monotonic() the gap was first seen
+        self._skipped = []  # [(first id, last id, time.monotonic() skipped)] still re-checked
+
+    def _checkpoint(self, session):
+        from models import OutboxCheckpoint
+        row = session.execute(select(OutboxCheckpoint).where(OutboxCheckpoint.consumer == self.name)
+                              .with_for_update()).scalar_one_or_none()
+        if row is None:
+            row = OutboxCheckpoint(consumer=self.name, last_id=0)
+            session.add(row)
+        return row
+
+    def _late(self, session, columns, checkpoint, now):
+        """Events that have committed into skipped gaps since they were skipped."""
+        from models import OutboxEvent
+        self._skipped = [gap for gap in self._skipped if now - gap[2] < RECHECK_SECONDS]
+        if not self._skipped:
+            return []
+        return session.execute(select(*columns)
+                               .where(OutboxEvent.id <= checkpoint.last_id,
+                                      or_(*(and_(OutboxEvent.id >= lo, OutboxEvent.id <= hi)
+                                            for lo, hi, _ in self._skipped)))
+                               .order_by(OutboxEvent.id)
+                               .limit(self.batch_size)).all()
+
+    def poll(self, session):
+        """Process at most one batch and commit. Returns the number of events read."""
+        from models import OutboxEvent
+        columns = (OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.aggregate, OutboxEvent.aggregate_id,
+                   OutboxEvent.payload, OutboxEvent.created_at)
+        now = time.monotonic()
+        try:
+            checkpoint = self._checkpoint(session)
+            late = self._late(session, columns, checkpoint, now)
+            rows = session.execute(
+                select(*columns)
+                .where(OutboxEvent.id > checkpoint.last_id)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)).all()
+            expected = checkpoint.last_id + 1
+            batch, skipped, waiting = [], [], False
+            for row in rows:
+                if row.id != expected:
+                    # time every gap in view from now, so gaps found together are skipped together
+                    seen = self._gaps.setdefault(expected, now)
+                    waiting = waiting or now - seen < GAP_WAIT
+                    if not waiting:
+                        skipped.append((expected, row.id - 1, now))
+                if not waiting:
+                    batch.append(row)
+                expected = row.id + 1
+            if not batch and not late:
+                session.rollback()
+                return 0
+            events = [Event(r.id, r.event_type, r.aggregate, r.aggregate_id, json.loads(r.payload), r.created_at)
+                      for r in late + batch if self.event_types is None or r.event_type in self.event_types]
+            if events:
+                self.handler(session, events)
+            if batch:
+                checkpoint.last_id = batch[-1].id
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        for lo, hi, _ in skipped:
+            self._gaps.pop(lo, None)
+        if batch:
+            self._gaps = {lo: t for lo, t in self._gaps.items() if lo > batch[-1].id}
+        self._skipped.extend(skipped)
+        for row in late:
+            self._split(row.id)
+        return len(late) + len(batch)
+
+    def _split(self, event_id):
+        """Stop re-checking an id that has been delivered."""
+        for i, (lo, hi, at) in enumerate(self._skipped):
+            if lo <= event_id <= hi:
+                self._skipped[i:i + 1] = [(a, b, at) for a, b in ((lo, event_id - 1), (event_id + 1, hi)) if a <= b]
+                return
+
+    def run(self, session, interval=1.0, stop=None):
+        """Poll until `stop()` is true, sleeping `interval` seconds whenever the log is drained."""
+        while not (stop and stop()):
+            if self.poll(session) < self.batch_size:
+                time.sleep(interval)
+
+    def seek(self, session, last_id):
+        """Move the checkpoint to `last_id` as part of the caller's transaction."""
+        self._checkpoint(session).last_id = last_id
+
+    def seek_to_end(self, session):
+        """Move the checkpoint to the newest event as part of the caller's transaction; returns its id.
+
+        The checkpoint row is written first, which on SQLite takes the write
+        lock: nothing else commits until the caller does, so what it reads in
+        the same transaction matches the new checkpoint. Recent ids missing
+        below it (inserts that rolled back, or were still uncommitted when
+        the lock was taken) are re-checked like skipped gaps.
+        """
+        from models import OutboxCheckpoint, OutboxEvent
+        checkpoint = self._checkpoint(session)
+        session.flush()
+        session.execute(update(OutboxCheckpoint).where(OutboxCheckpoint.consumer == self.name)
+                        .values(updated_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False))
+        ids = session.execute(select(OutboxEvent.id)
+                              .where(OutboxEvent.id > checkpoint.last_id,
+                                     OutboxEvent.created_at >= datetime.utcnow() - timedelta(seconds=RECHECK_SECONDS))
+                              .order_by(OutboxEvent.id)).scalars().all()
+        newest = session.execute(select(func.max(OutboxEvent.id))).scalar() or 0
+        now = time.monotonic()
+        self._skipped.extend((a + 1, b - 1, now) for a, b in zip(ids, ids[1:]) if b > a + 1)
+        checkpoint.last_id = max(newest, checkpoint.last_id)
+        return checkpoint.last_id
+
+    def lag(self, session):
+        """Events written after this consumer's checkpoint."""
+        from models import OutboxCheckpoint, OutboxEvent
+        last_id = session.execute(select(OutboxCheckpoint.last_id)
+                                  .where(OutboxCheckpoint.consumer == self.name)).scalar() or 0
+        return session.execute(select(func.count()).select_from(OutboxEvent)
+                               .where(OutboxEvent.id > last_id)).scalar()
+
+
+def register(name, batch_size=DEFAULT_BATCH, event_types=None):
+    """Decorator registering handler(session, events) as consumer `name`."""
+    def wrap(handler):
+        consumers[name] = Consumer(name, handler, batch_size, event_types)
+        return handler
+    return wrap
+
+
+def prune(session, older_than):
+    """Delete events created before `older_than` that every checkpoint has passed.
+
+    The newest event is always kept, so the table is never emptied and its
+    ids keep counting up from there.
+    """
+    from models import OutboxCheckpoint, OutboxEvent
+    low = session.execute(select(func.min(OutboxCheckpoint.last_id))).scalar()
+    newest = session.execute(select(func.max(OutboxEvent.id))).scalar()
+    if low is None or newest is None:
+        return 0
+    deleted = session.execute(delete(OutboxEvent).where(OutboxEvent.id <= min(low, newest - 1),
+                                                        OutboxEvent.created_at < older_than)
+                              .execution_options(synchronize_session=False)).rowcount
+    session.commit()
+    return deleted
+
+
+@register('log')
+def _print_events(session, events):
+    for e in events:
+        print(_dumps(e._asdict()), flush=True)
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    from app import create_app
+    from models import db, OutboxCheckpoint, OutboxEvent
+    app = create_app(blueprints=())
+    with app.app_context():
+        if command == 'status':
+            total = db.session.execute(select(func.count()).select_from(OutboxEvent)).scalar()
+            print(f'{total} events in the outbox')
+            for checkpoint in db.session.execute(select(OutboxCheckpoint).order_by(OutboxCheckpoint.consumer)).scalars():
+                lag = Consumer(checkpoint.consumer, None).lag(db.session)
+                print(f'{checkpoint.consumer:<20} at {checkpoint.last_id:>10}  behind by {lag}  ({checkpoint.updated_at})')
+        elif command == 'tail':
+            consumer = consumers[sys.argv[2] if len(sys.argv) > 2 else 'log']
+            try:
+                consumer.run(db.session)
+            except KeyboardInterrupt:
+                pass
+        elif command == 'prune' and len(sys.argv) == 3:
+            deleted = prune(db.session, datetime.utcnow() - timedelta(days=float(sys.argv[2])))
+            print(f'Deleted {deleted} consumed events')
+        else:
+            print('usage: python outbox.py status | tail [consumer] | prune <days>')
+            sys.exit(1)
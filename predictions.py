@@ -0,0 +1,83 @@
+# predictions.py
+"""Delay and platform predictions.
+
+Delays come from the offline-trained model (see delay_model.py) when one has
+been configured. Trains the model does not know, and platforms, fall back to a
+blake2b-based estimate rather than the built-in hash(), which is salted per
+process; every worker therefore returns the same answer for the same
+train/date and responses can be cached by HTTP caches. Results are memoized in
+bounded LRU caches.
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+CACHE_SIZE = 65536
+MAX_DELAY_MINUTES = 60
+PLATFORM_COUNT = 12
+# seconds a client or proxy may reuse a prediction response
+CACHE_MAX_AGE = 3600
+
+_model_path = None
+_model = None
+_model_loaded = False
+
+
+def configure(model_path):
+    """Set the delay model directory; it is opened on the first prediction."""
+    global _model_path, _model, _model_loaded
+    _model_path, _model, _model_loaded = model_path, None, False
+    clear_cache()
+
+
+def _delay_model():
+    global _model, _model_loaded
+    if not _model_loaded:
+        if _model_path and os.path.exists(os.path.join(_model_path, 'weights.npy')):
+            from delay_model import DelayModel
+            _model = DelayModel(_model_path)
+        _model_loaded = True
+    return _model
+
+
+def stable_hash(key):
+    """64-bit hash of a string that is identical across processes and runs."""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def predict_delay(train_id, date_str):
+    """Estimated delay in minutes for a train on a YYYY-MM-DD date."""
+    model = _delay_model()
+    if model is not None and train_id.isdigit():
+        try:
+            est = model.predict(int(train_id), date_str)
+        except ValueError:
+            est = None
+        if est is not None:
+            return est
+    return stable_hash(f"{train_id}:{date_str}") % MAX_DELAY_MINUTES
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def predict_platform(train_id):
+    """Predicted platform number (1-12) for a train."""
+    return stable_hash(str(train_id)) % PLATFORM_COUNT + 1
+
+
+def predict_batch(train_ids, date_str):
+    """Delay and platform for every train id on one date."""
+    out = []
+    for train_id in train_ids:
+        train_id = str(train_id)
+        out.append({
+            'train_id': train_id,
+            'estimated_delay_minutes': predict_delay(train_id, date_str),
+            'predicted_platform': predict_platform(train_id),
+        })
+    return out
+
+
+def clear_cache():
+    predict_delay.cache_clear()
+    predict_platform.cache_clear()
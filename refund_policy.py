@@ -0,0 +1,147 @@
+# refund_policy.py
+"""Refund policies defined as data and compiled into bracket tables.
+
+A policy is a list of time brackets, each giving the share of the fare
+refunded and a flat cancellation fee per seat, for cancellations made at
+least `min_days` days before travel:
+
+    {"name": "ac-premium", "train_no": "IR-001", "class": "AC",
+     "brackets": [{"min_days": 4, "percent": 90, "fee": 60},
+                  {"min_days": 1, "percent": 50, "fee": 60},
+                  {"min_days": null, "percent": 25}]}
+
+`train_no`, `class` and `quota` are optional match keys; a booking uses the
+most specific policy that matches (train beats class beats quota), and the
+policy without match keys is the default. Bookings do not record a quota,
+so callers pass one explicitly when they have it.
+
+Policies are read from the JSON list at REFUND_POLICY_PATH when that file
+exists, else DEFAULT_POLICIES (the original 90/50/25% rules) apply. Each is
+compiled into ascending threshold, percent (basis points) and fee (paise)
+arrays: a refund is one bisect, and a batch is one searchsorted over numpy
+arrays. Refunds are rounded half-even to paise, like Decimal.quantize.
+"""
+import json
+import os
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+
+PAISE = Decimal('0.01')
+# min_days of an open-ended last bracket
+NO_LIMIT = -10 ** 6
+
+DEFAULT_POLICIES = [{
+    "name": "default",
+    "brackets": [
+        {"min_days": 4, "percent": 90},  # more than 72 hours before travel
+        {"min_days": 1, "percent": 50},  # 24-72 hours
+        {"min_days": None, "percent": 25},  # under 24 hours
+    ],
+}]
+
+
+class CompiledPolicy:
+    __slots__ = ('name', 'thresholds', 'percent_bp', 'fee_paise', '_np')
+
+    def __init__(self, spec):
+        self.name = spec.get('name', '')
+        brackets = sorted(spec['brackets'], key=lambda b: NO_LIMIT if b.get('min_days') is None else b['min_days'])
+        if not brackets:
+            raise ValueError(f"refund policy {self.name!r} has no brackets")
+        self.thresholds = [NO_LIMIT if b.get('min_days') is None else int(b['min_days']) for b in brackets]
+        if len(set(self.thresholds)) != len(self.thresholds):
+            raise ValueError(f"refund policy {self.name!r} has overlapping brackets")
+        self.percent_bp = [int(Decimal(str(b.get('percent', 0))) * 100) for b in brackets]
+        self.fee_paise = [int(Decimal(str(b.get('fee', 0))) * 100) for b in brackets]
+        self._np = (np.array(self.thresholds, dtype=np.int64), np.array(self.percent_bp, dtype=np.int64),
+                    np.array(self.fee_paise, dtype=np.int64))
+
+    def refund_paise(self, total_paise, days_before, seats=1):
+        i = bisect_right(self.thresholds, days_before) - 1
+        if i < 0:
+            return 0
+        q, r = divmod(total_paise * self.percent_bp[i], 10000)
+        q += r > 5000 or (r == 5000 and q % 2 == 1)
+        return max(q - self.fee_paise[i] * seats, 0)
+
+    def refund_paise_batch(self, totals, days_before, seats=1):
+        thresholds, percent_bp, fee_paise = self._np
+        totals = np.asarray(totals, dtype=np.int64)
+        i = np.searchsorted(thresholds, np.broadcast_to(np.asarray(days_before), totals.shape), side='right') - 1
+        covered = i >= 0
+        i = np.maximum(i, 0)
+        q, r = np.divmod(totals * percent_bp[i], 10000)
+        q += (r > 5000) | ((r == 5000) & (q % 2 == 1))
+        return np.where(covered, np.maximum(q - fee_paise[i] * np.asarray(seats, dtype=np.int64), 0), 0)
+
+
+class RefundPolicyEngine:
+    """Resolves and applies compiled refund policies."""
+
+    def __init__(self, specs=None):
+        self._policies = {}
+        for spec in specs or DEFAULT_POLICIES:
+            key = (spec.get('train_no'), spec.get('class'), spec.get('quota'))
+            if key in self._policies:
+                raise ValueError(f"duplicate refund policy for {key}")
+            self._policies[key] = CompiledPolicy(spec)
+        if (None, None, None) not in self._policies:
+            self._policies[(None, None, None)] = CompiledPolicy(DEFAULT_POLICIES[0])
+        self.by_train = any(train_no for train_no, _, _ in self._policies)
+        self._resolved = {}
+
+    @classmethod
+    def load(cls, path):
+        if path and os.path.exists(path):
+            with open(path) as f:
+                return cls(json.load(f))
+        return cls()
+
+    def policy_for(self, train_no=None, cls=None, quota=None):
+        key = (train_no, cls, quota)
+        policy = self._resolved.get(key)
+        if policy is None:
+            for candidate in ((train_no, cls, quota), (train_no, cls, None), (train_no, None, quota),
+                              (train_no, None, None), (None, cls, quota), (None, cls, None),
+                              (None, None, quota), (None, None, None)):
+                policy = self._policies.get(candidate)
+                if policy is not None:
+                    break
+            self._resolved[key] = policy
+        return policy
+
+    def refund(self, total, days_before, seats=1, train_no=None, cls=None, quota=None):
+        """Refund for one booking as Decimal rupees."""
+        total_paise = int((Decimal(total) * 100).to_integral_value(ROUND_HALF_EVEN))
+        paise = self.policy_for(train_no, cls, quota).refund_paise(total_paise, days_before, seats)
+        return Decimal(paise).scaleb(-2).quantize(PAISE)
+
+    def refund_paise_batch(self, totals, days_before, seats=1, train_no=None, classes=None, quota=None):
+        """Refunds in paise for arrays of totals in paise; `classes` may vary per booking."""
+        totals = np.asarray(totals, dtype=np.int64)
+        if classes is None:
+            return self.policy_for(train_no, None, quota).refund_paise_batch(totals, days_before, seats)
+        classes = np.asarray(classes)
+        days = np.broadcast_to(np.asarray(days_before), totals.shape)
+        seats = np.broadcast_to(np.asarray(seats), totals.shape)
+        out = np.zeros(totals.shape, dtype=np.int64)
+        for cls in np.unique(classes):
+            mask = classes == cls
+            out[mask] = self.policy_for(train_no, str(cls), quota).refund_paise_batch(totals[mask], days[mask], seats[mask])
+        return out
+
+
+_engine = RefundPolicyEngine()
+
+
+def configure(path):
+    """Load policies from `path` (if it exists) for calculate_refund and bulk cancellation."""
+    global _engine
+    _engine = RefundPolicyEngine.load(path)
+    return _engine
+
+
+def engine():
+    return _engine
@@ -0,0 +1,166 @@
+# search_view.py
+"""Materialized search view: one row per train x travel date x class.
+
+Rows for a travel date are built the first time that date is searched, from
+the train catalog (running days from train_calendar), `seat_availability` and
+`fare_json`. After that the seat engine (utils.decrement_seats and
+utils.increment_seats) keeps `seats_left` current in the same transaction as
+the seat change, so a search is one indexed query on travel_date, joined to
+the station-pair lookup in train_stops (see stations.py) when a source or
+destination is given, that only returns bookable trains. A train matches if
+it calls at the source and later at the destination anywhere on its route;
+`seats_left` is the full-route figure.
+"""
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+
+import train_calendar
+from segments import route_stops
+
+# trains read per batch when building rows for every train
+BATCH_TRAINS = 200
+
+
+def city_key(name):
+    return (name or '').strip().lower()
+
+
+def _rows(session, trains, days):
+    from models import SeatAvailability
+    q = session.query(SeatAvailability.train_id, SeatAvailability.travel_date, SeatAvailability.cls,
+                      SeatAvailability.seats_left).filter(SeatAvailability.travel_date.in_(days))
+    if len(trains) == 1:
+        q = q.filter(SeatAvailability.train_id == trains[0].id)
+    else:
+        q = q.filter(SeatAvailability.train_id.between(trains[0].id, trains[-1].id))
+    left = {}
+    for train_id, travel_date, cls, seats_left in q:
+        left[(train_id, travel_date, cls)] = seats_left
+    runs = train_calendar.Calendars.load(session, trains, min(days), max(days)).matrix(days)
+    rows = []
+    for i, t in enumerate(trains):
+        fares = t.fare_json or {}
+        src, dst = city_key(t.source), city_key(t.destination)
+        for j, day in enumerate(days):
+            if not runs[i, j]:
+                continue
+            for cls, capacity in (t.classes_json or {}).items():
+                rows.append({
+                    'travel_date': day, 'train_id': t.id, 'cls': cls,
+                    'source_key': src, 'destination_key': dst,
+                    'seats_left': left.get((t.id, day, cls), int(capacity)),
+                    'fare': fares.get(cls, 0),
+                })
+    return rows
+
+
+def _insert_all(session, days, batch_size=BATCH_TRAINS):
+    """Insert view rows for every train on `days`, reading `batch_size` trains at a time
+    so memory does not grow with the catalog. Returns rows inserted; the caller commits."""
+    from models import Train, SearchView
+    inserted = 0
+    last_id = 0
+    while True:
+        trains = session.query(Train).filter(Train.id > last_id).order_by(Train.id).limit(batch_size).all()
+        if not trains:
+            return inserted
+        rows = _rows(session, trains, days)
+        if rows:
+            session.execute(insert(SearchView), rows)
+            inserted += len(rows)
+        last_id = trains[-1].id
+
+
+def materialize(session, days):
+    """Build view rows for any of `days` not materialized yet. Returns rows inserted."""
+    from models import SearchViewDate
+    days = list(days)
+    built = {d for (d,) in session.query(SearchViewDate.travel_date).filter(SearchViewDate.travel_date.in_(days))}
+    todo = [d for d in days if d not in built]
+    if not todo:
+        return 0
+    try:
+        inserted = _insert_all(session, todo)
+        session.execute(insert(SearchViewDate), [{'travel_date': d} for d in todo])
+        session.commit()
+    except IntegrityError:
+        # another worker materialized the same date first
+        session.rollback()
+        return 0
+    return inserted
+
+
+def search(session, day, source=None, dest=None):
+    """Bookable trains on `day` with live seats and fare per class.
+
+    Trains boarded or left part-way along their route carry the stops in
+    "from_stop"/"to_stop" (None for the route's own ends).
+    """
+    from models import Train, SearchView
+    import stations
+    materialize(session, [day])
+    q = session.query(SearchView.train_id, SearchView.cls, SearchView.seats_left, SearchView.fare,
+                      Train.train_no, Train.name, Train.source, Train.destination, Train.route) \
+        .join(Train, Train.id == SearchView.train_id) \
+        .filter(SearchView.travel_date == day, SearchView.seats_left > 0)
+    pairs = None
+    if source or dest:
+        pairs = stations.pair_query(session, source, dest)
+        if pairs is None:
+            return []
+        pairs = pairs.subquery()
+        q = q.join(pairs, pairs.c.train_id == SearchView.train_id) \
+            .add_columns(pairs.c.from_seq, pairs.c.to_seq)
+    results = {}
+    for r in q.order_by(SearchView.train_id):
+        t = results.get(r.train_id)
+        if t is None:
+            t = results[r.train_id] = {
+                "id": r.train_id, "train_no": r.train_no, "name": r.name,
+                "source": r.source, "destination": r.destination, "classes": {},
+                "from_stop": None, "to_stop": None,
+            }
+            if pairs is not None:
+                t["from_stop"], t["to_stop"] = stations.journey_stops(route_stops(r.route), r.from_seq, r.to_seq)
+        t["classes"][r.cls] = {"seats_left": r.seats_left, "fare": float(r.fare)}
+    return list(results.values())
+
+
+def apply_seats(session, train_id, travel_date, cls, seats_left):
+    """Mirror a seat_availability change into the view; the caller commits."""
+    from models import SearchView
+    session.execute(update(SearchView)
+                    .where(SearchView.train_id == train_id, SearchView.travel_date == travel_date,
+                           SearchView.cls == cls)
+                    .values(seats_left=seats_left)
+                    .execution_options(synchronize_session=False))
+
+
+def drop_train(session, train_id):
+    """Remove a train's view rows; the caller commits."""
+    from models import SearchView
+    session.execute(delete(SearchView).where(SearchView.train_id == train_id))
+
+
+def refresh_train(session, train_id):
+    """Rebuild a train's rows on every materialized date after a catalog change."""
+    from models import Train, SearchView, SearchViewDate
+    drop_train(session, train_id)
+    train = session.get(Train, train_id)
+    days = [d for (d,) in session.query(SearchViewDate.travel_date)]
+    if train is not None and days:
+        rows = _rows(session, [train], days)
+        if rows:
+            session.execute(insert(SearchView), rows)
+    session.commit()
+
+
+def rebuild(session, batch_size=BATCH_TRAINS):
+    """Rebuild every materialized date from the catalog, e.g. after a bulk import,
+    `batch_size` trains at a time; commits once."""
+    from models import SearchView, SearchViewDate
+    days = [d for (d,) in session.query(SearchViewDate.travel_date)]
+    session.execute(delete(SearchView))
+    if days:
+        _insert_all(session, days, batch_size)
+    session.commit()
@@ -0,0 +1,151 @@
+# seatmap.py
+"""Seat/berth allocation on bitmap-backed coach maps.
+
+Each (train, date, class) keeps one occupancy bitmap per route segment (see
+segments.py), packed little-endian into `SeatAvailability.seat_map`: a
+1,000-seat class on a whole-run train is 125 bytes. A seat is free for a
+journey when its bit is clear on every covered segment, so the free set is
+one OR over the segment bitmaps, and contiguous runs for a group fall out of
+shifting and AND-ing that integer. Seats are numbered coach by coach; within
+a coach every block of 8 berths follows the sleeper layout LB, MB, UB, LB,
+MB, UB, SL, SU, which is what berth preferences select on.
+"""
+from functools import lru_cache
+
+# berths per coach; classes not listed use DEFAULT_COACH_SIZE
+COACH_SIZES = {'AC': 64, 'Sleeper': 72, 'General': 90}
+DEFAULT_COACH_SIZE = 72
+BERTH_LAYOUT = ('lower', 'middle', 'upper', 'lower', 'middle', 'upper', 'side_lower', 'side_upper')
+PREFERENCES = frozenset(BERTH_LAYOUT)
+
+
+def coach_size(cls):
+    return COACH_SIZES.get(cls, DEFAULT_COACH_SIZE)
+
+
+def seat_label(cls, index):
+    """Seat index 0.. -> 'S1-12' (coach prefix from the class initial)."""
+    size = coach_size(cls)
+    return f"{(cls or 'X')[0].upper()}{index // size + 1}-{index % size + 1}"
+
+
+def seat_index(cls, label):
+    coach, berth = label[1:].split('-')
+    return (int(coach) - 1) * coach_size(cls) + int(berth) - 1
+
+
+@lru_cache(maxsize=256)
+def _run_starts(capacity, size, k):
+    """Bits j where seats j..j+k-1 exist and sit in the same coach."""
+    mask = 0
+    for j in range(capacity - k + 1):
+        if j % size + k <= size:
+            mask |= 1 << j
+    return mask
+
+
+@lru_cache(maxsize=256)
+def _berth_mask(capacity, size, preference):
+    mask = 0
+    for j in range(capacity):
+        if BERTH_LAYOUT[(j % size) % 8] == preference:
+            mask |= 1 << j
+    return mask
+
+
+def _lowest_bits(x, k):
+    out = []
+    while x and len(out) < k:
+        low = x & -x
+        out.append(low.bit_length() - 1)
+        x ^= low
+    return out
+
+
+class SeatMap:
+    """Per-segment occupancy bitmaps for one train/date/class."""
+    __slots__ = ('capacity', 'nseg', 'nbytes', 'bits')
+
+    def __init__(self, capacity, nseg=1, bits=None):
+        self.capacity = capacity
+        self.nseg = nseg
+        self.nbytes = (capacity + 7) // 8
+        self.bits = bytearray(bits) if bits is not None else bytearray(self.nbytes * nseg)
+
+    @classmethod
+    def load(cls, capacity, nseg, blob, seats_left):
+        """Map from a stored blob; `seats_left` (int or per-segment list) seeds a missing one.
+
+        A whole-run map is spread over all segments the first time a row
+        starts tracking segments, and rows sold before seat maps existed get
+        their sold seats marked from the front of the class. Resizing a class
+        rebuilds its maps from the bookings (utils.rebuild_seats), so a stored
+        map is never read at another capacity.
+        """
+        nbytes = (capacity + 7) // 8
+        if blob and len(blob) == nbytes * nseg:
+            return cls(capacity, nseg, blob)
+        if blob and len(blob) == nbytes:
+            return cls(capacity, nseg, bytes(blob) * nseg)
+        m = cls(capacity, nseg)
+        lefts = seats_left if isinstance(seats_left, (list, tuple)) else [seats_left] * nseg
+        for i, left in enumerate(lefts):
+            sold = max(capacity - left, 0)
+            m._set(i, (1 << sold) - 1)
+        return m
+
+    def _get(self, i):
+        return int.from_bytes(self.bits[i * self.nbytes:(i + 1) * self.nbytes], 'little')
+
+    def _set(self, i, value):
+        self.bits[i * self.nbytes:(i + 1) * self.nbytes] = value.to_bytes(self.nbytes, 'little')
+
+    def occupied(self, lo=0, hi=None):
+        occ = 0
+        for i in range(lo, self.nseg if hi is None else hi):
+            occ |= self._get(i)
+        return occ
+
+    def free_count(self, lo=0, hi=None):
+        return self.capacity - bin(self.occupied(lo, hi)).count('1')
+
+    def allocate(self, k, lo=0, hi=None, size=DEFAULT_COACH_SIZE, preference=None):
+        """Pick `k` free seats for segments [lo, hi); None when fewer are free.
+
+        Groups get adjacent berths in one coach when such a run exists,
+        preferring a run that contains a berth of the requested type; if no
+        run exists the lowest free seats are used.
+        """
+        hi = self.nseg if hi is None else hi
+        free = ~self.occupied(lo, hi) & ((1 << self.capacity) - 1)
+        pref = _berth_mask(self.capacity, size, preference) if preference in PREFERENCES else 0
+        if k == 1:
+            seats = _lowest_bits(free & pref, 1) or _lowest_bits(free, 1)
+        else:
+            runs = free
+            for i in range(1, k):
+                runs &= free >> i
+            runs &= _run_starts(self.capacity, size, k)
+            if runs:
+                near = pref
+                for i in range(1, k):
+                    near |= pref >> i
+                start = _lowest_bits(runs & near, 1) or _lowest_bits(runs, 1)
+                seats = list(range(start[0], start[0] + k))
+            else:
+                seats = _lowest_bits(free, k)
+        if len(seats) < k:
+            return None
+        self.mark(seats, lo, hi)
+        return seats
+
+    def mark(self, seats, lo=0, hi=None, occupied=True):
+        bits = 0
+        for s in seats:
+            bits |= 1 << s
+        for i in range(lo, self.nseg if hi is None else hi):
+            cur = self._get(i)
+            self._set(i, cur | bits if occupied else cur & ~bits)
+
+    def to_bytes(self):
+        return bytes(self.bits)
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 """Seed the database with sample trains, bookings, and test users."""
-from app import app
-from models import db, Train, SeatAvailability, User, Booking, Payment
-from datetime import datetime, date, timedelta
+from app import create_app
+from models import db, Train, User, Booking, Payment
+import counters
+import stations
 from werkzeug.security import generate_password_hash
 import uuid
 
+app = create_app(blueprints=())
+
 
 def seed_trains():
 	"""Add sample trains to the database."""
@@ -133,34 +136,10 @@ def seed_trains():
 			t = Train(**t_data)
 			db.session.add(t)
 		db.session.commit()
+		stations.migrate(db.session)
 		print(f"✓ Added {len(trains)} sample trains")
 
 
-def seed_seat_availability():
-	"""Add seat availability for trains on future dates."""
-	with app.app_context():
-		if SeatAvailability.query.count() > 0:
-			print("✓ Seat availability already exists. Skipping...")
-			return
-
-		trains = Train.query.all()
-		base_date = date.today() + timedelta(days=1)
-
-		for i in range(30):  # Next 30 days
-			travel_date = base_date + timedelta(days=i)
-			for train in trains:
-				for cls, seats in (train.classes_json or {}).items():
-					sa = SeatAvailability(
-						train_id=train.id,
-						travel_date=travel_date,
-						cls=cls,
-						seats_left=int(seats)
-					)
-					db.session.add(sa)
-		db.session.commit()
-		print(f"✓ Added seat availability for next 30 days")
-
-
 def seed_test_users():
 	"""Add demo test users."""
 	with app.app_context():
@@ -186,6 +165,8 @@ def seed_test_users():
 
 if __name__ == "__main__":
 	seed_trains()
-	seed_seat_availability()
+	# seat inventory is created lazily on first sale (see utils.decrement_seats)
 	seed_test_users()
+	with app.app_context():
+		counters.reconcile(db.session)
 	print("\n✓ Database seeded successfully!")
@@ -0,0 +1,143 @@
+# segments.py
+"""Segment-level seat inventory for partial-route bookings.
+
+A train with stops A -> B -> C -> D has three segments (A-B, B-C, C-D). For
+every (train, date, class) the seats left on each segment are stored as a
+packed int32 array in `SeatAvailability.segments`, and `seats_left` holds the
+minimum over all segments, i.e. the seats still sellable for the full run.
+A booking from B to D needs a free seat on segments 1..2, so availability is
+the minimum over the covered range and a reservation subtracts from that
+range. Both are O(log n) on a range-min segment tree with lazy range adds.
+
+Rows written before segment inventory existed have no packed array; they are
+treated as `seats_left` on every segment. Editing a train's route rebuilds
+its rows from the live bookings (utils.rebuild_seats); an array of another
+length is otherwise reset the same way.
+"""
+import sys
+from array import array
+
+
+def route_stops(route):
+    """'Delhi -> Agra -> Mumbai' -> ['Delhi', 'Agra', 'Mumbai']"""
+    return [s.strip() for s in (route or '').split('->') if s.strip()]
+
+
+def segment_range(stops, from_stop=None, to_stop=None):
+    """Half-open segment range (lo, hi) and the segment count for a journey.
+
+    Missing stops default to the origin/destination. Raises ValueError for an
+    unknown stop or a journey that does not move forward along the route.
+    """
+    nseg = max(len(stops) - 1, 1)
+    lo = stops.index(from_stop) if from_stop else 0
+    hi = stops.index(to_stop) if to_stop else nseg
+    if hi <= lo:
+        raise ValueError('alighting stop must come after boarding stop')
+    return lo, hi, nseg
+
+
+def pack(counts):
+    a = array('i', counts)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a.tobytes()
+
+
+def unpack(blob):
+    a = array('i')
+    a.frombytes(blob)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a
+
+
+class SegmentTree:
+    """Range-min tree with lazy range add over per-segment seat counts."""
+    __slots__ = ('n', 'mn', 'lazy')
+
+    def __init__(self, counts):
+        self.n = len(counts)
+        size = 1
+        while size < self.n:
+            size *= 2
+        self.mn = array('i', [0]) * (2 * size)
+        self.lazy = array('i', [0]) * (2 * size)
+        self._build(1, 0, self.n, counts)
+
+    def _build(self, node, lo, hi, counts):
+        if hi - lo == 1:
+            self.mn[node] = counts[lo]
+            return
+        mid = (lo + hi) // 2
+        self._build(2 * node, lo, mid, counts)
+        self._build(2 * node + 1, mid, hi, counts)
+        self.mn[node] = min(self.mn[2 * node], self.mn[2 * node + 1])
+
+    def _min(self, node, lo, hi, qlo, qhi):
+        if qhi <= lo or hi <= qlo:
+            return None
+        if qlo <= lo and hi <= qhi:
+            return self.mn[node]
+        mid = (lo + hi) // 2
+        left = self._min(2 * node, lo, mid, qlo, qhi)
+        right = self._min(2 * node + 1, mid, hi, qlo, qhi)
+        best = right if left is None else left if right is None else min(left, right)
+        return best + self.lazy[node]
+
+    def _add(self, node, lo, hi, qlo, qhi, delta):
+        if qhi <= lo or hi <= qlo:
+            return
+        if qlo <= lo and hi <= qhi:
+            self.mn[node] += delta
+            self.lazy[node] += delta
+            return
+        mid = (lo + hi) // 2
+        self._add(2 * node, lo, mid, qlo, qhi, delta)
+        self._add(2 * node + 1, mid, hi, qlo, qhi, delta)
+        self.mn[node] = min(self.mn[2 * node], self.mn[2 * node + 1]) + self.lazy[node]
+
+    def min(self, lo, hi):
+        """Fewest seats left on any segment in [lo, hi)."""
+        return self._min(1, 0, self.n, lo, hi)
+
+    def add(self, lo, hi, delta):
+        """Add `delta` seats to every segment in [lo, hi)."""
+        self._add(1, 0, self.n, lo, hi, delta)
+
+    def counts(self):
+        return [self.min(i, i + 1) for i in range(self.n)]
+
+
+def load(sa, nseg):
+    """SegmentTree for a SeatAvailability row with `nseg` segments."""
+    if sa.segments:
+        counts = unpack(sa.segments)
+        if len(counts) == nseg:
+            return SegmentTree(counts)
+    return SegmentTree([sa.seats_left] * nseg)
+
+
+def store(sa, tree):
+    sa.segments = pack(tree.counts())
+    sa.seats_left = tree.min(0, tree.n)
+
+
+def available(sa, lo, hi, nseg):
+    return load(sa, nseg).min(lo, hi)
+
+
+def reserve(sa, lo, hi, nseg, count):
+    """Take `count` seats on segments [lo, hi); False when any segment is short."""
+    tree = load(sa, nseg)
+    if tree.min(lo, hi) < count:
+        return False
+    tree.add(lo, hi, -count)
+    store(sa, tree)
+    return True
+
+
+def release(sa, lo, hi, nseg, count):
+    tree = load(sa, nseg)
+    tree.add(lo, hi, count)
+    store(sa, tree)
@@ -0,0 +1,70 @@
+# services.py
+"""Process-wide objects shared by the blueprints.
+
+Like `models.db`, each is created unconfigured at import and bound to the
+application by `init_app`, which create_app() calls only when it registers
+views; scripts that just need an app context never import this module.
+"""
+from flask_login import LoginManager
+
+import availability_push
+import fragments
+import predictions
+import refund_policy
+from assistant import AssistantEngine
+from counters import DashboardStats
+from fares import FareEngine
+from flash_sale import AdmissionQueue
+from fragments import FragmentCache
+from idempotency import DedupStore
+from models import db, Train, User
+from train_catalog import TrainCatalog
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+# {% cache %} fragments in templates; bump('catalog') after any train change
+fragment_cache = FragmentCache()
+# train_no -> train map for the assistant, built on first query
+assistant_engine = AssistantEngine(lambda: db.session.query(Train.id, Train.train_no).all())
+# columnar train catalog behind /search filters and sorting
+train_catalog = TrainCatalog(lambda: Train.query.order_by(Train.id).all())
+# per-train fare tables; quoting is a lookup
+fare_engine = FareEngine(lambda train_id: db.session.get(Train, train_id))
+# replays of booking/payment/cancel requests are answered from here
+dedup_store = DedupStore()
+# live progress of the bulk cancellation jobs running in this process, by job id;
+# the admin_jobs table holds their status for every worker
+cancel_jobs = {}
+# admin dashboard totals from stat_counters, as one cached JSON payload
+dashboard_stats = DashboardStats()
+
+_app = None
+
+
+def _allocate_flash_batch(key, tickets):
+    from blueprints.booking import allocate_flash_batch
+    return allocate_flash_batch(_app, key, tickets)
+
+
+flash_queue = AdmissionQueue(_allocate_flash_batch)
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return User.query.get(int(user_id))
+
+
+def init_app(app):
+    global _app
+    _app = app
+    login_manager.init_app(app)
+    fragment_cache.max_entries = app.config['FRAGMENT_CACHE_MAX_ENTRIES']
+    fragment_cache.max_age = app.config['FRAGMENT_CACHE_TTL']
+    fragments.init_app(app, fragment_cache)
+    dedup_store.configure(lambda: db.engine, app.config['IDEMPOTENCY_MAX_KEYS'], app.config['IDEMPOTENCY_TTL'])
+    flash_queue.batch_size = app.config['FLASH_SALE_BATCH_SIZE']
+    flash_queue.available = app.config['WEB_CONCURRENCY'] == 1
+    dashboard_stats.ttl = app.config['COUNTERS_CACHE_SECONDS']
+    predictions.configure(app.config['DELAY_MODEL_PATH'])
+    refund_policy.configure(app.config['REFUND_POLICY_PATH'])
+    availability_push.init_app(app, db.session)
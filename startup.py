@@ -0,0 +1,88 @@
+# startup.py
+"""Startup timing, and helpers for servers that fork workers from a preloaded app.
+
+create_app() records how long each step took (and how much the process
+grew) in a StartupTimer, logs a one-line summary and keeps it in
+app.extensions['startup']. `python startup.py` prints the full table.
+
+With gunicorn's preload_app (see gunicorn.conf.py) the master builds the app
+once, `warm()` loads what the views would otherwise import or compile on
+their first request, and `gc.freeze()` keeps the collector from writing to
+those objects, so forked workers share the pages instead of copying them.
+Each worker then calls `after_fork()` so it opens its own connections.
+"""
+import gc
+import importlib
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+# imported by views only on first use; a preloading master imports them up front
+DEFERRED_MODULES = ('train_import', 'cancellations')
+
+
+def rss_mb():
+    """Resident set size of this process in MB; the peak where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start, rss = time.perf_counter(), rss_mb()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start, rss_mb() - rss))
+
+    def add(self, name, seconds, mb=0.0):
+        self.phases.append((name, seconds, mb))
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds, _ in self.phases)
+
+    def summary(self):
+        return f'{self.total * 1000:.0f} ms (' + ', '.join(f'{name} {seconds * 1000:.0f}' for name, seconds, _ in self.phases) + ')'
+
+    def report(self):
+        lines = [f'{"phase":<22} {"ms":>8} {"+MB":>7}']
+        lines += [f'{name:<22} {seconds * 1000:>8.1f} {mb:>7.1f}' for name, seconds, mb in self.phases]
+        lines.append(f'{"total":<22} {self.total * 1000:>8.1f}   rss {rss_mb():.1f} MB')
+        return '\n'.join(lines)
+
+
+def warm(app):
+    """Import deferred modules and compile every template, e.g. in a preloading master."""
+    for name in DEFERRED_MODULES:
+        importlib.import_module(name)
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+
+def prefork(app):
+    warm(app)
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork(app):
+    """Drop connections inherited from the parent; each worker opens its own."""
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+if __name__ == '__main__':
+    from app import create_app
+    print(create_app().extensions['startup'].report())
@@ -0,0 +1,167 @@
+# stations.py
+"""Stations and per-train stop sequences.
+
+`Train.route` ("Delhi -> Agra -> Mumbai") stays the display form; the same
+route is kept normalized in `stations` (one row per city) and `train_stops`
+(one row per stop: sequence number, arrival/departure offsets in minutes
+from the origin departure, distance). Whenever a train's route changes its
+stops are rewritten with `sync_stops`; `migrate` parses existing routes in
+bulk.
+
+Station-pair lookups ("trains from A to B") are a self-join of train_stops
+on the (station_id, train_id) index, so intermediate stops match as well as
+the ends of the route. Routes carry no times per stop, so offsets are
+spread evenly over the journey time from schedule_json; distances stay NULL
+until a timetable provides them.
+"""
+from sqlalchemy import and_, bindparam, delete, func, insert, literal, select
+from sqlalchemy.orm import aliased
+
+from search_view import city_key
+from segments import route_stops
+from train_catalog import parse_duration
+
+CHUNK = 500  # ids per IN (...) list
+
+
+def stop_names(train):
+    """Stops of a train row in order, falling back to source -> destination."""
+    return route_stops(train.route) or [s for s in (train.source, train.destination) if s]
+
+
+def station_ids(session, names):
+    """{name_key: station id} for `names`, creating missing stations."""
+    from models import Station
+    wanted = {}
+    for name in names:
+        wanted.setdefault(city_key(name), name.strip())
+    ids = {}
+    keys = list(wanted)
+    for i in range(0, len(keys), CHUNK):
+        ids.update(session.execute(select(Station.name_key, Station.id)
+                                   .where(Station.name_key.in_(keys[i:i + CHUNK]))).all())
+    missing = [{'name': wanted[k], 'name_key': k} for k in keys if k not in ids]
+    if missing:
+        session.execute(insert(Station), missing)
+        for i in range(0, len(missing), CHUNK):
+            ids.update(session.execute(select(Station.name_key, Station.id).where(
+                Station.name_key.in_([m['name_key'] for m in missing[i:i + CHUNK]]))).all())
+    return ids
+
+
+def drop_stops(session, train_ids):
+    from models import TrainStop
+    train_ids = list(train_ids)
+    for i in range(0, len(train_ids), CHUNK):
+        session.execute(delete(TrainStop).where(TrainStop.train_id.in_(train_ids[i:i + CHUNK])))
+
+
+def sync_stops(session, trains):
+    """Rewrite train_stops for train rows (id, route, source, destination,
+    schedule_json); the caller commits."""
+    from models import TrainStop
+    trains = list(trains)
+    if not trains:
+        return 0
+    stops = {t.id: stop_names(t) for t in trains}
+    ids = station_ids(session, [name for names in stops.values() for name in names])
+    drop_stops(session, stops)
+    rows = []
+    for t in trains:
+        names = stops[t.id]
+        duration = parse_duration(t.schedule_json)
+        last = len(names) - 1
+        for seq, name in enumerate(names):
+            offset = round(duration * seq / last) if duration >= 0 and last > 0 else None
+            rows.append({
+                'train_id': t.id, 'station_id': ids[city_key(name)], 'seq': seq,
+                'arrival_offset': offset if seq > 0 else None,
+                'departure_offset': offset if seq < last else None,
+            })
+    if rows:
+        session.execute(insert(TrainStop), rows)
+    return len(rows)
+
+
+def migrate(session, batch_size=1000, only_missing=True):
+    """Parse routes into train_stops for every train (or only those without
+    stops), committing per batch. Returns the number of trains processed."""
+    from models import Train, TrainStop
+    done = 0
+    last_id = 0
+    while True:
+        q = select(Train.id, Train.route, Train.source, Train.destination, Train.schedule_json) \
+            .where(Train.id > last_id).order_by(Train.id).limit(batch_size)
+        if only_missing:
+            q = q.where(~select(TrainStop.id).where(TrainStop.train_id == Train.id).exists())
+        batch = session.execute(q).all()
+        if not batch:
+            return done
+        sync_stops(session, batch)
+        session.commit()
+        done += len(batch)
+        last_id = batch[-1].id
+
+
+def _matching_stations(session, name):
+    """Station ids for a search term: the exact station, else any containing it."""
+    from models import Station
+    key = city_key(name)
+    ids = session.execute(select(Station.id).where(Station.name_key == key)).scalars().all()
+    if not ids:
+        ids = session.execute(select(Station.id).where(Station.name_key.contains(key))).scalars().all()
+    return ids
+
+
+_pair_statements = {}
+
+
+def _pair_statement(by_source, by_dest):
+    """Prepared pair select for the given sides, built once (ORM aliasing is slow)."""
+    stmt = _pair_statements.get((by_source, by_dest))
+    if stmt is None:
+        from models import TrainStop
+        a, b = aliased(TrainStop), aliased(TrainStop)
+        on = b.seq > a.seq if by_source and by_dest else b.seq == a.seq + 1
+        stmt = select(a.train_id,
+                      (func.min(a.seq) if by_source else literal(0)).label('from_seq'),
+                      (func.max(b.seq) if by_dest else literal(-1)).label('to_seq')) \
+            .join(b, and_(b.train_id == a.train_id, on))
+        if by_source:
+            stmt = stmt.where(a.station_id.in_(bindparam('src', expanding=True)))
+        if by_dest:
+            stmt = stmt.where(b.station_id.in_(bindparam('dst', expanding=True)))
+        stmt = _pair_statements[(by_source, by_dest)] = stmt.group_by(a.train_id)
+    return stmt
+
+
+def pair_query(session, source=None, dest=None):
+    """Select of (train_id, from_seq, to_seq) for trains calling at `source`
+    and later at `dest`, or None when a named station does not exist.
+
+    With only one side given, any train that can be boarded at `source` or
+    left at `dest` matches, and the other end is the route's own (from_seq
+    0 / to_seq -1).
+    """
+    src = _matching_stations(session, source) if source else None
+    dst = _matching_stations(session, dest) if dest else None
+    if src == [] or dst == []:
+        return None
+    params = {k: v for k, v in (('src', src), ('dst', dst)) if v is not None}
+    return _pair_statement(src is not None, dst is not None).params(**params)
+
+
+def trains_between(session, source=None, dest=None):
+    """{train_id: (from_seq, to_seq)} for a station pair; see pair_query."""
+    q = pair_query(session, source, dest)
+    if q is None:
+        return {}
+    return {r.train_id: (r.from_seq, r.to_seq) for r in session.execute(q)}
+
+
+def journey_stops(stops, from_seq, to_seq):
+    """(from_stop, to_stop) names for booking; None for the route's own ends
+    (to_seq -1 means the destination)."""
+    from_stop = stops[from_seq] if 0 < from_seq < len(stops) else None
+    to_stop = stops[to_seq] if 0 < to_seq < len(stops) - 1 else None
+    return from_stop, to_stop
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Retry storm against a running dev server: many concurrent retries of one
+booking and one payment with the same idempotency key must book once,
+decrement seats once and charge once."""
+import requests, sys, uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+BASE = 'http://127.0.0.1:5000'
+USERNAME = 'user1'
+PASSWORD = 'user123'
+RETRIES = 50
+
+s = requests.Session()
+resp = s.post(f'{BASE}/login', data={'username': USERNAME, 'password': PASSWORD}, allow_redirects=False)
+if resp.status_code not in (200, 302):
+    print('Login failed:', resp.status_code)
+    sys.exit(1)
+cookies = s.cookies.get_dict()
+
+trains = s.get(f'{BASE}/trains').json()
+if not trains:
+    print('No trains found')
+    sys.exit(1)
+tid = trains[0]['id']
+cls = next(iter(s.get(f'{BASE}/train/{tid}').json().get('fare') or {'AC': 0}))
+journey = (date.today() + timedelta(days=5)).isoformat()
+
+
+def seats_left():
+    return s.get(f'{BASE}/availability/{tid}', params={'date': journey, 'class': cls}).json()['seats_left']
+
+
+def storm(url, data):
+    """POST the same request RETRIES times concurrently, each from a fresh connection."""
+    def one(_):
+        return requests.post(url, data=data, cookies=cookies, allow_redirects=False)
+    with ThreadPoolExecutor(RETRIES) as pool:
+        return list(pool.map(one, range(RETRIES)))
+
+
+before = seats_left()
+key = uuid.uuid4().hex
+print(f'Booking storm: {RETRIES} concurrent POSTs with key {key}')
+results = storm(f'{BASE}/book/{tid}', {'journey_date': journey, 'class': cls, 'seats': '2', 'idempotency_key': key})
+locations = {r.headers.get('Location') for r in results if r.status_code in (302, 303)}
+in_progress = sum(r.status_code == 409 for r in results)
+others = [r.status_code for r in results if r.status_code not in (302, 303, 409)]
+print(f' redirects to {locations}, {in_progress} answered "in progress", other statuses {others}')
+if len(locations) != 1 or others:
+    print('FAIL: expected every completed retry to replay the same booking')
+    sys.exit(1)
+after = seats_left()
+if before - after != 2:
+    print(f'FAIL: seats went from {before} to {after}, expected one decrement of 2')
+    sys.exit(1)
+print(f' seats {before} -> {after}: booked once')
+
+replay = requests.post(f'{BASE}/book/{tid}', data={'journey_date': journey, 'class': cls, 'seats': '2', 'idempotency_key': key},
+                       cookies=cookies, allow_redirects=False)
+if replay.headers.get('Location') not in locations or replay.headers.get('Idempotent-Replayed') != 'true':
+    print('FAIL: late retry was not replayed')
+    sys.exit(1)
+mismatch = requests.post(f'{BASE}/book/{tid}', data={'journey_date': journey, 'class': cls, 'seats': '3', 'idempotency_key': key},
+                         cookies=cookies, allow_redirects=False)
+if mismatch.status_code != 422:
+    print('FAIL: key reused for a different request should be rejected, got', mismatch.status_code)
+    sys.exit(1)
+
+pnr = next(iter(locations)).rstrip('/').split('/')[-1]
+pay_key = uuid.uuid4().hex
+print(f'Payment storm for {pnr}')
+results = storm(f'{BASE}/payment/{pnr}', {'payment_method': 'CARD', 'idempotency_key': pay_key})
+codes = sorted({r.status_code for r in results})
+print(' statuses', codes)
+if not set(codes) <= {302, 303, 409}:
+    print('FAIL: unexpected payment responses')
+    sys.exit(1)
+print('Retry storm test passed')
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Tests for the outbox consumer against a throwaway SQLite database (no server needed).
+
+Run: python test_outbox.py (or collect with pytest).
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+import outbox
+from config import Config
+
+
+@pytest.fixture(scope='module')
+def app():
+    from app import create_app
+    from models import db
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='railway_test_'), 'test.db')
+
+    app = create_app(TestConfig, blueprints=())
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture
+def session(app):
+    from models import db, OutboxCheckpoint, OutboxEvent
+    with app.app_context():
+        db.session.execute(delete(OutboxEvent))
+        db.session.execute(delete(OutboxCheckpoint))
+        db.session.commit()
+        yield db.session
+        db.session.rollback()
+
+
+def add(session, event_id=None, event_type='booking.created', created_at=None):
+    from models import OutboxEvent
+    values = {'event_type': event_type, 'aggregate': 'booking', 'aggregate_id': f'P{event_id}',
+              'payload': '{"n": %d}' % (event_id or 0), 'created_at': created_at or datetime.utcnow()}
+    if event_id is not None:
+        values['id'] = event_id
+    session.execute(insert(OutboxEvent).values(**values))
+    session.commit()
+
+
+def collector(name='test', **kwargs):
+    seen = []
+    consumer = outbox.Consumer(name, lambda session, events: seen.extend(e.id for e in events), **kwargs)
+    return consumer, seen
+
+
+def last_id(session, name='test'):
+    from models import OutboxCheckpoint
+    return session.execute(select(OutboxCheckpoint.last_id).where(OutboxCheckpoint.consumer == name)).scalar()
+
+
+def test_reads_in_batches_and_keeps_its_place(session):
+    for i in range(1, 8):
+        add(session, i, 'booking.paid' if i % 3 == 0 else 'booking.created')
+    consumer, seen = collector(batch_size=3, event_types=('booking.created',))
+    assert consumer.poll(session) == 3
+    assert seen == [1, 2] and last_id(session) == 3  # the checkpoint moves past filtered events
+    while consumer.poll(session):
+        pass
+    assert seen == [1, 2, 4, 5, 7] and last_id(session) == 7
+    assert consumer.lag(session) == 0
+    # a fresh consumer object resumes from the stored checkpoint
+    again, seen_again = collector()
+    add(session, 8)
+    assert again.poll(session) == 1 and seen_again == [8]
+
+
+def test_failed_handler_keeps_the_batch(session):
+    add(session, 1)
+
+    def fail(session, events):
+        raise RuntimeError('handler down')
+
+    with pytest.raises(RuntimeError):
+        outbox.Consumer('test', fail).poll(session)
+    consumer, seen = collector()
+    assert consumer.poll(session) == 1 and seen == [1]
+
+
+def test_gap_waits_from_first_sight_then_late_event_is_delivered(session, monkeypatch):
+    monkeypatch.setattr(outbox, 'GAP_WAIT', 0.2)
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    add(session, 1, created_at=long_ago)
+    add(session, 3, created_at=long_ago)  # 2 is allocated to a transaction that has not committed
+    consumer, seen = collector()
+    assert consumer.poll(session) == 1 and seen == [1]
+    # an old created_at on the next event does not make the gap settled
+    assert consumer.poll(session) == 0
+    time.sleep(0.25)
+    assert consumer.poll(session) == 1 and seen == [1, 3] and last_id(session) == 3
+    add(session, 2, created_at=long_ago)  # the slow transaction commits
+    assert consumer.poll(session) == 1 and seen == [1, 3, 2]
+    assert consumer.poll(session) == 0
+
+
+def test_late_events_are_not_delivered_twice(session, monkeypatch):
+    monkeypatch.setattr(outbox, 'GAP_WAIT', 0.0)
+    add(session, 1)
+    add(session, 4)
+    consumer, seen = collector()
+    assert consumer.poll(session) == 2
+    add(session, 2)
+    add(session, 3)
+    add(session, 5)
+    while consumer.poll(session):
+        pass
+    assert sorted(seen) == [1, 2, 3, 4, 5] and len(seen) == 5
+
+
+def test_prune_keeps_the_newest_event(session):
+    from models import OutboxEvent
+    for _ in range(3):
+        add(session)
+    consumer, _ = collector()
+    newest = consumer.seek_to_end(session)
+    session.commit()
+    assert outbox.prune(session, datetime.utcnow() + timedelta(days=1)) == 2
+    assert session.execute(select(OutboxEvent.id)).scalars().all() == [newest]
+    add(session)
+    assert session.execute(select(OutboxEvent.id).order_by(OutboxEvent.id.desc())).scalar() == newest + 1
+
+
+def test_seek_to_end_rechecks_gaps(session):
+    add(session, 1)
+    add(session, 3)
+    consumer, seen = collector()
+    assert consumer.seek_to_end(session) == 3
+    session.commit()
+    assert consumer.poll(session) == 0
+    add(session, 2)
+    assert consumer.poll(session) == 1 and seen == [2]
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(pytest.main([__file__, '-q']))
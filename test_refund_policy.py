@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Property tests for the refund policy engine (no server needed).
+
+Random bookings are checked against the original hard-coded
+calculate_refund rules, per booking and in vectorized batches, and random
+policies are checked for invariants. Run: python test_refund_policy.py
+(or collect with pytest).
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import refund_policy
+from refund_policy import RefundPolicyEngine
+from utils import calculate_refund
+
+CASES = 20000
+today = date(2025, 1, 15)
+
+
+def legacy_refund(booking, cancel_date):
+    """calculate_refund as it was before refund policies."""
+    days_before = (booking.travel_date - cancel_date).days
+    total = Decimal(booking.total_fare)
+    if days_before > 3:
+        pct = Decimal('0.90')
+    elif days_before >= 1:
+        pct = Decimal('0.50')
+    else:
+        pct = Decimal('0.25')
+    return (total * pct).quantize(Decimal('0.01'))
+
+
+def random_bookings(rng, n):
+    out = []
+    for _ in range(n):
+        total = Decimal(rng.randrange(0, 10 ** 7)) / 100
+        out.append(SimpleNamespace(travel_date=today + timedelta(days=rng.randrange(-5, 200)), total_fare=total,
+                                   seat_count=rng.randrange(1, 7), cls=rng.choice(('AC', 'Sleeper', 'General'))))
+    return out
+
+
+def random_policy(rng, name, **match):
+    days = sorted(rng.sample(range(0, 60), rng.randrange(1, 5)), reverse=True)
+    brackets = [{"min_days": d, "percent": rng.randrange(0, 101), "fee": rng.choice((0, 20, 60, 120.5))} for d in days]
+    if rng.random() < 0.7:
+        brackets.append({"min_days": None, "percent": rng.randrange(0, 51)})
+    return dict(match, name=name, brackets=brackets)
+
+
+def test_default_policy_matches_legacy():
+    rng = random.Random(1)
+    for b in random_bookings(rng, CASES):
+        assert calculate_refund(b, cancel_date=today) == legacy_refund(b, today), b
+
+
+def test_batch_matches_single():
+    rng = random.Random(2)
+    for trial in range(20):
+        specs = [random_policy(rng, 'default'), random_policy(rng, 'ac', **{"class": "AC"}),
+                 random_policy(rng, 'train', train_no='IR-001', **{"class": "Sleeper"})]
+        engine = RefundPolicyEngine(specs)
+        bookings = random_bookings(rng, 500)
+        totals = [int(b.total_fare * 100) for b in bookings]
+        days = [(b.travel_date - today).days for b in bookings]
+        seats = [b.seat_count for b in bookings]
+        classes = [b.cls for b in bookings]
+        for train_no in (None, 'IR-001'):
+            batch = engine.refund_paise_batch(totals, days, seats, train_no, classes)
+            single = [int(engine.refund(b.total_fare, d, b.seat_count, train_no, b.cls) * 100)
+                      for b, d in zip(bookings, days)]
+            assert batch.tolist() == single
+
+
+def test_policy_invariants():
+    rng = random.Random(3)
+    for trial in range(200):
+        engine = RefundPolicyEngine([random_policy(rng, 'p')])
+        policy = engine.policy_for()
+        total = rng.randrange(0, 10 ** 7)
+        seats = rng.randrange(1, 7)
+        refunds = [policy.refund_paise(total, d, seats) for d in range(-10, 80)]
+        # never negative, never more than was paid
+        assert all(0 <= r <= total for r in refunds)
+        # at a bracket boundary the refund is exactly that bracket's rule
+        for i, threshold in enumerate(policy.thresholds):
+            if threshold == refund_policy.NO_LIMIT:
+                continue
+            expected = (Decimal(total) * policy.percent_bp[i] / 10000).quantize(Decimal(1))
+            assert policy.refund_paise(total, threshold, seats) == max(int(expected) - policy.fee_paise[i] * seats, 0)
+
+
+def test_most_specific_policy_wins():
+    specs = [{"name": "default", "brackets": [{"min_days": None, "percent": 10}]},
+             {"name": "ac", "class": "AC", "brackets": [{"min_days": None, "percent": 20}]},
+             {"name": "train", "train_no": "IR-001", "brackets": [{"min_days": None, "percent": 30}]},
+             {"name": "train-ac", "train_no": "IR-001", "class": "AC", "brackets": [{"min_days": None, "percent": 40}]}]
+    engine = RefundPolicyEngine(specs)
+    assert engine.policy_for('IR-001', 'AC').name == 'train-ac'
+    assert engine.policy_for('IR-001', 'Sleeper').name == 'train'
+    assert engine.policy_for('IR-002', 'AC').name == 'ac'
+    assert engine.policy_for('IR-002', 'Sleeper').name == 'default'
+    assert engine.refund(Decimal('100.00'), 0, 1, 'IR-001', 'AC') == Decimal('40.00')
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f'{name}: ok')
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tests for seat/berth allocation on coach bitmaps (no server needed).
+
+Random allocations and releases are checked for the invariants the booking
+path relies on: no seat is handed out twice on an overlapping journey,
+groups sit together in one coach when they can, and the stored map round
+trips. Run: python test_seatmap.py (or collect with pytest).
+"""
+import random
+
+from seatmap import BERTH_LAYOUT, SeatMap, coach_size, seat_index, seat_label
+
+CASES = 3000
+
+
+def test_labels_round_trip():
+    for cls in ('AC', 'Sleeper', 'General', 'Chair'):
+        for i in range(0, 1000, 7):
+            assert seat_index(cls, seat_label(cls, i)) == i
+    assert seat_label('Sleeper', 0) == 'S1-1'
+    assert seat_label('Sleeper', coach_size('Sleeper')) == 'S2-1'
+
+
+def test_no_double_allocation():
+    rng = random.Random(1)
+    capacity, nseg = 200, 4
+    m = SeatMap(capacity, nseg)
+    held = []  # (seats, lo, hi)
+    for _ in range(CASES):
+        if held and rng.random() < 0.4:
+            seats, lo, hi = held.pop(rng.randrange(len(held)))
+            m.mark(seats, lo, hi, occupied=False)
+            continue
+        lo = rng.randrange(0, nseg)
+        hi = rng.randrange(lo + 1, nseg + 1)
+        k = rng.randrange(1, 7)
+        free = m.free_count(lo, hi)
+        seats = m.allocate(k, lo, hi, size=coach_size('Sleeper'))
+        if seats is None:
+            assert free < k
+            continue
+        assert len(set(seats)) == k and all(0 <= s < capacity for s in seats)
+        for other, olo, ohi in held:
+            if olo < hi and lo < ohi:
+                assert not set(seats) & set(other)
+        held.append((seats, lo, hi))
+        assert m.free_count(lo, hi) == free - k
+
+
+def test_group_in_one_coach():
+    size = coach_size('AC')
+    m = SeatMap(2 * size)
+    m.mark(range(size - 2))  # two berths left in coach 1
+    seats = m.allocate(4, size=size)
+    assert seats == list(range(size, size + 4))
+    # no run of 4 left anywhere: the lowest free seats are used
+    m = SeatMap(8)
+    m.mark([1, 3, 5, 7])
+    assert m.allocate(4, size=8) == [0, 2, 4, 6]
+
+
+def test_berth_preference():
+    m = SeatMap(72)
+    seat = m.allocate(1, size=72, preference='side_upper')[0]
+    assert BERTH_LAYOUT[seat % 8] == 'side_upper'
+    seats = m.allocate(3, size=72, preference='upper')
+    assert any(BERTH_LAYOUT[s % 8] == 'upper' for s in seats)
+
+
+def test_load_from_legacy_rows():
+    # a whole-run map is spread over the segments
+    whole = SeatMap(20)
+    whole.mark([0, 1, 2])
+    m = SeatMap.load(20, 3, whole.to_bytes(), 17)
+    assert [m.free_count(i, i + 1) for i in range(3)] == [17, 17, 17]
+    # without a map, sold seats are taken from the front of the class
+    m = SeatMap.load(20, 2, None, [15, 18])
+    assert m.free_count(0, 1) == 15 and m.free_count(1, 2) == 18
+    assert SeatMap.load(20, 2, m.to_bytes(), 0).to_bytes() == m.to_bytes()
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f'{name}: ok')
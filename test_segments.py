@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Tests for the segment-level seat inventory (no server needed).
+
+Random range updates and queries on SegmentTree are checked against a
+plain list of per-segment counts, and the SeatAvailability helpers against
+the same arithmetic. Run: python test_segments.py (or collect with pytest).
+"""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import segments
+from segments import SegmentTree, pack, route_stops, segment_range, unpack
+
+CASES = 2000
+
+
+def test_tree_matches_list():
+    rng = random.Random(1)
+    for trial in range(50):
+        n = rng.randrange(1, 40)
+        counts = [rng.randrange(0, 500) for _ in range(n)]
+        tree = SegmentTree(counts)
+        for _ in range(CASES // 50):
+            lo = rng.randrange(0, n)
+            hi = rng.randrange(lo + 1, n + 1)
+            if rng.random() < 0.5:
+                delta = rng.randrange(-20, 21)
+                tree.add(lo, hi, delta)
+                for i in range(lo, hi):
+                    counts[i] += delta
+            assert tree.min(lo, hi) == min(counts[lo:hi])
+        assert tree.counts() == counts
+
+
+def test_pack_round_trip():
+    counts = [0, 1, 500, 2 ** 31 - 1, -3]
+    assert list(unpack(pack(counts))) == counts
+
+
+def test_segment_range():
+    stops = route_stops('Delhi -> Agra -> Jhansi -> Bhopal')
+    assert stops == ['Delhi', 'Agra', 'Jhansi', 'Bhopal']
+    assert segment_range(stops) == (0, 3, 3)
+    assert segment_range(stops, 'Agra', 'Bhopal') == (1, 3, 3)
+    assert segment_range(stops, to_stop='Jhansi') == (0, 2, 3)
+    assert segment_range(['Delhi'], None, None) == (0, 1, 1)
+    with pytest.raises(ValueError):
+        segment_range(stops, 'Jhansi', 'Agra')
+    with pytest.raises(ValueError):
+        segment_range(stops, 'Mumbai')
+
+
+def test_reserve_and_release():
+    sa = SimpleNamespace(seats_left=10, segments=None)
+    # a row without segments is seats_left on every segment
+    assert segments.available(sa, 0, 3, 3) == 10
+    assert segments.reserve(sa, 1, 3, 3, 4)
+    assert sa.seats_left == 6
+    assert segments.available(sa, 0, 1, 3) == 10
+    assert not segments.reserve(sa, 0, 3, 3, 7)
+    assert segments.reserve(sa, 0, 1, 3, 10)
+    assert segments.available(sa, 0, 3, 3) == 0
+    segments.release(sa, 1, 3, 3, 4)
+    assert list(unpack(sa.segments)) == [0, 10, 10]
+    # a route that changed length starts over from seats_left
+    assert segments.load(sa, 5).counts() == [0] * 5
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f'{name}: ok')
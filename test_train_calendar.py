@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests for running-day masks and the bulk calendar matrix (no server needed).
+
+Calendars.matrix is checked against a per-train, per-day evaluation of the
+same rules runs_on applies: an exception date wins, otherwise the weekday
+bit. Run: python test_train_calendar.py (or collect with pytest).
+"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from train_calendar import DAILY, WEEKDAYS, Calendars, days_mask, mask_days
+
+
+def test_days_mask():
+    assert days_mask(['mon', 'Wednesday', ' SUN ']) == 0b1000101
+    assert days_mask([0, 2, 13]) == 0b1000101  # ints are Mon=0, modulo 7
+    assert days_mask([]) == DAILY
+    assert days_mask(None) == DAILY
+    assert days_mask(0) == DAILY
+    assert days_mask(0b10) == 0b10
+    with pytest.raises(ValueError):
+        days_mask(['funday'])
+
+
+def test_mask_days_round_trip():
+    for mask in range(1, DAILY + 1):
+        assert days_mask(mask_days(mask)) == mask
+    assert mask_days(None) == list(WEEKDAYS)
+
+
+def test_matrix_matches_rules():
+    rng = random.Random(1)
+    start = date(2026, 1, 1)
+    train_ids = list(range(1, 41))
+    masks = [None if rng.random() < 0.2 else rng.randrange(1, DAILY + 1) for _ in train_ids]
+    exceptions = {}
+    for _ in range(300):
+        exceptions[(rng.choice(train_ids + [99]), start + timedelta(days=rng.randrange(-10, 100)))] = rng.random() < 0.5
+    cal = Calendars(train_ids, masks, [(t, d, r) for (t, d), r in exceptions.items()])
+    # distinct but unsorted, as search_view passes them
+    days = [start + timedelta(days=n) for n in rng.sample(range(0, 90), 60)]
+    runs = cal.matrix(days)
+    for i, (train_id, mask) in enumerate(zip(train_ids, masks)):
+        for j, day in enumerate(days):
+            expected = exceptions.get((train_id, day))
+            if expected is None:
+                expected = bool((DAILY if mask is None else mask) >> day.weekday() & 1)
+            assert runs[i, j] == expected, (train_id, day)
+
+
+def test_running_dates():
+    monday = date(2026, 10, 19)
+    cal = Calendars([7], [days_mask(['mon', 'fri'])],
+                    [(7, monday + timedelta(days=4), False), (7, monday + timedelta(days=5), True)])
+    assert cal.running_dates(7, monday, 14) == [monday, monday + timedelta(days=5), monday + timedelta(days=7),
+                                                monday + timedelta(days=11)]
+
+
+if __name__ == '__main__':
+    for name, fn in list(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            fn()
+            print(f'{name}: ok')
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for timetable record normalization (no server needed).
+
+Run: python test_train_import.py (or collect with pytest).
+"""
+import pytest
+
+from train_import import normalize, read_csv, read_ndjson
+
+RECORD = {"train_no": " IR-101 ", "name": "Taj Express", "source": "Delhi", "destination": "Agra",
+          "route": "Delhi -> Mathura -> Agra", "classes_json": {"AC": 50, "Sleeper": "200"},
+          "fare_json": {"AC": 900, "Sleeper": "350.5", "General": 100},
+          "schedule_json": {"departure": "08:00", "arrival": "11:30"}, "running_days": ["mon", "Thursday"]}
+
+
+def test_normalize():
+    row = normalize(RECORD)
+    assert row == {
+        'train_no': 'IR-101', 'name': 'Taj Express', 'source': 'Delhi', 'destination': 'Agra',
+        'route': 'Delhi -> Mathura -> Agra', 'total_seats': 250,
+        'classes_json': {'AC': 50, 'Sleeper': 200}, 'fare_json': {'AC': 900, 'Sleeper': 350.5},
+        'schedule_json': {'departure': '08:00', 'arrival': '11:30'}, 'running_days': 0b1001,
+    }
+
+
+def test_route_fills_source_and_destination():
+    row = normalize(dict(RECORD, source=None, destination='', route=['Delhi', ' Mathura', 'Agra ']))
+    assert (row['source'], row['destination'], row['route']) == ('Delhi', 'Agra', 'Delhi -> Mathura -> Agra')
+    row = normalize(dict(RECORD, route=None, schedule_json={"days": ["sat"]}, running_days=None))
+    assert row['route'] == 'Delhi -> Agra'
+    assert row['running_days'] == 0b1111111  # explicit null wins over schedule days: daily
+
+
+@pytest.mark.parametrize('change, message', [
+    ({'name': ''}, 'required'),
+    ({'route': 'Agra -> Delhi'}, 'route must run'),
+    ({'route': 7}, 'route must be'),
+    ({'classes_json': {}}, 'at least one class'),
+    ({'classes_json': ['AC']}, 'classes_json must be an object'),
+    ({'classes_json': {'AC': 2.5}}, 'positive whole number'),
+    ({'classes_json': {'AC': 0}}, 'positive whole number'),
+    ({'fare_json': [900]}, 'fare_json must be an object'),
+    ({'fare_json': {'AC': 900}}, 'no fare for Sleeper'),
+    ({'fare_json': {'AC': -1, 'Sleeper': 1}}, 'negative'),
+    ({'schedule_json': 'daily'}, 'schedule_json must be an object'),
+    ({'schedule_json': {'departure': '8am'}}, 'not HH:MM'),
+    ({'running_days': 'mon'}, 'running_days must be'),
+    ({'running_days': ['someday']}, 'unknown running day'),
+    ({'total_seats': 'many'}, 'not a number'),
+])
+def test_rejects(change, message):
+    with pytest.raises(ValueError, match=message):
+        normalize(dict(RECORD, **change))
+
+
+def test_rejects_non_object():
+    for rec in ([RECORD], 'IR-101', None):
+        with pytest.raises(ValueError):
+            normalize(rec)
+
+
+def test_readers():
+    lines = ['{"train_no": "1"}\n', '\n', '{oops\n']
+    parsed = list(read_ndjson(lines))
+    assert parsed[0] == (1, {'train_no': '1'})
+    assert parsed[1][0] == 3 and isinstance(parsed[1][1], ValueError)
+    csv_lines = ['train_no,name,source,destination,route,total_seats,classes,fares,departure,arrival,duration,days\n',
+                 'IR-1,Test,Delhi,Agra,,,AC:50;Sleeper:100,AC:900;Sleeper:300,08:00,,,mon;fri\n',
+                 'IR-2,Bad,Delhi,Agra,,,AC,AC:1,,,,\n']
+    (line1, rec), (line2, err) = read_csv(csv_lines)
+    assert line1 == 2 and normalize(rec)['classes_json'] == {'AC': 50, 'Sleeper': 100}
+    assert normalize(rec)['running_days'] == 0b10001
+    assert line2 == 3 and isinstance(err, ValueError)
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(pytest.main([__file__, '-q']))
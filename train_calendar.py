@@ -0,0 +1,139 @@
+# train_calendar.py
+"""Running-day calendars for trains.
+
+A train's running days are a weekday bitmask in `Train.running_days` (bit
+0 = Monday ... bit 6 = Sunday; NULL means daily), plus exception dates in
+`train_calendar_exceptions` that add a run (runs=True, e.g. a holiday
+special) or cancel one (runs=False). An exception always wins over the
+weekday mask.
+
+`Calendars` evaluates many trains over many dates at once with NumPy: one
+(trains x dates) boolean matrix from the masks, then the exceptions written
+into it with one fancy-indexed assignment. `runs_on` answers a single
+train/date for booking.
+"""
+import numpy as np
+from sqlalchemy import update
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+DAILY = 0b1111111
+
+
+def days_mask(days):
+    """Bitmask from weekday names ('mon', 'Tuesday') or ints (Mon=0); daily when empty."""
+    if isinstance(days, int):
+        return days & DAILY or DAILY
+    mask = 0
+    for d in days or ():
+        if isinstance(d, int):
+            mask |= 1 << (d % 7)
+            continue
+        name = str(d).strip().lower()[:3]
+        if name not in WEEKDAYS:
+            raise ValueError(f'unknown running day {d!r}')
+        mask |= 1 << WEEKDAYS.index(name)
+    return mask or DAILY
+
+
+def mask_days(mask):
+    """['mon', 'wed', ...] for a bitmask (NULL = daily)."""
+    mask = DAILY if mask is None else mask
+    return [name for i, name in enumerate(WEEKDAYS) if mask >> i & 1]
+
+
+def _day_numbers(days):
+    """Days since 1970-01-01 for dates / datetime64 values."""
+    return np.asarray(days, dtype='datetime64[D]').astype(np.int64)
+
+
+def _weekdays(day_numbers):
+    # 1970-01-01 was a Thursday (Mon=0 -> 3)
+    return (day_numbers + 3) % 7
+
+
+def runs_on(session, train, day):
+    """Whether `train` runs on `day`, honouring its exception dates."""
+    from models import TrainCalendarException
+    runs = session.query(TrainCalendarException.runs) \
+        .filter(TrainCalendarException.train_id == train.id, TrainCalendarException.date == day).scalar()
+    if runs is not None:
+        return bool(runs)
+    mask = DAILY if train.running_days is None else train.running_days
+    return bool(mask >> day.weekday() & 1)
+
+
+class Calendars:
+    """Calendars of a set of trains, evaluated in bulk.
+
+    `train_ids` and `masks` are parallel sequences (None in masks = daily);
+    `exceptions` yields (train_id, date, runs). Exceptions for trains not in
+    `train_ids` are ignored.
+    """
+
+    def __init__(self, train_ids, masks, exceptions=()):
+        self.ids = np.asarray(train_ids, dtype=np.int64)
+        self.masks = np.array([DAILY if m is None else m for m in masks], dtype=np.uint8)
+        self.pos = {int(tid): i for i, tid in enumerate(self.ids)}
+        rows, days, runs = [], [], []
+        for train_id, day, r in exceptions:
+            i = self.pos.get(train_id)
+            if i is not None:
+                rows.append(i)
+                days.append(day)
+                runs.append(bool(r))
+        self.ex_row = np.array(rows, dtype=np.int64)
+        self.ex_day = _day_numbers(days) if days else np.zeros(0, dtype=np.int64)
+        self.ex_runs = np.array(runs, dtype=bool)
+
+    @classmethod
+    def load(cls, session, trains=None, start=None, end=None):
+        """Calendars for `trains` (rows with id and running_days; all trains
+        when None), with exceptions between `start` and `end` inclusive."""
+        from models import Train, TrainCalendarException
+        if trains is None:
+            trains = session.query(Train.id, Train.running_days).order_by(Train.id).all()
+        q = session.query(TrainCalendarException.train_id, TrainCalendarException.date, TrainCalendarException.runs)
+        if start is not None:
+            q = q.filter(TrainCalendarException.date >= start)
+        if end is not None:
+            q = q.filter(TrainCalendarException.date <= end)
+        if len(trains) == 1:
+            q = q.filter(TrainCalendarException.train_id == trains[0].id)
+        return cls([t.id for t in trains], [t.running_days for t in trains], q.all())
+
+    def matrix(self, days):
+        """bool[trains, days]: whether each train runs on each of `days`."""
+        nums = _day_numbers(days)
+        runs = (self.masks[:, None] >> _weekdays(nums)[None, :].astype(np.uint8)) & 1
+        runs = runs.astype(bool)
+        if len(self.ex_day) and len(nums):
+            order = np.argsort(nums, kind='stable')
+            col = np.searchsorted(nums[order], self.ex_day)
+            col = np.minimum(col, len(nums) - 1)
+            hit = nums[order][col] == self.ex_day
+            runs[self.ex_row[hit], order[col[hit]]] = self.ex_runs[hit]
+        return runs
+
+    def running_dates(self, train_id, start, ndays):
+        """Dates in [start, start + ndays) on which `train_id` runs."""
+        days = np.arange(np.datetime64(start, 'D'), np.datetime64(start, 'D') + ndays)
+        return [d for d, r in zip(days.tolist(), self.matrix(days)[self.pos[train_id]]) if r]
+
+
+def migrate(session):
+    """Move schedule_json['days'] into running_days for trains that have no
+    mask yet; commits. Returns the number of trains updated."""
+    from models import Train
+    rows = []
+    for train_id, schedule in session.query(Train.id, Train.schedule_json).filter(Train.running_days.is_(None)):
+        schedule = dict(schedule or {})
+        try:
+            mask = days_mask(schedule.pop('days', None))
+        except ValueError:
+            mask = DAILY
+        rows.append({'id': train_id, 'running_days': mask, 'schedule_json': schedule})
+    if rows:
+        session.execute(update(Train), rows)
+        session.commit()
+    return len(rows)
+
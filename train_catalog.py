@@ -0,0 +1,162 @@
+# train_catalog.py
+"""Columnar in-memory train catalog for filtered and ranked search.
+
+`schedule_json` and `fare_json` are parsed once into NumPy columns (departure
+and duration in minutes, fares in paise per class), so /search filters with
+vector masks instead of decoding JSON per row per request. Sorting selects the
+top `offset + limit` entries with argpartition, so paging through a large
+result never sorts the whole candidate set.
+"""
+import re
+import threading
+import time
+
+import numpy as np
+
+SORT_KEYS = ('departure', 'duration', 'fare')
+HHMM_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})")
+DURATION_RE = re.compile(r"^\s*(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?\s*$", re.I)
+NO_FARE = -1
+# sort key for trains missing the sorted attribute; they rank last either way
+UNKNOWN_LAST = 10 ** 11
+
+
+def parse_hhmm(value):
+    """'08:30' -> 510; -1 when missing or malformed."""
+    m = HHMM_RE.match(value or '')
+    return int(m.group(1)) * 60 + int(m.group(2)) if m else -1
+
+
+def parse_duration(schedule):
+    """Journey minutes from schedule_json: 'duration' ('12h', '6h30m', '90m'), else arrival - departure."""
+    schedule = schedule or {}
+    m = DURATION_RE.match(str(schedule.get('duration') or ''))
+    if m and (m.group(1) or m.group(2)):
+        return int(m.group(1) or 0) * 60 + int(m.group(2) or 0)
+    dep, arr = parse_hhmm(schedule.get('departure')), parse_hhmm(schedule.get('arrival'))
+    if dep < 0 or arr < 0:
+        return -1
+    return (arr - dep) % (24 * 60)
+
+
+class _Columns:
+    """One immutable snapshot of the catalog; swapped whole on rebuild."""
+    __slots__ = ('ids', 'departure', 'duration', 'source', 'destination', 'class_index', 'fares',
+                 'min_fare', 'rows', 'pos')
+
+    def __init__(self, trains):
+        n = len(trains)
+        self.ids = np.array([t.id for t in trains], dtype=np.int64)
+        self.departure = np.array([parse_hhmm((t.schedule_json or {}).get('departure')) for t in trains], dtype=np.int64)
+        self.duration = np.array([parse_duration(t.schedule_json) for t in trains], dtype=np.int64)
+        self.source = np.array([(t.source or '').lower() for t in trains], dtype=str)
+        self.destination = np.array([(t.destination or '').lower() for t in trains], dtype=str)
+        classes = sorted({cls for t in trains for cls in (t.fare_json or {})})
+        self.class_index = {cls: i for i, cls in enumerate(classes)}
+        self.fares = np.full((n, max(len(classes), 1)), NO_FARE, dtype=np.int64)
+        for row, t in enumerate(trains):
+            for cls, fare in (t.fare_json or {}).items():
+                self.fares[row, self.class_index[cls]] = int(round(float(fare) * 100))
+        priced = np.where(self.fares >= 0, self.fares, np.iinfo(np.int64).max)
+        self.min_fare = priced.min(axis=1) if n else np.zeros(0, dtype=np.int64)
+        self.min_fare[self.min_fare == np.iinfo(np.int64).max] = NO_FARE
+        self.rows = [{
+            "id": t.id, "train_no": t.train_no, "name": t.name,
+            "source": t.source, "destination": t.destination, "route": t.route, "classes": t.classes_json,
+        } for t in trains]
+        self.pos = {int(tid): i for i, tid in enumerate(self.ids)}
+
+
+class TrainCatalog:
+    """Lazily built columnar view of the train table.
+
+    `loader` returns Train rows. The snapshot is rebuilt after `invalidate()`
+    or once it is older than `max_age` seconds, so catalog edits made by other
+    workers show up without a restart.
+    """
+
+    def __init__(self, loader, max_age=60.0):
+        self._loader = loader
+        self._max_age = max_age
+        self._cols = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._cols = None
+
+    def columns(self):
+        cols = self._cols
+        if cols is None or time.monotonic() - self._built_at > self._max_age:
+            with self._lock:
+                cols = _Columns(list(self._loader()))
+                self._cols, self._built_at = cols, time.monotonic()
+        return cols
+
+    def row(self, train_id):
+        cols = self.columns()
+        i = cols.pos.get(train_id)
+        return cols.rows[i] if i is not None else None
+
+    def query(self, ids=None, source=None, dest=None, cls=None, max_fare=None, depart_after=None,
+              depart_before=None, max_duration=None, sort=None, descending=False, offset=0, limit=None,
+              fares=None):
+        """Filter and rank trains; returns (train ids for the page, total matches).
+
+        `ids` restricts the candidates (e.g. trains with seats on a date);
+        `source`/`dest` are case-insensitive substring matches; `max_fare`
+        applies to `cls` when given, else to the cheapest class; departure
+        bounds are minutes after midnight (a window may wrap past midnight);
+        `max_duration` is in minutes. `fares` ({train_id: paise}) replaces
+        the catalog's base fares for the fare filter and sort, e.g. with the
+        quotes shown for a date and journey; trains missing from it have no fare.
+        """
+        cols = self.columns()
+        mask = np.ones(len(cols.ids), dtype=bool)
+        if ids is not None:
+            mask &= np.isin(cols.ids, np.fromiter(ids, dtype=np.int64))
+        if source:
+            mask &= np.char.find(cols.source, source.strip().lower()) >= 0
+        if dest:
+            mask &= np.char.find(cols.destination, dest.strip().lower()) >= 0
+        if cls:
+            ci = cols.class_index.get(cls)
+            if ci is None:
+                return [], 0
+            fare = cols.fares[:, ci]
+            mask &= fare >= 0
+        else:
+            fare = cols.min_fare
+        if fares is not None:
+            fare = np.full(len(cols.ids), NO_FARE, dtype=np.int64)
+            for train_id, paise in fares.items():
+                i = cols.pos.get(train_id)
+                if i is not None:
+                    fare[i] = paise
+        if max_fare is not None:
+            mask &= (fare >= 0) & (fare <= int(round(max_fare * 100)))
+        if depart_after is not None or depart_before is not None:
+            lo = depart_after if depart_after is not None else 0
+            hi = depart_before if depart_before is not None else 24 * 60 - 1
+            dep = cols.departure
+            window = (dep >= lo) & (dep <= hi) if lo <= hi else (dep >= lo) | (dep <= hi)
+            mask &= (dep >= 0) & window
+        if max_duration is not None:
+            mask &= (cols.duration >= 0) & (cols.duration <= max_duration)
+
+        idx = np.flatnonzero(mask)
+        total = len(idx)
+        end = total if limit is None else min(total, offset + limit)
+        if total and sort in SORT_KEYS:
+            key = {'departure': cols.departure, 'duration': cols.duration, 'fare': fare}[sort][idx]
+            missing = key < 0
+            if descending:
+                key = -key
+            key[missing] = UNKNOWN_LAST
+            # composite (key, id) keeps the order total, so pages never overlap
+            key = key * (int(cols.ids.max()) + 1) + cols.ids[idx]
+            if end < total:
+                part = np.argpartition(key, end - 1)[:end]
+                idx, key = idx[part], key[part]
+            idx = idx[np.argsort(key, kind='stable')]
+        return [int(i) for i in cols.ids[idx[offset:end]]], total
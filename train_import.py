@@ -0,0 +1,264 @@
+# train_import.py
+"""Bulk import/update of the train catalog from NDJSON or CSV timetables.
+
+Records are read one line at a time, so memory stays bounded by the batch
+size whatever the size of the file or request body. Each record is
+validated and normalized as it is read, then upserted by `train_no` in
+batches of `batch_size`: one SELECT to find existing trains, one bulk
+INSERT and one bulk UPDATE, the batch's train_stops rewritten (see
+stations.py), one commit. The search view is rebuilt once at
+the end instead of once per train; the caller invalidates its in-process
+caches (train catalog, assistant, fares) the same way.
+
+NDJSON lines use the admin_add_train fields:
+
+    {"train_no": "IR-101", "name": "...", "source": "Delhi", "destination": "Agra",
+     "route": "Delhi -> Mathura -> Agra", "classes_json": {"AC": 50},
+     "fare_json": {"AC": 900}, "schedule_json": {"departure": "08:00", ...},
+     "running_days": ["mon", "thu"]}
+
+CSV has a header row with train_no, name, source, destination, route,
+total_seats, classes, fares, departure, arrival, duration, days. classes and
+fares are "AC:50;Sleeper:200"; days is "mon;wed;fri" (empty = daily).
+Running days are stored as the weekday bitmask (see train_calendar.py).
+
+Bad records are skipped and reported by line number; the rest still import.
+So is an update that strands a live booking (a class removed or resized
+below its seats, a stop it uses dropped); other route and class changes
+re-seat the bookings on the new layout (utils.rebuild_seats).
+
+Run: python train_import.py <timetable.ndjson|timetable.csv> [batch_size]
+"""
+import csv
+import json
+import sys
+import time
+
+from sqlalchemy import insert, select, update
+
+import counters
+import stations
+import train_calendar
+from segments import route_stops
+from train_catalog import parse_hhmm
+
+MAX_ERRORS = 50
+CSV_FIELDS = ('train_no', 'name', 'source', 'destination', 'route', 'total_seats', 'classes', 'fares',
+              'departure', 'arrival', 'duration', 'days')
+
+
+def read_ndjson(lines):
+    """Yield (line_no, record or exception) from NDJSON text lines."""
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+def _pairs(value, what):
+    out = {}
+    for part in (value or '').split(';'):
+        if not part.strip():
+            continue
+        key, sep, num = part.partition(':')
+        if not sep:
+            raise ValueError(f'{what} entry {part.strip()!r} is not NAME:VALUE')
+        out[key.strip()] = num.strip()
+    return out
+
+
+def read_csv(lines):
+    """Yield (line_no, record or exception) from CSV text lines, in NDJSON record shape."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        line_no = reader.line_num
+        try:
+            schedule = {k: row[k].strip() for k in ('departure', 'arrival', 'duration') if (row.get(k) or '').strip()}
+            yield line_no, {
+                'train_no': row.get('train_no'), 'name': row.get('name'),
+                'source': row.get('source'), 'destination': row.get('destination'),
+                'route': row.get('route'), 'total_seats': row.get('total_seats') or None,
+                'classes_json': _pairs(row.get('classes'), 'classes'),
+                'fare_json': _pairs(row.get('fares'), 'fares'),
+                'schedule_json': schedule,
+                'running_days': [d for d in (row.get('days') or '').split(';') if d.strip()],
+            }
+        except ValueError as e:
+            yield line_no, e
+
+
+def _number(value, what):
+    try:
+        num = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{what} {value!r} is not a number')
+    if num < 0:
+        raise ValueError(f'{what} is negative')
+    return int(num) if num == int(num) else round(num, 2)
+
+
+def _object(rec, field):
+    value = rec.get(field) or {}
+    if not isinstance(value, dict):
+        raise ValueError(f'{field} must be an object')
+    return value
+
+
+def normalize(rec):
+    """Validated Train column values for one record; raises ValueError."""
+    if not isinstance(rec, dict):
+        raise ValueError('record is not an object')
+    train_no = str(rec.get('train_no') or '').strip()
+    name = str(rec.get('name') or '').strip()
+    if not train_no or not name:
+        raise ValueError('train_no and name are required')
+
+    route = rec.get('route') or ''
+    if not isinstance(route, (str, list)):
+        raise ValueError('route must be a string or a list of stops')
+    stops = [str(s).strip() for s in route if str(s).strip()] if isinstance(route, list) else route_stops(route)
+    source = str(rec.get('source') or '').strip() or (stops[0] if stops else '')
+    destination = str(rec.get('destination') or '').strip() or (stops[-1] if stops else '')
+    if not source or not destination:
+        raise ValueError('source and destination are required')
+    if not stops:
+        stops = [source, destination]
+    if stops[0] != source or stops[-1] != destination:
+        raise ValueError('route must run from source to destination')
+
+    classes = {}
+    for cls, seats in _object(rec, 'classes_json').items():
+        seats = _number(seats, f'seats for {cls}')
+        if not isinstance(seats, int) or seats <= 0:
+            raise ValueError(f'seats for {cls} must be a positive whole number')
+        classes[str(cls).strip()] = seats
+    if not classes:
+        raise ValueError('at least one class is required')
+    fare_in = _object(rec, 'fare_json')
+    missing = [cls for cls in classes if cls not in fare_in]
+    if missing:
+        raise ValueError(f"no fare for {', '.join(missing)}")
+    fares = {cls: _number(fare_in[cls], f'fare for {cls}') for cls in classes}
+
+    total = rec.get('total_seats')
+    total = sum(classes.values()) if total in (None, '') else _number(total, 'total_seats')
+
+    schedule = dict(_object(rec, 'schedule_json'))
+    for key in ('departure', 'arrival'):
+        if schedule.get(key) and parse_hhmm(schedule[key]) < 0:
+            raise ValueError(f'{key} {schedule[key]!r} is not HH:MM')
+    days = rec.get('running_days', schedule.pop('days', None))
+    if not isinstance(days, (int, list, type(None))) or isinstance(days, bool):
+        raise ValueError('running_days must be a list of weekdays')
+    running_days = train_calendar.days_mask(days)
+
+    return {
+        'train_no': train_no, 'name': name, 'source': source, 'destination': destination,
+        'route': ' -> '.join(stops), 'total_seats': int(total),
+        'classes_json': classes, 'fare_json': fares, 'schedule_json': schedule, 'running_days': running_days,
+    }
+
+
+def _flush(session, batch):
+    """Upsert {train_no: (line_no, row)}; returns (inserted, updated, [[line_no, error], ...])."""
+    from models import Train
+    from utils import rebuild_seats
+    existing = {r.train_no: r for r in session.execute(
+        select(Train.train_no, Train.id, Train.route, Train.classes_json).where(Train.train_no.in_(list(batch))))}
+    new = [row for no, (_, row) in batch.items() if no not in existing]
+    changed, errors = [], []
+    for no, (line_no, row) in batch.items():
+        old = existing.get(no)
+        if old is None:
+            continue
+        if row['classes_json'] != old.classes_json or route_stops(row['route']) != route_stops(old.route):
+            # re-seat the live bookings on the new route and capacities, or leave the train as it was
+            error = rebuild_seats(session, old.id, row['route'], row['classes_json'])
+            if error:
+                errors.append([line_no, f'{no}: {error}'])
+                continue
+        changed.append(dict(row, id=old.id))
+    if new:
+        session.execute(insert(Train), new)
+        counters.add(session, {'trains': len(new)})
+    if changed:
+        session.execute(update(Train), changed)
+    stations.sync_stops(session, session.execute(
+        select(Train.id, Train.route, Train.source, Train.destination, Train.schedule_json)
+        .where(Train.train_no.in_(list(batch)))).all())
+    session.commit()
+    return len(new), len(changed), errors
+
+
+def _count(summary, inserted, updated, errors):
+    summary['inserted'] += inserted
+    summary['updated'] += updated
+    summary['rejected'] += len(errors)
+    summary['errors'].extend(errors[:MAX_ERRORS - len(summary['errors'])])
+
+
+def import_trains(session, records, batch_size=1000, progress=None):
+    """Upsert (line_no, record) pairs from read_ndjson/read_csv by train_no.
+
+    `progress(summary)` is called after each batch. Returns a summary with
+    counts of inserted, updated and rejected records and the first
+    MAX_ERRORS errors as [line_no, message].
+    """
+    import search_view
+    started = time.perf_counter()
+    summary = {'inserted': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+    batch = {}
+    try:
+        for line_no, rec in records:
+            try:
+                if isinstance(rec, Exception):
+                    raise rec
+                row = normalize(rec)
+            except ValueError as e:
+                summary['rejected'] += 1
+                if len(summary['errors']) < MAX_ERRORS:
+                    summary['errors'].append([line_no, str(e)])
+                continue
+            # a train repeated within a batch: the last record wins
+            batch[row['train_no']] = (line_no, row)
+            if len(batch) >= batch_size:
+                _count(summary, *_flush(session, batch))
+                batch = {}
+                if progress:
+                    progress(summary)
+        if batch:
+            _count(summary, *_flush(session, batch))
+        if summary['inserted'] or summary['updated']:
+            search_view.rebuild(session)
+    except Exception:
+        session.rollback()
+        raise
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def read_records(lines, fmt):
+    if fmt == 'csv':
+        return read_csv(lines)
+    if fmt == 'ndjson':
+        return read_ndjson(lines)
+    raise ValueError(f'unknown format {fmt!r}; use ndjson or csv')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print('usage: python train_import.py <timetable.ndjson|timetable.csv> [batch_size]')
+        sys.exit(1)
+    path = sys.argv[1]
+    from app import create_app
+    from models import db
+    app = create_app(blueprints=())
+    with app.app_context(), open(path, newline='', encoding='utf-8') as f:
+        summary = import_trains(db.session, read_records(f, 'csv' if path.endswith('.csv') else 'ndjson'),
+                                batch_size=int(sys.argv[2]) if len(sys.argv) == 3 else 1000,
+                                progress=lambda s: print(f"\r{s['inserted'] + s['updated']} trains", end='', flush=True))
+    print()
+    print(summary)
@@ -1,59 +1,203 @@
 # utils.py
 import random, string
-from datetime import date, datetime, timedelta
-from decimal import Decimal
+from datetime import date, datetime
+from sqlalchemy.exc import IntegrityError
+from segments import (SegmentTree, route_stops, segment_range, release, available, load as load_segments,
+                      store as store_segments)
+from seatmap import SeatMap, coach_size, seat_label, seat_index
+from availability_push import track
 
 def generate_pnr():
     # PNR = 10 char uppercase alnum
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
 
-def calculate_refund(booking, cancel_date=None):
-    # Simplified rules:
-    # - If cancelled >72 hours before travel_date: 90% refund
-    # - 24-72 hours: 50%
-    # - <24 hours: 25%
+def calculate_refund(booking, cancel_date=None, quota=None):
+    # Rules come from the refund policy engine (refund_policy.py); by default
+    # 90% more than 72 hours before travel, 50% at 24-72 hours, 25% after.
+    import refund_policy
     if cancel_date is None:
         cancel_date = datetime.utcnow().date()
     days_before = (booking.travel_date - cancel_date).days
-    total = Decimal(booking.total_fare)
-    if days_before > 3:
-        pct = Decimal('0.90')
-    elif days_before >= 1:
-        pct = Decimal('0.50')
-    else:
-        pct = Decimal('0.25')
-    refund = (total * pct).quantize(Decimal('0.01'))
+    policies = refund_policy.engine()
+    train_no = None
+    if policies.by_train and getattr(booking, 'train_id', None):
+        from models import db, Train
+        train = db.session.get(Train, booking.train_id)
+        train_no = train.train_no if train else None
+    refund = policies.refund(booking.total_fare, days_before, getattr(booking, 'seat_count', None) or 1,
+                             train_no, getattr(booking, 'cls', None), quota)
     return refund
 
 # Seat update function
-def decrement_seats(db_session, train_id, travel_date, cls, count):
+def _class_capacity(train, cls):
+    try:
+        return int(train.classes_json.get(cls, 0))
+    except:
+        return train.total_seats
+
+def _journey(train, sa, from_stop, to_stop):
+    """Segment range (lo, hi, nseg) for a journey; whole-run rows without segment data use one segment."""
+    if from_stop or to_stop or sa.segments:
+        return segment_range(route_stops(train.route), from_stop, to_stop)
+    return 0, 1, 1
+
+def decrement_seats(db_session, train_id, travel_date, cls, count, from_stop=None, to_stop=None,
+                    preference=None, commit=True):
+    """Reserve `count` seats and allocate seat numbers.
+
+    Returns the list of seat labels (e.g. ['S1-1', 'S1-2']), or False when the
+    journey does not have enough seats. With commit=False the caller commits,
+    so the seats are persisted atomically with the booking. If another
+    transaction updated the same inventory row first, the flush raises
+    StaleDataError; roll back and retry the whole booking.
+    """
     from models import SeatAvailability, Train
-    # fetch or create seat availability row
-    sa = db_session.query(SeatAvailability).filter_by(train_id=train_id, travel_date=travel_date, cls=cls).first()
+    from search_view import apply_seats
+    train = db_session.get(Train, train_id)
+    # fetch or create seat availability row; it is locked where the database supports it, and the
+    # write back only succeeds if no one changed it since (version_id_col, StaleDataError otherwise)
+    sa = (db_session.query(SeatAvailability).filter_by(train_id=train_id, travel_date=travel_date, cls=cls)
+          .with_for_update().first())
     if not sa:
-        # initialize from train classes_json if present
-        train = db_session.query(Train).filter_by(id=train_id).first()
-        seats_total = 0
+        # first sale for this train/date/class: untouched inventory is at capacity,
+        # and the row is written in the same transaction as the sale
+        sa = SeatAvailability(train_id=train_id, travel_date=travel_date, cls=cls, seats_left=_class_capacity(train, cls))
         try:
-            seats_total = int(train.classes_json.get(cls, 0))
-        except:
-            seats_total = train.total_seats
-        sa = SeatAvailability(train_id=train_id, travel_date=travel_date, cls=cls, seats_left=seats_total)
-        db_session.add(sa)
+            # in a savepoint, so losing the race leaves the rest of the caller's transaction
+            # (e.g. earlier bookings of a flash-sale batch) intact
+            with db_session.begin_nested():
+                db_session.add(sa)
+        except IntegrityError:
+            # a concurrent request created the row first
+            sa = (db_session.query(SeatAvailability).filter_by(train_id=train_id, travel_date=travel_date, cls=cls)
+                  .with_for_update().first())
+    lo, hi, nseg = _journey(train, sa, from_stop, to_stop)
+    tree = load_segments(sa, nseg)
+    if tree.min(lo, hi) < count:
+        return False
+    seat_map = SeatMap.load(_class_capacity(train, cls), nseg, sa.seat_map, tree.counts())
+    seats = seat_map.allocate(count, lo, hi, coach_size(cls), preference)
+    if seats is None:
+        return False
+    if nseg > 1:
+        # partial-route journeys (or rows that already track segments) reserve per segment
+        tree.add(lo, hi, -count)
+        store_segments(sa, tree)
+    else:
+        sa.seats_left -= count
+    sa.seat_map = seat_map.to_bytes()
+    db_session.add(sa)
+    apply_seats(db_session, train_id, travel_date, cls, sa.seats_left)
+    track(db_session, train_id, travel_date, cls, sa.seats_left, -count)
+    if commit:
         db_session.commit()
-    if sa.seats_left < count:
+    return [seat_label(cls, i) for i in seats]
+
+def increment_seats(db_session, train_id, travel_date, cls, count, from_stop=None, to_stop=None,
+                    seat_numbers=None, commit=True):
+    from models import SeatAvailability, Train
+    from search_view import apply_seats
+    sa = (db_session.query(SeatAvailability).filter_by(train_id=train_id, travel_date=travel_date, cls=cls)
+          .with_for_update().first())
+    if not sa:
         return False
-    sa.seats_left -= count
+    train = db_session.get(Train, train_id)
+    try:
+        lo, hi, nseg = _journey(train, sa, from_stop, to_stop)
+    except ValueError:
+        # a stop since dropped from the route: give the seats back on the whole run
+        lo, hi, nseg = _journey(train, sa, None, None)
+    if seat_numbers and sa.seat_map:
+        seat_map = SeatMap.load(_class_capacity(train, cls), nseg, sa.seat_map, load_segments(sa, nseg).counts())
+        seat_map.mark([seat_index(cls, s) for s in seat_numbers.split(',')], lo, hi, occupied=False)
+        sa.seat_map = seat_map.to_bytes()
+    if nseg > 1:
+        release(sa, lo, hi, nseg, count)
+    else:
+        sa.seats_left += count
     db_session.add(sa)
-    db_session.commit()
+    apply_seats(db_session, train_id, travel_date, cls, sa.seats_left)
+    track(db_session, train_id, travel_date, cls, sa.seats_left, count)
+    if commit:
+        db_session.commit()
     return True
 
-def increment_seats(db_session, train_id, travel_date, cls, count):
-    from models import SeatAvailability
+def seats_available(db_session, train_id, travel_date, cls, from_stop=None, to_stop=None):
+    """Seats left for a journey, or None for an unknown train/class.
+
+    Inventory rows only exist once a seat has been sold; without one the
+    class is at its capacity from classes_json.
+    """
+    from models import SeatAvailability, Train
     sa = db_session.query(SeatAvailability).filter_by(train_id=train_id, travel_date=travel_date, cls=cls).first()
     if not sa:
-        return False
-    sa.seats_left += count
-    db_session.add(sa)
-    db_session.commit()
-    return True
\ No newline at end of file
+        train = db_session.get(Train, train_id)
+        if train is None or cls not in (train.classes_json or {}):
+            return None
+        if from_stop or to_stop:
+            segment_range(route_stops(train.route), from_stop, to_stop)  # validates the stops
+        return _class_capacity(train, cls)
+    if from_stop or to_stop:
+        lo, hi, nseg = _journey(db_session.get(Train, train_id), sa, from_stop, to_stop)
+        return available(sa, lo, hi, nseg)
+    return sa.seats_left
+
+def rebuild_seats(db_session, train_id, route, classes):
+    """Recompute a train's seat rows from its live bookings for a new route or class layout.
+
+    Rows from today on are rebuilt on the segments of `route` at each
+    class's capacity in `classes`: seat maps from the bookings' seat
+    numbers, seats left from their seat counts. Rows without live bookings
+    are dropped, as untouched inventory is at capacity. Returns an error
+    message, having written nothing, when a booking no longer fits: its
+    class is gone, a seat is past capacity or a stop is off the route.
+    The caller commits.
+    """
+    from models import Booking, SeatAvailability
+    today = date.today()
+    rows = {(sa.travel_date, sa.cls): sa for sa in
+            db_session.query(SeatAvailability).filter(SeatAvailability.train_id == train_id,
+                                                      SeatAvailability.travel_date >= today)}
+    bookings = {}
+    for b in db_session.query(Booking).filter(Booking.train_id == train_id, Booking.travel_date >= today,
+                                              Booking.status != 'CANCELLED'):
+        bookings.setdefault((b.travel_date, b.cls), []).append(b)
+    stops = route_stops(route)
+    rebuilt = {}
+    for key, booked in bookings.items():
+        cls = key[1]
+        if cls not in (classes or {}):
+            return f"Class {cls} has bookings"
+        capacity = int(classes[cls])
+        sa = rows.get(key)
+        partial = (sa is not None and sa.segments) or any(b.from_stop or b.to_stop for b in booked)
+        nseg = max(len(stops) - 1, 1) if partial else 1
+        counts = [capacity] * nseg
+        seat_map = SeatMap(capacity, nseg)
+        for b in booked:
+            try:
+                lo, hi, _ = segment_range(stops, b.from_stop, b.to_stop) if partial else (0, 1, 1)
+            except ValueError:
+                return f"Booking {b.pnr} uses a stop that is not on the new route"
+            seats = [seat_index(cls, s) for s in b.seat_numbers.split(',')] if b.seat_numbers else []
+            if any(s >= capacity for s in seats):
+                return f"Class {cls} has seats booked beyond {capacity}"
+            seat_map.mark(seats, lo, hi)
+            for i in range(lo, hi):
+                counts[i] -= b.seat_count
+        rebuilt[key] = (capacity, counts, seat_map)
+    for key, sa in rows.items():
+        if key not in rebuilt:
+            db_session.delete(sa)
+    for (travel_date, cls), (capacity, counts, seat_map) in rebuilt.items():
+        sa = rows.get((travel_date, cls))
+        if sa is None:
+            sa = SeatAvailability(train_id=train_id, travel_date=travel_date, cls=cls)
+            db_session.add(sa)
+        if len(counts) > 1:
+            store_segments(sa, SegmentTree(counts))
+        else:
+            sa.segments = None
+            sa.seats_left = counts[0]
+        sa.seat_map = seat_map.to_bytes()
+    return None